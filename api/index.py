@@ -7,6 +7,11 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 # Set Django settings
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-# Initialize the WSGI application
-from django.core.wsgi import get_wsgi_application
-app = get_wsgi_application()
+if os.environ.get('SERVER_MODE') == 'asgi':
+    # Initialize the ASGI application (async payment views)
+    from django.core.asgi import get_asgi_application
+    app = get_asgi_application()
+else:
+    # Initialize the WSGI application
+    from django.core.wsgi import get_wsgi_application
+    app = get_wsgi_application()
@@ -0,0 +1,204 @@
+"""
+Benchmark: payment throughput of one worker, sync DRF views under WSGI vs
+the async views under ASGI.
+
+spaces.fake_paystack stands in for Paystack, adding ``--latency`` seconds to
+every call and optionally injecting 5xx errors (``--error-rate``) and
+dropped connections (``--drop-rate``). Each mode runs in its own process
+with its own ``SERVER_MODE``, against a throwaway SQLite database, and
+requests go through the real handler and MIDDLEWARE: ``get_wsgi_application()``
+serves one payment at a time, like a single sync worker;
+``get_asgi_application()`` serves ``--concurrency`` payments at once on one
+event loop, like a single ASGI worker. Middleware that is sync-only is
+listed, since under ASGI each request hops to a thread to run it. Pass
+``--settings core.settings_api`` for the API-only profile.
+
+Usage:
+    python benchmarks/async_payments.py [--requests 100] [--concurrency 20] [--latency 0.15]
+                                        [--error-rate 0.1] [--drop-rate 0.05] [--settings core.settings]
+"""
+import argparse
+import asyncio
+import collections
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('wsgi', 'asgi')
+
+
+def asgi_call(application, method, path, query='', body=b'', headers=()):
+    """One request through an ASGI application; returns (status, body)."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+        'method': method, 'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': query.encode(), 'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+
+    async def call():
+        await application(scope, receive, send)
+        return response['status'], b''.join(response['body'])
+
+    return call()
+
+
+def wsgi_call(application, method, path, query='', body=b'', headers=()):
+    environ = {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(body),
+        'CONTENT_LENGTH': str(len(body)),
+        **{'HTTP_' + name.decode().upper().replace('-', '_'): value.decode() for name, value in headers},
+    }
+    if body:
+        environ['CONTENT_TYPE'] = 'application/json'
+    status = []
+    response = application(environ, lambda line, response_headers: status.append(int(line.split()[0])))
+    content = b''.join(response)
+    response.close()  # fires request_finished, as a WSGI server would
+    return status[0], content
+
+
+def worker(mode, args):
+    sys.path.insert(0, ROOT)
+    os.environ['DATABASE_URL'] = ''  # always the local SQLite settings
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from django.utils.module_loading import import_string
+
+    from spaces.fake_paystack import FakePaystack
+    from spaces.models import Plan
+    from users.models import CustomUser
+    from users.serializers import MyTokenObtainPairSerializer
+
+    fake = FakePaystack(
+        secret_key='sk_test_benchmark', latency=args.latency,
+        error_rate=args.error_rate, drop_rate=args.drop_rate, seed=1,
+    ).start()
+    settings.PAYSTACK_BASE_URL = fake.url
+    settings.PAYSTACK_SECRET_KEY = fake.secret_key
+    settings.PAYSTACK_POOL_SIZE = args.concurrency
+
+    setup_test_environment()
+    # A file, not the usual shared in-memory database: under ASGI each request
+    # runs its ORM calls on its own thread, and concurrent writers to a
+    # shared-cache database fail with "table is locked" instead of waiting
+    tmp = tempfile.TemporaryDirectory()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(tmp.name, 'bench.sqlite3')
+    connection.creation.create_test_db(verbosity=0)
+
+    plan = Plan.objects.create(name='Bench Plan', price_ngn=27000, included_days=8)
+    user = CustomUser.objects.create_user(email='bench@example.com', username='bench', password='bench12345')
+    token = MyTokenObtainPairSerializer.get_token(user).access_token
+    headers = [(b'authorization', f'Bearer {token}'.encode())]
+    body = json.dumps({'plan_id': plan.id}).encode()
+    outcomes = collections.Counter()
+
+    if mode == 'wsgi':
+        from django.core.wsgi import get_wsgi_application
+        application = get_wsgi_application()
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            status, content = wsgi_call(application, 'POST', '/api/payments/initialize/', body=body, headers=headers)
+            if status == 200:
+                query = urlencode({'reference': json.loads(content)['reference']})
+                status, _ = wsgi_call(application, 'GET', '/api/payments/verify/', query, headers=headers)
+            outcomes[status] += 1
+        elapsed = time.perf_counter() - started
+    else:
+        from django.core.asgi import get_asgi_application
+        application = get_asgi_application()
+
+        async def run():
+            gate = asyncio.Semaphore(args.concurrency)
+
+            async def one():
+                async with gate:
+                    status, content = await asgi_call(
+                        application, 'POST', '/api/payments/initialize/', body=body,
+                        headers=[*headers, (b'content-type', b'application/json')],
+                    )
+                    if status == 200:
+                        query = urlencode({'reference': json.loads(content)['reference']})
+                        status, _ = await asgi_call(application, 'GET', '/api/payments/verify/', query, headers=headers)
+                    outcomes[status] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(args.requests)))
+            return time.perf_counter() - started
+
+        elapsed = asyncio.run(run())
+    fake.stop()
+    tmp.cleanup()
+
+    sync_only = [name for name in settings.MIDDLEWARE if not getattr(import_string(name), 'async_capable', False)]
+    print(json.dumps({'seconds': elapsed, 'outcomes': outcomes, 'sync_only': sync_only}))
+
+
+def run_mode(mode, argv):
+    env = {**os.environ, 'SERVER_MODE': mode, 'DEBUG': 'True'}
+    out = subprocess.run(
+        [sys.executable, __file__, *argv, '--worker', mode],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=100, help='payments (initialize + verify) per run')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.15, help='simulated Paystack latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of Paystack calls answered with a 5xx')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='fraction of Paystack calls dropped')
+    parser.add_argument('--settings', default=os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings'))
+    parser.add_argument('--worker', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+        return worker(args.worker, args)
+
+    results = {mode: run_mode(mode, sys.argv[1:]) for mode in MODES}
+
+    print(f'{args.requests} payments, Paystack latency {args.latency * 1000:.0f} ms, '
+          f'error rate {args.error_rate:.0%}, drop rate {args.drop_rate:.0%}, {args.settings}')
+    print(f"{'mode':<28}{'seconds':>10}{'payments/s':>12}  outcomes (HTTP status: count)")
+    for label, result in (
+        ('WSGI, sync views', results['wsgi']),
+        (f'ASGI, {args.concurrency} in flight', results['asgi']),
+    ):
+        outcomes = {int(status): count for status, count in result['outcomes'].items()}
+        print(f"{label:<28}{result['seconds']:>10.2f}{args.requests / result['seconds']:>12.1f}"
+              f'  {dict(sorted(outcomes.items()))}')
+    print(f"speedup {results['wsgi']['seconds'] / results['asgi']['seconds']:.1f}x")
+    print(f"sync-only middleware: {', '.join(results['asgi']['sync_only']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: effective-subscription lookup in the check-in path.
+
+Compares queries and time per check-in token request for a member with a
+personal subscription and a team member covered by the team's plan, and
+for the lookup alone against the naive two-step fallback (personal query,
+then a team query). Runs against a throwaway in-memory database.
+
+Usage:
+    python benchmarks/checkin_subscription.py [--repeat 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('DEBUG', 'True')
+os.environ['DATABASE_URL'] = ''  # always the local SQLite settings
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from rest_framework.test import force_authenticate
+
+from spaces.models import Plan, Subscription
+from spaces.subscriptions import get_active_subscription, clear_active_subscription
+from spaces.views import GenerateCheckInTokenView
+from teams.models import Team
+from users.models import CustomUser
+
+
+def two_step_lookup(user):
+    """Personal subscription, then a separate query for the team's."""
+    sub = Subscription.objects.filter(user=user, is_active=True).select_related('plan').first()
+    if sub is None and user.team_id:
+        sub = Subscription.objects.filter(team__pk=user.team_id, is_active=True).select_related('plan').first()
+    return sub
+
+
+def measure(label, repeat, fn):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        elapsed = time.perf_counter() - started
+    print(f'{label:<38}{len(queries) / repeat:>12.1f}{elapsed / repeat * 1e6:>12.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=300)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    plan = Plan.objects.create(name='Bench Plan', price_ngn=27000, included_days=30)
+    team = Team.objects.create(name='Acme', subscription=Subscription.objects.create(plan=plan, is_active=True))
+    solo = CustomUser.objects.create_user(email='solo@example.com', username='solo', password='x')
+    Subscription.objects.create(user=solo, plan=plan, is_active=True)
+    member = CustomUser.objects.create_user(email='member@example.com', username='member', password='x', team=team)
+
+    view = GenerateCheckInTokenView.as_view(throttle_classes=[])  # measure the view, not the rate limit
+    factory = RequestFactory()
+
+    def checkin(user):
+        def run():
+            clear_active_subscription(user)
+            request = factory.post('/api/spaces/generate-token/')
+            force_authenticate(request, user)
+            response = view(request)
+            assert response.status_code in (200, 201), response.data
+        return run
+
+    def lookup(fn, user):
+        def run():
+            clear_active_subscription(user)
+            assert fn(user) is not None
+        return run
+
+    print(f"{'case':<38}{'queries/op':>12}{'us/op':>12}")
+    measure('generate-token, personal subscription', args.repeat, checkin(solo))
+    measure('generate-token, team subscription', args.repeat, checkin(member))
+    measure('lookup, team member, one query', args.repeat, lookup(get_active_subscription, member))
+    measure('lookup, team member, two-step', args.repeat, lookup(two_step_lookup, member))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark: DRF's stock JSONRenderer vs core.renderers.FastJSONRenderer.
+
+Payloads are built from our own serializers (partner report, team members,
+invitations, plans) plus the raw analytics/dashboard dicts, so the numbers
+reflect real response shapes including Decimal, datetime and UUID values.
+
+Usage:
+    python benchmarks/json_renderers.py [--rows 500] [--repeat 200]
+"""
+import argparse
+import datetime
+import decimal
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('DEBUG', 'True')
+
+import django
+django.setup()
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer, orjson
+from spaces.models import Plan, PartnerSpace, CheckIn
+from spaces.serializers import PlanSerializer, CheckInReportSerializer
+from teams.models import Team, Invitation
+from teams.serializers import InvitationSerializer
+from users.models import CustomUser
+from users.serializers import TeamMemberSerializer
+
+
+def build_payloads(rows):
+    now = timezone.now()
+    space = PartnerSpace(id=1, name="Seb's Hub", address='Bodija, Ibadan',
+                         payout_per_checkin_ngn=decimal.Decimal('2500.00'))
+    users = [
+        CustomUser(id=i, email=f'member{i}@example.com', username=f'member{i}',
+                   user_type='TEAM_MEMBER')
+        for i in range(rows)
+    ]
+    team = Team(id=1, name='Acme Ltd')
+
+    check_ins = [
+        CheckIn(id=i, user=users[i % rows], space=space,
+                timestamp=now - datetime.timedelta(minutes=i))
+        for i in range(rows)
+    ]
+    invitations = [
+        Invitation(id=uuid.uuid4(), team=team, email=f'invite{i}@example.com',
+                   sent_by=users[0], created_at=now, status='PENDING')
+        for i in range(rows)
+    ]
+    plans = [
+        Plan(id=i, name=f'PLAN_{i}', price_ngn=decimal.Decimal('27000.00') * i,
+             included_days=8 * i, access_tier='STANDARD')
+        for i in range(1, 6)
+    ]
+
+    return {
+        'partner_report': CheckInReportSerializer(check_ins, many=True).data,
+        'team_members': TeamMemberSerializer(users, many=True).data,
+        'invitations': InvitationSerializer(invitations, many=True).data,
+        'plans': PlanSerializer(plans, many=True).data,
+        # Raw-typed dicts, as built by the dashboard and analytics views
+        'partner_dashboard_raw': {
+            'space_name': space.name,
+            'month_count': rows,
+            'est_revenue': space.payout_per_checkin_ngn * rows,
+            'check_ins': [
+                {'id': c.id, 'user': {'email': c.user.email, 'username': c.user.username},
+                 'timestamp': c.timestamp}
+                for c in check_ins
+            ],
+        },
+        'invitations_raw': [
+            {'id': inv.id, 'email': inv.email, 'created_at': inv.created_at}
+            for inv in invitations
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print('orjson is not installed; FastJSONRenderer falls back to the stock renderer.')
+
+    stock, fast = JSONRenderer(), FastJSONRenderer()
+    payloads = build_payloads(args.rows)
+
+    print(f"{'payload':<24}{'bytes':>10}{'stock ops/s':>14}{'fast ops/s':>14}{'speedup':>10}")
+    for name, data in payloads.items():
+        size = len(stock.render(data))
+        stock_t = timeit.timeit(lambda: stock.render(data), number=args.repeat)
+        fast_t = timeit.timeit(lambda: fast.render(data), number=args.repeat)
+        print(f'{name:<24}{size:>10}{args.repeat / stock_t:>14.0f}'
+              f'{args.repeat / fast_t:>14.0f}{stock_t / fast_t:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+"""
+Load test: a mix of member and partner traffic against the whole app.
+
+Seeds simulated members (with subscriptions across the plans and some
+check-in history) and partners (one space each), then replays a weighted
+mix of requests from ``--concurrency`` threads through the WSGI handler,
+with every middleware, JWT authentication and throttling in place:
+
+    token      member   POST /api/spaces/generate-token/
+    validate   partner  POST /api/check-in/validate/ (codes issued by "token")
+    dashboard  partner  GET  /api/partner/dashboard/
+    analytics  member   GET  /api/analytics/
+    profile    member   GET  /api/users/me/
+
+Reports throughput, latency percentiles and queries per request for each
+endpoint. ``--output`` saves the results as JSON. ``--baseline`` compares
+against a saved run, so releases can be measured against each other.
+
+Runs with production settings (DEBUG off) against a scratch SQLite file,
+or against ``--database-url``. That database is migrated and seeded, and
+rows left by earlier runs are replaced, so point it at a scratch database.
+Throttle rates are raised so the run measures the app rather than the
+rate limits (``--throttle`` keeps the configured rates). SQLite takes one
+writer at a time, so its numbers under concurrency show the write lock;
+compare releases on the same database.
+
+Usage:
+    python benchmarks/load_test.py [--members 2000] [--partners 100] [--requests 5000]
+        [--concurrency 8] [--mix token=25,validate=25,dashboard=15,analytics=20,profile=15]
+        [--database-url postgres://localhost/loadtest] [--output run.json] [--baseline main.json]
+"""
+import argparse
+import collections
+import contextlib
+import datetime
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ('token', 'validate', 'dashboard', 'analytics', 'profile')
+DEFAULT_MIX = 'token=25,validate=25,dashboard=15,analytics=20,profile=15'
+EMAIL_DOMAIN = 'loadtest.invalid'
+HOST = 'workspace-africa-backend.vercel.app'
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f'unknown endpoint {name!r}; choose from {", ".join(ENDPOINTS)}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--members', type=int, default=2000)
+    parser.add_argument('--partners', type=int, default=100)
+    parser.add_argument('--history', type=int, default=6, help='Past check-ins per member (average)')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database-url', help='Scratch database to use instead of a temporary SQLite file')
+    parser.add_argument('--throttle', action='store_true', help='Keep the configured throttle rates')
+    parser.add_argument('--output', help='Save the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with results saved by an earlier --output')
+    return parser.parse_args()
+
+
+def configure(args):
+    """Point settings at the load-test database and load Django."""
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    os.environ['DEBUG'] = 'False'  # DEBUG keeps every query in memory
+    os.environ.setdefault('PAYSTACK_SECRET_KEY', 'sk_test_loadtest')
+    scratch = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        scratch = tempfile.mkdtemp(prefix='loadtest-')
+        os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(scratch, "db.sqlite3")}'
+
+    from django.conf import settings
+    if not args.database_url:
+        # Writers from several threads queue for SQLite's lock instead of failing
+        settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 30
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+    call_command('migrate', verbosity=0)
+    if connection.vendor == 'sqlite':
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+        # A deferred transaction that reads and then writes can't wait for
+        # the lock and fails with "database is locked". Take the write lock
+        # up front, as Django 5.1's transaction_mode='IMMEDIATE' does.
+        DatabaseWrapper._start_transaction_under_autocommit = (
+            lambda self: self.cursor().execute('BEGIN IMMEDIATE')
+        )
+    return scratch
+
+
+@contextlib.contextmanager
+def explicit_timestamps(model, field_name):
+    """Let bulk_create keep the values set on an auto_now_add field."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed(args, rng):
+    """Create members and partners; returns their access tokens."""
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+    from django.utils import timezone
+
+    from spaces.models import CheckIn, PartnerSpace, Plan, Subscription
+    from users.models import CustomUser
+    from users.serializers import MyTokenObtainPairSerializer
+
+    CustomUser.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+    PartnerSpace.objects.filter(name__startswith='Load Test Space').delete()
+
+    password = make_password(None)
+    now = timezone.now()
+    plans = list(Plan.objects.all())
+    with transaction.atomic():
+        spaces = PartnerSpace.objects.bulk_create([
+            PartnerSpace(
+                name=f'Load Test Space {i}', address=f'{i} Ring Road, Ibadan',
+                latitude=round(7.3775 + rng.uniform(-0.08, 0.08), 6),
+                longitude=round(3.9470 + rng.uniform(-0.08, 0.08), 6),
+            )
+            for i in range(args.partners)
+        ], batch_size=500)
+        if spaces and not spaces[0].pk:  # backends that don't return ids from bulk_create
+            spaces = list(PartnerSpace.objects.filter(name__startswith='Load Test Space').order_by('id'))
+
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                email=f'partner{i}@{EMAIL_DOMAIN}', username=f'lt-partner{i}', password=password,
+                user_type=CustomUser.UserType.PARTNER, managed_space=space,
+            )
+            for i, space in enumerate(spaces)
+        ], batch_size=500)
+        CustomUser.objects.bulk_create([
+            CustomUser(email=f'member{i}@{EMAIL_DOMAIN}', username=f'lt-member{i}', password=password)
+            for i in range(args.members)
+        ], batch_size=500)
+        members = list(CustomUser.objects.filter(email__startswith='member', email__endswith=f'@{EMAIL_DOMAIN}'))
+        partners = list(CustomUser.objects.filter(email__startswith='partner', email__endswith=f'@{EMAIL_DOMAIN}'))
+
+        # Most members are mid-period; a few have no subscription at all
+        Subscription.objects.bulk_create([
+            Subscription(user=member, plan=rng.choice(plans), is_active=True)
+            for member in members if rng.random() < 0.95
+        ], batch_size=500)
+        Subscription.objects.filter(user__in=members).update(start_date=now.date() - datetime.timedelta(days=12))
+
+        history = []
+        for member in members:
+            for _ in range(rng.randint(0, args.history * 2)):
+                history.append(CheckIn(
+                    user=member, space=rng.choice(spaces),
+                    timestamp=now - datetime.timedelta(days=rng.randint(1, 11), minutes=rng.randint(0, 600)),
+                ))
+        with explicit_timestamps(CheckIn, 'timestamp'):
+            CheckIn.objects.bulk_create(history, batch_size=500)
+
+    def tokens(users):
+        return [str(MyTokenObtainPairSerializer.get_token(user).access_token) for user in users]
+
+    return tokens(members), tokens(partners)
+
+
+class Client:
+    """Calls the WSGI app in-process, counting queries per request."""
+
+    def __init__(self, application):
+        from django.db import connections
+
+        self.application = application
+        self.connections = connections
+
+    def request(self, method, path, token, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path, 'HTTP_HOST': HOST,
+            'HTTP_AUTHORIZATION': f'Bearer {token}', 'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body),
+        }
+        setup_testing_defaults(environ)
+
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        status = []
+        started = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            for connection in self.connections.all():
+                stack.enter_context(connection.execute_wrapper(count))
+            response = self.application(environ, lambda line, headers: status.append(int(line.split()[0])))
+            content = b''.join(response)
+            response.close()  # fires request_finished, as a server would
+        return status[0], content, time.perf_counter() - started, queries
+
+
+def run(args, rng, member_tokens, partner_tokens):
+    from django.core.wsgi import get_wsgi_application
+
+    client = Client(get_wsgi_application())
+    names = list(args.mix)
+    schedule = rng.choices(names, weights=[args.mix[name] for name in names], k=args.requests)
+    plan = iter([(name, rng.randrange(1 << 30)) for name in schedule])
+    plan_lock = threading.Lock()
+    codes = collections.deque(maxlen=10000)  # issued by "token", consumed by "validate"
+    results = collections.defaultdict(list)  # endpoint -> [(status, seconds, queries)]
+
+    def call(name, pick):
+        member = member_tokens[pick % len(member_tokens)]
+        partner = partner_tokens[pick % len(partner_tokens)]
+        if name == 'token':
+            status, content, *rest = client.request('POST', '/api/spaces/generate-token/', member)
+            if status == 201:
+                codes.append(json.loads(content)['code'])
+        elif name == 'validate':
+            try:
+                code = codes.popleft()
+            except IndexError:
+                code = f'{pick % 900000 + 100000}'  # mostly unknown codes
+            status, _, *rest = client.request('POST', '/api/check-in/validate/', partner, {'code': code})
+        elif name == 'dashboard':
+            status, _, *rest = client.request('GET', '/api/partner/dashboard/', partner)
+        elif name == 'analytics':
+            status, _, *rest = client.request('GET', '/api/analytics/', member)
+        else:
+            status, _, *rest = client.request('GET', '/api/users/me/', member)
+        return (status, *rest)
+
+    def worker():
+        while True:
+            with plan_lock:
+                step = next(plan, None)
+            if step is None:
+                return
+            name, pick = step
+            try:
+                outcome = call(name, pick)
+            except Exception:
+                outcome = (599, 0.0, 0)  # the app raised instead of responding
+            results[name].append(outcome)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(results, elapsed):
+    summary = {}
+    for name in ENDPOINTS:
+        outcomes = results.get(name)
+        if not outcomes:
+            continue
+        latencies = sorted(seconds * 1000 for _, seconds, _ in outcomes)
+        statuses = collections.Counter(status for status, _, _ in outcomes)
+        summary[name] = {
+            'requests': len(outcomes),
+            'errors': sum(count for status, count in statuses.items() if status >= 500),
+            'client_errors': sum(count for status, count in statuses.items() if 400 <= status < 500),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'throughput': len(outcomes) / elapsed,
+            'p50_ms': statistics.median(latencies),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'queries_per_request': statistics.mean(queries for _, _, queries in outcomes),
+        }
+    total = sum(entry['requests'] for entry in summary.values())
+    return {'elapsed_s': elapsed, 'throughput': total / elapsed, 'endpoints': summary}
+
+
+def report(summary, baseline=None):
+    header = f"{'endpoint':<11}{'requests':>9}{'5xx':>6}{'4xx':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q/req':>7}"
+    if baseline:
+        header += f"{'p95 vs base':>13}{'q/req vs base':>15}"
+    print(header)
+    for name, entry in summary['endpoints'].items():
+        line = (
+            f"{name:<11}{entry['requests']:>9}{entry['errors']:>6}{entry['client_errors']:>6}"
+            f"{entry['throughput']:>9.1f}{entry['p50_ms']:>9.1f}{entry['p95_ms']:>9.1f}{entry['p99_ms']:>9.1f}"
+            f"{entry['queries_per_request']:>7.1f}"
+        )
+        base = (baseline or {}).get('endpoints', {}).get(name)
+        if base:
+            change = (entry['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100 if base['p95_ms'] else 0
+            line += f"{change:>+12.0f}%{entry['queries_per_request'] - base['queries_per_request']:>+15.1f}"
+        print(line)
+    print(f"\n{summary['throughput']:.1f} requests/s overall over {summary['elapsed_s']:.1f} s")
+    if baseline:
+        print(f"baseline: {baseline['throughput']:.1f} requests/s")
+
+
+def main():
+    args = parse_args()
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    scratch = configure(args)
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    if not args.throttle:
+        rates = {scope: '1000000/s' for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']}
+        override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}).enable()
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    member_tokens, partner_tokens = seed(args, rng)
+    print(f'Seeded {len(member_tokens)} members and {len(partner_tokens)} partners on {connection.vendor} '
+          f'in {time.perf_counter() - started:.1f} s')
+    print(f'{args.requests} requests from {args.concurrency} threads, mix ' +
+          ', '.join(f'{name}={weight:g}' for name, weight in args.mix.items()) + '\n')
+
+    results, elapsed = run(args, rng, member_tokens, partner_tokens)
+    summary = {
+        'settings': {key: getattr(args, key) for key in ('members', 'partners', 'requests', 'concurrency', 'seed')},
+        'mix': args.mix,
+        'database': connection.vendor,
+        **summarize(results, elapsed),
+    }
+    report(summary, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    if scratch:
+        import shutil
+        from django.db import connections
+        connections.close_all()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: a burst of payment verifications, queries and time per call.
+
+Compares the verify flow as it used to be (three sequential plan lookups,
+user lookup, reference checks, then deactivate + insert) with the current
+PaymentVerifyView (cached plan index, user lookup, insert + deactivate
+guarded by the unique reference). spaces.fake_paystack answers the verify
+calls with no added latency, so the difference is database work. Runs
+against a throwaway in-memory database.
+
+Usage:
+    python benchmarks/verify_burst.py [--verifies 500] [--plans 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('DEBUG', 'True')
+os.environ['DATABASE_URL'] = ''  # always the local SQLite settings
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.utils import timezone
+
+from spaces import paystack
+from spaces.fake_paystack import FakePaystack
+from spaces.models import Plan, Subscription
+from spaces.payment_views import PaymentVerifyView
+from users.models import CustomUser
+
+
+def legacy_verify(reference):
+    """The verify flow before the plan index, kept here for comparison."""
+    if Subscription.objects.filter(paystack_reference=reference).exists():
+        return
+    data = paystack.verify_transaction(reference)['data']
+    plan = None
+    plan_id = data['metadata'].get('plan_id')
+    if plan_id:
+        plan = Plan.objects.filter(id=plan_id).first()
+    if not plan and data.get('plan'):
+        plan = Plan.objects.filter(paystack_plan_code=data['plan']).first()
+    if not plan:
+        plan = Plan.objects.filter(price_ngn=data['amount'] / 100).first()
+    user = CustomUser.objects.filter(email=data['customer']['email']).first()
+    with transaction.atomic():
+        if Subscription.objects.filter(paystack_reference=reference).exists():
+            return
+        user.subscriptions.filter(is_active=True).update(is_active=False)
+        Subscription.objects.create(
+            user=user, plan=plan, paystack_reference=reference,
+            is_active=True, start_date=timezone.now().date(),
+        )
+
+
+def burst(label, references, verify):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for reference in references:
+            verify(reference)
+        elapsed = time.perf_counter() - started
+    n = len(references)
+    print(f'{label:<34}{len(queries) / n:>12.1f}{elapsed / n * 1000:>12.2f}{n / elapsed:>12.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--verifies', type=int, default=500)
+    parser.add_argument('--plans', type=int, default=20)
+    args = parser.parse_args()
+
+    fake = FakePaystack(secret_key='sk_test_benchmark').start()
+    settings.PAYSTACK_BASE_URL = fake.url
+    settings.PAYSTACK_SECRET_KEY = fake.secret_key
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    plans = [
+        Plan.objects.create(name=f'Bench {i}', price_ngn=1000 * i, included_days=i)
+        for i in range(1, args.plans + 1)
+    ]
+    users = [
+        CustomUser.objects.create_user(email=f'bench{i}@example.com', username=f'bench{i}', password='x')
+        for i in range(50)
+    ]
+
+    def pay(prefix):
+        # The metadata names a retired plan, so resolution falls through to the amount
+        references = []
+        for i in range(args.verifies):
+            reference = f'{prefix}-{i}'
+            plan = plans[-1 - i % len(plans)]
+            fake.initialize({'email': users[i % len(users)].email,
+                             'amount': int(plan.price_ngn * 100), 'reference': reference,
+                             'metadata': {'plan_id': '999999'}})
+            references.append(reference)
+        return references
+
+    factory = RequestFactory()
+    view = PaymentVerifyView.as_view()
+
+    def current_verify(reference):
+        view(factory.get('/api/payments/verify/', {'reference': reference}))
+
+    print(f'{args.verifies} verifications, {args.plans} plans')
+    print(f"{'flow':<34}{'queries/op':>12}{'ms/op':>12}{'ops/s':>12}")
+    burst('before (sequential plan queries)', pay('legacy'), legacy_verify)
+    burst('plan index', pay('indexed'), current_verify)
+    burst('plan index, repeat callbacks', [f'indexed-{i}' for i in range(args.verifies)], current_verify)
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,17 @@
 #!/bin/bash
+set -e
 echo "==> Starting Vercel Static Compilation Hook..."
 
 # FIXED: Bypass Vercel's new strict uv-managed environment block
 python3 -m pip install -r requirements.txt --break-system-packages
 
-# Compile the styles so WhiteNoise can serve them
-python3 manage.py collectstatic --noinput --clear
+# Hash, gzip and brotli-compress the assets. Always the full settings: the
+# API-only profile has no staticfiles app
+python3 manage.py collectstatic --noinput --clear --settings core.settings
+
+if [ ! -f staticfiles/staticfiles.json ]; then
+    echo "==> staticfiles/staticfiles.json was not written; pages would link unhashed assets" >&2
+    exit 1
+fi
 
 echo "==> Static Assets successfully compiled into staticfiles/ directory."
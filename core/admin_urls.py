@@ -0,0 +1,12 @@
+"""
+Admin URLconf, loaded on the first /admin/ request (see core/urls.py).
+
+The admin app is installed as SimpleAdminConfig, so the apps' admin
+modules are only imported here instead of at every cold start.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+app_name = 'admin'
+urlpatterns = admin.site.get_urls()
@@ -0,0 +1,283 @@
+"""
+Cache layer.
+
+Two aliases are configured from CACHE_URL (see ``cache_config``):
+
+``default``
+    The shared backend: a database cache table (``db://table``), Redis or
+    anything speaking its protocol (``redis://host:6379/0``), or a
+    per-process LocMemCache (``locmem://``, the default, used by tests as
+    the local stand-in). Throttle buckets and token versions live here
+    because every process must see their updates at once.
+
+``tiered``
+    ``TieredCache``: a small in-process LRU in front of ``default``. Hits
+    skip the network entirely; entries live locally for at most
+    ``LOCAL_TIMEOUT`` seconds, which bounds how stale another process's
+    copy can be after an invalidation. For read-mostly data such as
+    catalogs and plan lookups.
+
+App code goes through ``namespace()``, which prefixes keys per app and
+invalidates a whole namespace by bumping its version, and records hit
+rates per namespace and tier (``cache_stats()``).
+"""
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+from urllib.parse import urlparse
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+
+
+def cache_config(url, local_timeout=5, local_max_entries=1000):
+    """The CACHES setting for a CACHE_URL."""
+    parsed = urlparse(url or 'locmem://')
+    if parsed.scheme == 'locmem':
+        shared = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                  'LOCATION': parsed.netloc or 'shared'}
+    elif parsed.scheme == 'db':
+        shared = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                  'LOCATION': parsed.netloc or 'cache_table'}
+    elif parsed.scheme in ('redis', 'rediss'):
+        # Needs the redis package, which is only installed where it's used
+        shared = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': url}
+    else:
+        raise ValueError(f'Unsupported CACHE_URL scheme {parsed.scheme!r}; use locmem://, db:// or redis://')
+
+    return {
+        'default': {**shared, 'KEY_PREFIX': 'wa'},
+        'tiered': {
+            'BACKEND': 'core.cache.TieredCache',
+            'OPTIONS': {
+                'SHARED': 'default',
+                'LOCAL_TIMEOUT': local_timeout,
+                'LOCAL_MAX_ENTRIES': local_max_entries,
+            },
+        },
+    }
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def record(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = self._counts.copy()
+
+        def rate(hits, total):
+            return hits / total if total else None
+
+        local_hits, shared_hits, misses = counts['tier:local'], counts['tier:shared'], counts['tier:miss']
+        lookups = local_hits + shared_hits + misses
+        namespaces = {}
+        for name in sorted({key.split(':')[1] for key in counts if key.startswith('ns:')}):
+            hits, ns_misses = counts[f'ns:{name}:hit'], counts[f'ns:{name}:miss']
+            namespaces[name] = {'hits': hits, 'misses': ns_misses, 'hit_rate': rate(hits, hits + ns_misses)}
+        return {
+            'tiered': {
+                'local_hits': local_hits,
+                'shared_hits': shared_hits,
+                'misses': misses,
+                'local_hit_rate': rate(local_hits, lookups),
+                'hit_rate': rate(local_hits + shared_hits, lookups),
+            },
+            'namespaces': namespaces,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = _Stats()
+
+
+def cache_stats():
+    """Hit/miss counts and rates since start (or ``reset_cache_stats``)."""
+    return stats.snapshot()
+
+
+def reset_cache_stats():
+    stats.reset()
+
+
+class TieredCache(BaseCache):
+    """
+    In-process LRU in front of another cache alias (OPTIONS['SHARED']).
+    Values are pickled locally, as LocMemCache does, so callers can't
+    mutate each other's copies.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'default')
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self._max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISSING
+            pickled, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def _local_set(self, key, value, timeout):
+        local_timeout = self._local_timeout
+        if timeout is not None and timeout is not DEFAULT_TIMEOUT:
+            local_timeout = min(local_timeout, timeout)
+        if local_timeout <= 0:
+            return self._local_delete(key)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[key] = (pickled, time.monotonic() + local_timeout)
+            self._local.move_to_end(key)
+            while len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version)
+        value = self._local_get(local_key)
+        if value is not _MISSING:
+            stats.record('tier:local')
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            stats.record('tier:miss')
+            return default
+        stats.record('tier:shared')
+        self._local_set(local_key, value, None)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(self.make_and_validate_key(key, version), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(self.make_and_validate_key(key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self.make_and_validate_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Atomic in the shared backend; the local copy is refreshed on next read
+        self._local_delete(self.make_and_validate_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def clear(self):
+        self.clear_local()
+        self.shared.clear()
+
+
+class Namespace:
+    """
+    Keys scoped to one app (``<name>:v<version>:<key>``). ``invalidate()``
+    bumps the version, orphaning every key in the namespace at once;
+    the orphans expire on their own.
+    """
+
+    def __init__(self, name, alias='tiered'):
+        self.name = name
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self):
+        return f'{self.name}:version'
+
+    def version(self):
+        version = self.cache.get(self._version_key())
+        if version is None:
+            # Time-based, so a namespace whose version was evicted can't
+            # come back on an old version and find its stale keys
+            self.cache.add(self._version_key(), int(time.time()), None)
+            version = self.cache.get(self._version_key())
+        return version
+
+    def key(self, key):
+        return f'{self.name}:v{self.version()}:{key}'
+
+    def get(self, key, default=None):
+        value = self.cache.get(self.key(key), _MISSING)
+        if value is _MISSING:
+            stats.record(f'ns:{self.name}:miss')
+            return default
+        stats.record(f'ns:{self.name}:hit')
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.cache.set(self.key(key), value, timeout)
+
+    def get_or_set(self, key, build, timeout=DEFAULT_TIMEOUT):
+        """The cached value, or ``build()`` stored for next time."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            self.set(key, value, timeout)
+        return value
+
+    def delete(self, key):
+        self.cache.delete(self.key(key))
+
+    def invalidate(self):
+        """Drop every key in the namespace."""
+        try:
+            self.cache.incr(self._version_key())
+        except ValueError:
+            # No version yet (or it was evicted)
+            self.cache.set(self._version_key(), int(time.time()), None)
+
+
+def namespace(name, shared_only=False):
+    """
+    The cache namespace for ``name``. ``shared_only`` skips the local tier
+    for values other processes must see change immediately.
+    """
+    return Namespace(name, 'default' if shared_only else 'tiered')
+
+
+def clear_caches():
+    """Empty every configured cache, local tiers included (for tests)."""
+    for alias in caches:
+        caches[alias].clear()
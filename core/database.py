@@ -0,0 +1,41 @@
+"""
+Database connection strategy, chosen with the DB_CONN_MODE environment
+variable (read by core/settings.py):
+
+``persistent`` (default)
+    Keep the connection open across requests, and so across invocations of
+    a warm serverless function, for up to ``DB_CONN_MAX_AGE`` seconds.
+    Django pings it before reuse (``CONN_HEALTH_CHECKS``), so a connection
+    the server dropped while the function was frozen is replaced.
+
+``pooled``
+    Persistent connections to a transaction-mode pooler (Neon's ``-pooler``
+    endpoint, PgBouncer). Uses ``DATABASE_POOLER_URL`` when set. Server-side
+    cursors are disabled because they don't survive transaction pooling.
+
+``per-request``
+    Open and close a connection for every request (``conn_max_age=0``),
+    the old behaviour.
+
+This module must not import Django settings; settings imports it.
+"""
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+CONN_MODES = ('persistent', 'pooled', 'per-request')
+
+
+def database_config(url, mode='persistent', max_age=600, pooler_url=None):
+    """The ``DATABASES['default']`` entry for ``url`` under ``mode``."""
+    if mode not in CONN_MODES:
+        raise ImproperlyConfigured(f"DB_CONN_MODE must be one of {', '.join(CONN_MODES)}, not {mode!r}")
+
+    if mode == 'pooled' and pooler_url:
+        url = pooler_url
+    return dj_database_url.parse(
+        url,
+        conn_max_age=0 if mode == 'per-request' else max_age,
+        conn_health_checks=mode != 'per-request',
+        disable_server_side_cursors=mode == 'pooled',
+        ssl_require=False,  # sslmode=require is already in the Neon URL — don't double-set it
+    )
@@ -0,0 +1,129 @@
+"""
+Optional read replica.
+
+When DATABASE_REPLICA_URL is set, settings add a ``replica`` database
+alias. ``ReplicaRouter`` sends reads there only where a view asked for
+it: views set ``read_from_replica = True`` (analytics, partner dashboard
+and reports), and other code uses ``with use_replica():``. Everything
+else, check-in validation included, reads the primary. So a heavy
+reporting load can be moved off the primary without making any
+read-after-write path stale.
+
+Within a request or ``use_replica()`` block, the first write pins every
+later read to the primary, as do open transactions. Without a replica
+alias the router leaves every query on ``default``.
+"""
+import contextlib
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .lazy import view_class
+
+REPLICA_DB_ALIAS = 'replica'
+
+_routing = contextvars.ContextVar('replica_routing', default=None)
+
+
+class _Routing:
+    __slots__ = ('replica', 'pinned')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.pinned = False
+
+
+def replica_available():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+@contextlib.contextmanager
+def use_replica(enabled=True):
+    """Route this block's reads to the replica (or, with False, to the primary)."""
+    token = _routing.set(_Routing(enabled))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+def use_primary():
+    return use_replica(False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if (state is None or not state.replica or state.pinned or not replica_available()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            # Read-your-writes for the rest of the request
+            state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica follows the primary through replication
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaChangeListMixin:
+    """ModelAdmin mixin serving changelist pages (GET only) from the replica."""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with use_replica():
+            response = super().changelist_view(request, extra_context)
+            # The result list is a lazy queryset; it runs while rendering
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Scope routing to the request: reads go to the replica for safe-method
+    requests whose view sets ``read_from_replica = True``. Runs in either
+    mode; under ASGI the context variable follows the request onto the
+    threads that run its sync code.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _routing.set(_Routing(replica=False))
+        try:
+            return self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+    async def __acall__(self, request):
+        token = _routing.set(_Routing(replica=False))
+        try:
+            return await self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _routing.get()
+        if state is not None and request.method in ('GET', 'HEAD', 'OPTIONS'):
+            state.replica = getattr(view_class(view_func), 'read_from_replica', False)
+        return None
@@ -0,0 +1,59 @@
+"""
+Deferred imports for URLconfs, to keep cold starts short.
+
+``include()`` imports a URLconf, and with it every view module it names,
+as soon as the root URLconf loads. ``lazy_include`` hands the resolver the
+dotted path instead, and Django imports it when a request first matches
+the prefix. ``lazy_view`` does the same for one rarely used class-based
+view.
+"""
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+
+
+def lazy_include(module, app_name=None, namespace=None):
+    """``include(module)`` that imports ``module`` on first match."""
+    # path() builds a URLResolver from this tuple, and URLResolver only
+    # imports a string urlconf when its patterns are first needed
+    return (module, app_name, namespace or app_name)
+
+
+def lazy_view(dotted_path, is_async=False, **initkwargs):
+    """
+    ``View.as_view(**initkwargs)`` for the view at ``dotted_path``, imported
+    on the first request. Only for DRF views, or plain views that exempt
+    themselves from CSRF: the wrapper is csrf_exempt up front, as DRF views
+    are, and DRF still enforces CSRF for session auth. Pass ``is_async``
+    for views with async handlers, so Django awaits them on the event loop.
+    """
+    view = None
+
+    def load():
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view
+
+    if is_async:
+        async def load_and_dispatch(request, *args, **kwargs):
+            return await load()(request, *args, **kwargs)
+        load_and_dispatch.csrf_exempt = True
+    else:
+        @csrf_exempt
+        def load_and_dispatch(request, *args, **kwargs):
+            return load()(request, *args, **kwargs)
+
+    load_and_dispatch.lazy_view_path = dotted_path
+    return load_and_dispatch
+
+
+def view_class(view_func):
+    """
+    The class behind a resolved view, for middleware reading class
+    attributes such as ``metrics_name``. A ``lazy_view``'s class is imported
+    here, by the request that is about to run it anyway.
+    """
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None and getattr(view_func, 'lazy_view_path', None):
+        cls = import_string(view_func.lazy_view_path)
+    return cls
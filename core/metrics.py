@@ -0,0 +1,215 @@
+"""
+In-process metrics, exposed in the Prometheus text format at /metrics/.
+
+Counters and histograms are plain dicts behind a lock, keyed by label
+values, so recording costs a dict lookup and an addition. Each worker
+process keeps its own numbers; Prometheus sums them across processes
+when they are scraped separately, and a restart resets them (as
+Prometheus expects of counters).
+
+Views opt in to request metrics with ``metrics_name = '<name>'``:
+``MetricsMiddleware`` then records their latency, status codes and the
+time spent in the database. Keep label values to small fixed sets
+(view names, reasons); never put user input in a label.
+"""
+import bisect
+import contextlib
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+
+from .lazy import view_class
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.extend(self._samples(key, value))
+        return lines
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self, key, value):
+        return [f'{self.name}{_format_labels(self.labels, key)} {value}']
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, amount, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, amount)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += amount
+            entry[2] += 1
+
+    def count(self, **labels):
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self, key, entry):
+        counts, total, count = entry
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labels, key, [('le', bound)])
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labels, key)
+        lines.append(f'{self.name}_sum{labels} {total}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    for metric in _registry:
+        metric.reset()
+
+
+REQUESTS = Counter('http_requests_total', 'Requests to instrumented views.', ['view', 'method', 'status'])
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time to respond, by view.', ['view'])
+DB_SECONDS = Histogram(
+    'http_request_db_seconds', 'Time spent in database queries per request, by view.', ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request, by view.', ['view'],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+CHECKINS = Counter('checkins_total', 'Check-ins recorded.')
+CHECKIN_TOKENS = Counter('checkin_tokens_issued_total', 'Check-in codes issued.')
+CHECKIN_TOKEN_REFUSALS = Counter('checkin_token_refusals_total', 'Check-in code requests refused.', ['reason'])
+CHECKIN_VALIDATION_FAILURES = Counter(
+    'checkin_validation_failures_total', 'Check-in codes rejected at validation.', ['reason']
+)
+
+PAYSTACK_SECONDS = Histogram(
+    'paystack_request_duration_seconds', 'Paystack API call latency (each attempt).', ['call', 'outcome']
+)
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.seconds = 0.0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    """Latency, status and database time for views that set ``metrics_name``."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        timer = _QueryTimer()
+        with self._time_queries(timer):
+            response = self.get_response(request)
+        return self._record(request, response, started, timer)
+
+    async def __acall__(self, request):
+        # Connections are per thread, and a request's sync code (sync views,
+        # async ORM calls) runs on its thread-sensitive thread, so the
+        # wrappers go on that thread's connections
+        started = time.perf_counter()
+        timer = _QueryTimer()
+        stack = await sync_to_async(self._time_queries)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._record(request, response, started, timer)
+
+    def _time_queries(self, timer):
+        stack = contextlib.ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        return stack
+
+    def _record(self, request, response, started, timer):
+        view = getattr(request, 'metrics_view', None)
+        if view is not None:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, view=view)
+            REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+            DB_SECONDS.observe(timer.seconds, view=view)
+            DB_QUERIES.observe(timer.queries, view=view)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = getattr(view_class(view_func), 'metrics_name', None)
+        return None
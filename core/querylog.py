@@ -0,0 +1,204 @@
+"""
+Slow-query recorder.
+
+``SlowQueryMiddleware`` wraps database execution for each request.
+Statements slower than SLOW_QUERY_THRESHOLD_MS go into a bounded
+in-process ring buffer with the view that ran them and the innermost
+project frame on the stack (the view, serializer or helper method). Bound
+parameters are never kept, and literals written into the SQL are
+redacted. A fast statement costs two ``perf_counter()`` calls. The stack
+is only walked for slow ones.
+
+``flush()`` saves the SLOW_QUERY_PER_VIEW slowest buffered statements of
+each view as ``spaces.SlowQuery`` rows and empties the buffer. The
+middleware flushes at most every SLOW_QUERY_FLUSH_INTERVAL seconds, after
+the response is built. Opening the list in the admin also flushes that
+process's buffer.
+"""
+import collections
+import contextlib
+import datetime
+import heapq
+import os
+import re
+import sys
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+SlowStatement = collections.namedtuple(
+    'SlowStatement', 'view sql duration_ms origin database recorded_at'
+)
+
+# Quoted strings and numbers; identifiers are double-quoted and untouched
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Middleware frames sit under every query; the origin is what's inside them
+_SKIP_FILES = {os.path.join(_CORE_DIR, name) for name in ('querylog.py', 'metrics.py', 'db_routers.py')}
+
+
+def redact(sql):
+    return _LITERALS.sub('?', sql)
+
+
+def find_origin(frame):
+    """``path:line in function`` of the innermost project frame from ``frame`` out."""
+    root = os.path.join(str(settings.BASE_DIR), '')
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(root) and 'site-packages' not in filename and filename not in _SKIP_FILES:
+            return f'{os.path.relpath(filename, root)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ''
+
+
+def view_label(view_func):
+    """Dotted path of the view class (or function) behind a resolved view."""
+    lazy_path = getattr(view_func, 'lazy_view_path', None)
+    if lazy_path:
+        return lazy_path
+    target = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None) or view_func
+    return f'{target.__module__}.{target.__qualname__}'
+
+
+class SlowQueryBuffer:
+    """Most recent slow statements, oldest dropped first once full."""
+
+    def __init__(self, capacity):
+        self._lock = threading.Lock()
+        self._entries = collections.deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def drain(self):
+        with self._lock:
+            entries = list(self._entries)
+            self._entries.clear()
+        return entries
+
+
+buffer = SlowQueryBuffer(getattr(settings, 'SLOW_QUERY_BUFFER_SIZE', 500))
+
+
+class _Recorder:
+    def __init__(self, threshold):
+        self.threshold = threshold
+        # Until the URL resolves, queries belong to the middleware
+        self.view = 'middleware'
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                buffer.add(SlowStatement(
+                    view=self.view,
+                    sql=redact(sql),
+                    duration_ms=elapsed * 1000,
+                    origin=find_origin(sys._getframe(1)),
+                    database=context['connection'].alias,
+                    recorded_at=timezone.now(),
+                ))
+
+
+def flush():
+    """Save the slowest buffered statements of each view. Returns the rows saved."""
+    from spaces.models import SlowQuery
+
+    entries = buffer.drain()
+    if not entries:
+        return 0
+    by_view = collections.defaultdict(list)
+    for entry in entries:
+        by_view[entry.view].append(entry)
+    per_view = getattr(settings, 'SLOW_QUERY_PER_VIEW', 10)
+    rows = [
+        SlowQuery(**entry._asdict())
+        for view_entries in by_view.values()
+        for entry in heapq.nlargest(per_view, view_entries, key=lambda entry: entry.duration_ms)
+    ]
+    retention = datetime.timedelta(days=getattr(settings, 'SLOW_QUERY_RETENTION_DAYS', 7))
+    with transaction.atomic():
+        SlowQuery.objects.bulk_create(rows, batch_size=100)
+        SlowQuery.objects.filter(recorded_at__lt=timezone.now() - retention).delete()
+    return len(rows)
+
+
+class SlowQueryMiddleware:
+    """Record slow statements per view; set SLOW_QUERY_THRESHOLD_MS to None to turn off."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.last_flush = time.monotonic()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100)
+        if threshold_ms is None:
+            return self.get_response(request)
+
+        recorder = request.slow_query_recorder = _Recorder(threshold_ms / 1000)
+        with self._record_queries(recorder):
+            response = self.get_response(request)
+        if self._flush_due():
+            self._flush()
+        return response
+
+    async def __acall__(self, request):
+        threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100)
+        if threshold_ms is None:
+            return await self.get_response(request)
+
+        # Connections are per thread: wrap the ones on the request's
+        # thread-sensitive thread, where its sync code and ORM calls run
+        recorder = request.slow_query_recorder = _Recorder(threshold_ms / 1000)
+        stack = await sync_to_async(self._record_queries)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        if self._flush_due():
+            await sync_to_async(self._flush)()
+        return response
+
+    def _record_queries(self, recorder):
+        stack = contextlib.ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def _flush_due(self):
+        if len(buffer) and time.monotonic() - self.last_flush >= getattr(settings, 'SLOW_QUERY_FLUSH_INTERVAL', 60):
+            self.last_flush = time.monotonic()
+            return True
+        return False
+
+    def _flush(self):
+        try:
+            flush()
+        except DatabaseError:
+            # Diagnostics never fail a request; these entries are dropped
+            pass
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, 'slow_query_recorder', None)
+        if recorder is not None:
+            recorder.view = view_label(view_func)
+        return None
@@ -0,0 +1,88 @@
+"""
+Fast JSON renderer and parser for Django REST Framework.
+
+Both classes use ``orjson`` when it is installed and fall back to DRF's stock
+``JSONRenderer`` / ``JSONParser`` when it isn't, so they are always safe to
+list in ``REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']`` and
+``REST_FRAMEWORK['DEFAULT_PARSER_CLASSES']``.
+
+``datetime``, ``date``, ``time`` and ``UUID`` values are encoded natively by
+orjson (datetimes keep microseconds and use ``Z`` for UTC). ``Decimal``
+values (``price_ngn``, ``payout_per_checkin_ngn``) are encoded as floats,
+matching DRF's encoder. Anything else orjson doesn't know about goes through
+DRF's ``JSONEncoder.default``.
+"""
+import decimal
+
+from django.conf import settings
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+_drf_encoder = JSONEncoder()
+
+
+def _default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    return _drf_encoder.default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    Drop-in replacement for ``JSONRenderer`` backed by orjson.
+
+    Pretty-printed output (``?format=json; indent=4`` or the browsable API)
+    and non-compact settings are delegated to the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_default,
+                option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            # Types orjson refuses outright (e.g. int subclasses overflowing
+            # 64 bits) still render through the stock encoder.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Keep the output a strict JavaScript subset, like the stock renderer.
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    Drop-in replacement for ``JSONParser`` backed by orjson.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
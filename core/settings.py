@@ -1,9 +1,11 @@
 import os
 from pathlib import Path
-import dj_database_url
 from datetime import timedelta
 from django.core.exceptions import ImproperlyConfigured
 
+from core.cache import cache_config
+from core.database import database_config
+
 # Current file is core/settings.py, so parent.parent is root
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -27,7 +29,8 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin modules are discovered on the first /admin/ request (core/admin_urls.py)
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -47,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.querylog.SlowQueryMiddleware', # Outermost, so its flushes aren't timed as request DB work
+    'core.metrics.MetricsMiddleware', # First after the slow-query recorder, so its timings include the rest
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # Serves Django Admin CSS styles on Vercel
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -56,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_routers.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -91,14 +97,29 @@ if not DATABASE_URL:
         }
     }
 else:
+    # How connections are reused across requests and warm invocations;
+    # see core/database.py for the modes
     DATABASES = {
-        'default': dj_database_url.config(
-            default=DATABASE_URL,
-            conn_max_age=0,
-            ssl_require=False,  # sslmode=require is already in the Neon URL — don't double-set it
+        'default': database_config(
+            DATABASE_URL,
+            mode=os.environ.get('DB_CONN_MODE', 'persistent'),
+            max_age=int(os.environ.get('DB_CONN_MAX_AGE', '600')),
+            pooler_url=os.environ.get('DATABASE_POOLER_URL', '').strip() or None,
         )
     }
 
+# Optional read replica for analytics and reports (core/db_routers.py)
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL', '').strip()
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = database_config(
+        DATABASE_REPLICA_URL,
+        mode=os.environ.get('DB_CONN_MODE', 'persistent'),
+        max_age=int(os.environ.get('DB_CONN_MAX_AGE', '600')),
+    )
+    # Tests read the replica through the default test database
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     { 'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator', },
     { 'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator', },
@@ -115,8 +136,11 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# CRITICAL FIX: Downgraded to standard StaticFilesStorage to completely stop the 500 Manifest crashes on API routes
-STATICFILES_STORAGE = 'whitenoise.storage.StaticFilesStorage'
+# Hashed, pre-compressed files from collectstatic; missing entries fall back to plain names (core/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.storage.ForgivingManifestStaticFilesStorage'},
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.CustomUser'
@@ -131,6 +155,30 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON; falls back to DRF's stock renderer/parser when
+    # orjson isn't installed. Swap back to 'rest_framework.renderers.JSONRenderer'
+    # / 'rest_framework.parsers.JSONParser' to disable.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Used by core.throttling.TokenBucketThrottle. Keys are view throttle
+    # scopes; '<scope>:<USER_TYPE>' overrides the rate for one role.
+    'DEFAULT_THROTTLE_RATES': {
+        'checkin_token': '10/min',
+        'checkin_validate': '60/min',
+        'auth': '10/min',
+        'signup': '5/hour',
+    },
+    # Proxies in front of the app (Vercel's edge, Render's router). Anonymous
+    # throttles key on the address the last of them saw rather than the
+    # client-supplied X-Forwarded-For; set to 0 when serving directly.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '1')),
 }
 
 SIMPLE_JWT = {
@@ -141,6 +189,22 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# locmem:// (per process, the default), db://<table> (run createcachetable)
+# or redis://host:port/db. core/cache.py adds a short-lived in-process tier
+# in front of it for read-mostly data.
+CACHES = cache_config(
+    os.environ.get('CACHE_URL', 'locmem://'),
+    local_timeout=int(os.environ.get('CACHE_LOCAL_TIMEOUT', '5')),
+)
+
+# Views using users.authentication.ClaimsJWTAuthentication authorize from the
+# signed role claims instead of loading the user. Set to False to force the
+# regular per-request user lookup everywhere.
+JWT_TOKEN_USER_MODE = os.environ.get('JWT_TOKEN_USER_MODE', 'True') == 'True'
+# How long a user's token version may be served from cache after a role change
+# in another process.
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
 # Strict CORS filtering config to protect database tables from external browser origins
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOWED_ORIGINS = [
@@ -160,6 +224,53 @@ APPEND_SLASH = True
 # --- PAYMENT INTEGRATION ---
 PAYSTACK_SECRET_KEY = os.environ.get('PAYSTACK_SECRET_KEY')
 PAYSTACK_PUBLIC_KEY = os.environ.get('PAYSTACK_PUBLIC_KEY')
+# Point at a local stand-in (manage.py run_fake_paystack) for offline load tests
+PAYSTACK_BASE_URL = os.environ.get('PAYSTACK_BASE_URL', 'https://api.paystack.co')
+
+# spaces/paystack.py client tuning
+PAYSTACK_CONNECT_TIMEOUT = 3.05  # seconds
+PAYSTACK_READ_TIMEOUT = 10
+PAYSTACK_MAX_RETRIES = 2  # GET requests only; POSTs are never retried
+PAYSTACK_RETRY_BACKOFF = 0.25  # base for exponential backoff with full jitter
+PAYSTACK_POOL_SIZE = 10
+
+# Billing period set on activation and extended by renew_subscriptions
+SUBSCRIPTION_PERIOD_DAYS = 30
+RENEWAL_LOOKAHEAD_DAYS = 3  # charge subscriptions ending within this many days
+RENEWAL_GRACE_DAYS = 3  # keep retrying this many days past end_date
+RENEWAL_MAX_ATTEMPTS = 3  # charges per billing period before giving up
+RENEWAL_WORKERS = 8  # concurrent charges; at most PAYSTACK_POOL_SIZE are useful
+
+# --- EMAIL ---
+# Views queue mail in the users.OutboundEmail outbox; the
+# send_outbound_emails command delivers it over this backend.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Workspace Africa <noreply@workspaceafrica.com>')
+# Where partner applications are announced
+ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@workspaceafrica.com')
+# Linked from emails
+FRONTEND_URL = os.environ.get('FRONTEND_URL', 'https://workspace-nomad.vercel.app')
+OUTBOX_MAX_ATTEMPTS = 5  # sends per message before it is marked FAILED
+OUTBOX_RETRY_BACKOFF = 60  # seconds; doubles per failed send, capped at an hour
+OUTBOX_CLAIM_TIMEOUT = 300  # seconds a sender holds its batch; then unsent messages are retried
+
+# Statements slower than this are recorded per view (core/querylog.py) and
+# listed in the admin under Slow queries. Empty or 0 turns the recorder off.
+SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100') or 0) or None
+SLOW_QUERY_PER_VIEW = 10  # slowest statements kept per view and flush
+SLOW_QUERY_BUFFER_SIZE = 500
+SLOW_QUERY_FLUSH_INTERVAL = 60  # seconds
+SLOW_QUERY_RETENTION_DAYS = 7
+
+# 'asgi' serves the async payment views (spaces/async_views.py); core/asgi.py
+# and api/index.py set it when the app runs under an ASGI server.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
 
 if not PAYSTACK_SECRET_KEY and not DEBUG:
     raise ImproperlyConfigured("PAYSTACK_SECRET_KEY environment variable is required in production.")
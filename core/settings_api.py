@@ -0,0 +1,43 @@
+"""
+API-only settings profile for the serverless deployment.
+
+Everything in core/settings.py, minus what only browsers use: the admin,
+sessions, messages, static files and the browsable API. The REST API
+authenticates with JWT and DRF tokens, so it doesn't need them. Serving
+less means importing less on every cold start.
+
+Select it with ``DJANGO_SETTINGS_MODULE=core.settings_api``. Serve the
+admin from a deployment that uses core.settings.
+"""
+from .settings import *  # noqa: F401,F403
+
+BROWSER_APPS = {
+    'django.contrib.admin.apps.SimpleAdminConfig',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+}
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in BROWSER_APPS]
+
+BROWSER_MIDDLEWARE = {
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    # DRF authenticates the request itself; Django's needs sessions
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+}
+MIDDLEWARE = [m for m in MIDDLEWARE if m not in BROWSER_MIDDLEWARE]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        auth for auth in REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES']
+        if auth != 'rest_framework.authentication.SessionAuthentication'
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        renderer for renderer in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']
+        if renderer != 'rest_framework.renderers.BrowsableAPIRenderer'
+    ],
+}
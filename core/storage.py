@@ -0,0 +1,37 @@
+"""
+Static file storage.
+
+``collectstatic`` (run by build.sh) writes each file under a content-hashed
+name (``base.5af66c1b1797.css``) next to the original, with ``.gz`` and,
+when the ``brotli`` package is installed, ``.br`` variants, and records the
+mapping in ``staticfiles.json``. ``{% static %}`` then emits the hashed
+name, which can be cached forever: a changed file gets a new name.
+
+Django's manifest storage raises (a 500 on any page using ``{% static %}``)
+when the manifest or an entry in it is missing, e.g. a deploy that skipped
+``collectstatic`` or a template naming a file that was never collected.
+Here a missing entry falls back to the plain, uncached-but-working name.
+That is logged only when there is a manifest to be missing from (so not in
+development or tests, where nothing is collected), once per name.
+"""
+import logging
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+_reported = set()
+
+
+class ForgivingManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            # The file isn't in STATIC_ROOT, so there's nothing to hash
+            if self.hashed_files and name not in _reported:
+                _reported.add(name)
+                logger.warning('Static file %r is not collected; serving it unhashed', name)
+            return name
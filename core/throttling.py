@@ -0,0 +1,151 @@
+"""
+Token-bucket throttling for hot endpoints.
+
+Buckets live in the shared Django cache so limits hold across workers. If
+the cache backend is unavailable (e.g. a database cache table that hasn't
+been created, or Redis being down) each process falls back to a bounded
+in-memory store instead of failing the request.
+
+Rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` keyed by the
+view's ``throttle_scope``. A ``'<scope>:<user_type>'`` entry overrides the
+scope's rate for that role, e.g.::
+
+    'checkin_validate': '60/min',
+    'checkin_validate:PARTNER': '120/min',
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class _LocalBucketStore:
+    """Bounded per-process fallback used when the shared cache fails."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] < time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def add(self, key, value, timeout):
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (value, time.time() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return True
+
+    def incr(self, key, delta=1):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                raise ValueError(f"Key '{key}' not found")
+            self._data[key] = (entry[0] + delta, entry[1])
+            return entry[0] + delta
+
+    def decr(self, key, delta=1):
+        return self.incr(key, -delta)
+
+    def touch(self, key, timeout):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return False
+            self._data[key] = (entry[0], time.time() + timeout)
+            return True
+
+
+_local_store = _LocalBucketStore()
+
+
+def parse_rate(rate):
+    """'30/min' -> (30, 60)"""
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Allows bursts up to the configured number of requests, refilled evenly
+    over the period. Authenticated requests are keyed by user id, anonymous
+    ones by client IP.
+
+    The bucket is kept as a single integer, the time (ms) at which it would
+    be full again (GCRA). Each request atomically adds one request's worth
+    of refill time with ``incr``, so concurrent requests never spend the
+    same token; a refused request gives its share back with ``decr``. The
+    key expires when the bucket is full, so a missing key means a full
+    bucket. Atomic wherever the backend's ``incr`` is (Redis, memcached,
+    LocMemCache); Django's database cache increments with a read and write.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self, request, scope):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            role_rate = rates.get(f'{scope}:{user.user_type}')
+            if role_rate:
+                return role_rate
+        return rates.get(scope)
+
+    def get_cache_key(self, request, scope):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            ident = f'user:{user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return self.cache_format % {'scope': scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        scope = getattr(view, 'throttle_scope', None)
+        rate = self.get_rate(request, scope) if scope else None
+        if not rate:
+            return True
+
+        capacity, duration = parse_rate(rate)
+        key = self.get_cache_key(request, scope)
+        try:
+            return self._take(cache, key, capacity, duration)
+        except Exception:
+            return self._take(_local_store, key, capacity, duration)
+
+    def _take(self, store, key, capacity, duration):
+        interval = max(1, duration * 1000 // capacity)
+        burst = duration * 1000
+        now = int(time.time() * 1000)
+
+        store.add(key, now, duration)
+        try:
+            full_at = store.incr(key, interval)
+        except ValueError:
+            # Expired between add and incr
+            store.add(key, now, duration)
+            full_at = store.incr(key, interval)
+
+        if full_at - now > burst:
+            store.decr(key, interval)
+            self.wait_time = (full_at - now - burst) / 1000
+            return False
+
+        store.touch(key, math.ceil((full_at - now) / 1000))
+        return True
+
+    def wait(self):
+        return self.wait_time
@@ -1,22 +1,30 @@
-from django.contrib import admin
-from django.urls import path, include
-from rest_framework_simplejwt.views import TokenRefreshView
-from users.views import MyTokenObtainPairView
+from django.apps import apps
+from django.urls import path
+from users.views import MyTokenObtainPairView, MyTokenRefreshView
 from django.http import JsonResponse
+from .lazy import lazy_include, lazy_view
 
 
 def health_check(request):
     return JsonResponse({"status": "healthy", "message": "API is working"})
 
 
+# App URLconfs (and the views they import) load on the first request under
+# their prefix, so a cold start only pays for the part of the API it serves.
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api-auth/', include('rest_framework.urls')),
     path('api/auth/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('api/users/', include('users.urls')),
-    path('api/', include('spaces.urls')),
+    path('api/auth/token/refresh/', MyTokenRefreshView.as_view(), name='token_refresh'),
+    path('api/users/', lazy_include('users.urls')),
+    path('api/team/', lazy_include('teams.urls')),
+    path('api/', lazy_include('spaces.urls')),
     
     # Utilities
     path('health/', health_check, name='health_check'),
+    path('metrics/', lazy_view('core.views.MetricsView'), name='metrics'),
 ]
+
+# Browser-facing routes, left out of the API-only profile (core/settings_api.py)
+if apps.is_installed('django.contrib.sessions'):
+    urlpatterns.insert(0, path('api-auth/', lazy_include('rest_framework.urls', 'rest_framework')))
+if apps.is_installed('django.contrib.admin'):
+    urlpatterns.insert(0, path('admin/', lazy_include('core.admin_urls', 'admin')))
@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Plan, PartnerSpace, Subscription, CheckIn, CheckInToken
+from core import querylog
+from core.db_routers import ReplicaChangeListMixin
+from .models import (
+    Plan, PartnerSpace, Subscription, CheckIn, CheckInToken, PaystackEvent, RenewalAttempt, SlowQuery,
+)
 
 @admin.register(Plan)
 class PlanAdmin(admin.ModelAdmin):
@@ -13,13 +17,13 @@ class PartnerSpaceAdmin(admin.ModelAdmin):
     list_filter = ('access_tier',)
 
 @admin.register(Subscription)
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ('user', 'plan', 'is_active', 'start_date', 'end_date')
     search_fields = ('user__email', 'plan__name')
     list_filter = ('is_active', 'plan')
 
 @admin.register(CheckIn)
-class CheckInAdmin(admin.ModelAdmin):
+class CheckInAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ('user', 'space', 'timestamp')
     search_fields = ('user__email', 'space__name')
     list_filter = ('space',)
@@ -29,3 +33,40 @@ class CheckInAdmin(admin.ModelAdmin):
 class CheckInTokenAdmin(admin.ModelAdmin):
     list_display = ('user', 'code', 'created_at', 'expires_at')
     search_fields = ('user__email', 'code')
+
+
+@admin.register(PaystackEvent)
+class PaystackEventAdmin(admin.ModelAdmin):
+    list_display = ('event', 'status', 'attempts', 'received_at', 'processed_at')
+    list_filter = ('status', 'event')
+    readonly_fields = ('event', 'digest', 'payload', 'received_at', 'processed_at', 'last_error')
+
+
+@admin.register(RenewalAttempt)
+class RenewalAttemptAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ('reference', 'subscription', 'period_end', 'amount_kobo', 'status', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('reference', 'subscription__user__email')
+    raw_id_fields = ('subscription',)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('duration_ms', 'view', 'origin', 'statement', 'database', 'recorded_at')
+    list_filter = ('view', 'database')
+    search_fields = ('sql', 'origin')
+    ordering = ('-duration_ms',)
+    date_hierarchy = 'recorded_at'
+    readonly_fields = ('view', 'sql', 'duration_ms', 'origin', 'database', 'recorded_at')
+
+    @admin.display(description='SQL')
+    def statement(self, obj):
+        return obj.sql if len(obj.sql) <= 120 else obj.sql[:117] + '...'
+
+    def has_add_permission(self, request):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        # Include what this process has recorded since its last flush
+        querylog.flush()
+        return super().changelist_view(request, extra_context)
@@ -3,23 +3,31 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from django.db.models import Count, Q
-from .models import CheckIn, Subscription
+from .models import CheckIn
+from .subscriptions import get_active_subscription
 from users.models import CustomUser
 import datetime
 
 class UserAnalyticsView(APIView):
     permission_classes = [IsAuthenticated]
+    # Aggregates only; see core/db_routers.py
+    read_from_replica = True
+    metrics_name = 'user_analytics'  # see core/metrics.py
     
     def get(self, request):
-        user = request.user
+        return Response(self.build_analytics(request.user))
+
+    @staticmethod
+    def build_analytics(user):
+        """
+        Build the analytics payload for a member. Also used by the app
+        bootstrap endpoint so both return identical data.
+        """
         now = timezone.now()
         current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        # Get user's active subscription
-        active_subscription = Subscription.objects.filter(
-            user=user, 
-            is_active=True
-        ).first()
+        # Get user's active subscription (memoized for the request)
+        active_subscription = get_active_subscription(user)
         
         # Total check-ins (all time)
         total_checkins = CheckIn.objects.filter(user=user).count()
@@ -131,4 +139,4 @@ class UserAnalyticsView(APIView):
             'peak_hours': peak_hours
         }
         
-        return Response(analytics_data)
+        return analytics_data
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SpacesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'spaces'
+
+    def ready(self):
+        # Import signals so catalog caches are invalidated on model changes
+        import spaces.signals
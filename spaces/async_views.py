@@ -0,0 +1,126 @@
+"""
+Async payment endpoints, served in place of the DRF payment views when the
+app runs under ASGI (``SERVER_MODE=asgi``, see spaces/urls.py).
+
+The Paystack round trip is awaited on the pooled ``httpx`` client, so a
+worker keeps serving other requests while Paystack responds. Reads use
+Django's async ORM API; authentication and the subscription write, which
+need a transaction and the sync cache/ORM, run through ``sync_to_async``.
+
+Request and response bodies match ``PaymentInitializeView`` and
+``PaymentVerifyView`` in spaces/payment_views.py.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from users.authentication import ClaimsJWTAuthentication
+from .models import Plan, Subscription
+from . import paystack_async
+from .paystack import PaystackError
+from .payments import (
+    build_initialize_payload, resolve_plan, apply_payment, reusable_authorization,
+)
+
+User = get_user_model()
+
+
+@sync_to_async
+def authenticate(request, authentication_classes):
+    """Run DRF authenticators against a plain Django request; None if anonymous."""
+    for authentication_class in authentication_classes:
+        result = authentication_class().authenticate(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncPaymentInitializeView(View):
+    # Header-based schemes only: SessionAuthentication needs a DRF Request
+    authentication_classes = [ClaimsJWTAuthentication, TokenAuthentication]
+    metrics_name = 'payment_initialize'  # see core/metrics.py
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            user = await authenticate(request, self.authentication_classes)
+        except exceptions.AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=401)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        if request.content_type == 'application/json':
+            try:
+                body = json.loads(request.body or b'{}')
+            except ValueError:
+                return JsonResponse({"detail": "JSON parse error"}, status=400)
+        else:
+            body = request.POST
+        plan_id = body.get('plan_id')
+
+        if not plan_id:
+            return JsonResponse({"error": "plan_id is required"}, status=400)
+
+        try:
+            plan = await Plan.objects.filter(id=plan_id).afirst()
+        except (TypeError, ValueError):
+            plan = None
+        if plan is None:
+            return JsonResponse({"detail": "Not found."}, status=404)
+
+        data = build_initialize_payload(user, plan)
+
+        try:
+            response_data = await paystack_async.initialize_transaction(data)
+            if response_data.get('status'):
+                return JsonResponse(response_data['data'], status=200)
+            return JsonResponse({"error": response_data.get('message', 'Initialization failed')}, status=400)
+        except PaystackError as e:
+            return JsonResponse({"error": str(e)}, status=502)
+
+
+class AsyncPaymentVerifyView(View):
+    metrics_name = 'payment_verify'
+
+    async def get(self, request, *args, **kwargs):
+        reference = request.GET.get('reference')
+        if not reference:
+            return JsonResponse({"error": "No reference provided"}, status=400)
+
+        # The webhook may already have applied this payment
+        if await Subscription.objects.filter(paystack_reference=reference).aexists():
+            return JsonResponse({"status": "success", "message": "Transaction already processed"}, status=200)
+
+        try:
+            resp_json = await paystack_async.verify_transaction(reference)
+        except PaystackError as e:
+            return JsonResponse({"error": "Payment provider unavailable", "details": str(e)}, status=502)
+
+        if not resp_json.get('status') or resp_json['data']['status'] != 'success':
+            return JsonResponse({"error": "Payment verification failed"}, status=400)
+
+        data = resp_json['data']
+        plan = await sync_to_async(resolve_plan)(data)
+        if not plan:
+            return JsonResponse({"error": "Could not identify plan for this transaction. Missing DB link."}, status=400)
+
+        email = (data.get('customer') or {}).get('email')
+        user = await User.objects.filter(email=email).afirst() if email else None
+        if not user:
+            return JsonResponse({"error": "User associated with payment not found"}, status=404)
+
+        if await sync_to_async(apply_payment)(user, plan, reference, reusable_authorization(data)) is None:
+            return JsonResponse({"status": "success", "message": "Transaction already processed"}, status=200)
+
+        return JsonResponse({
+            "status": "success",
+            "message": "Subscription activated successfully",
+            "plan": plan.name
+        }, status=200)
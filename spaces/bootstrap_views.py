@@ -0,0 +1,47 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from users.serializers import UserProfileSerializerDetailed
+from .analytics_views import UserAnalyticsView
+from .catalog import compute_etag, get_plans_catalog, get_spaces_catalog
+
+
+class BootstrapView(APIView):
+    """
+    Everything the frontend needs on launch in a single round trip:
+    the profile, analytics (entitlement), plans and spaces.
+
+    Each section carries an ``etag``. A warm client passes the etags it
+    already holds as ``?<section>_etag=<value>`` and unchanged sections come
+    back as ``{"etag": ..., "not_modified": true}`` without their data.
+    Plans and spaces are served from the catalog cache; the active
+    subscription is memoized on the user so profile and analytics share it.
+    """
+    permission_classes = [IsAuthenticated]
+
+    SECTIONS = ('profile', 'analytics', 'plans', 'spaces')
+
+    def get(self, request):
+        user = request.user
+
+        sections = {
+            'profile': lambda: self._fresh(UserProfileSerializerDetailed(user).data),
+            'analytics': lambda: self._fresh(UserAnalyticsView.build_analytics(user)),
+            'plans': get_plans_catalog,
+            'spaces': get_spaces_catalog,
+        }
+
+        payload = {}
+        for name in self.SECTIONS:
+            entry = sections[name]()
+            if request.query_params.get(f'{name}_etag') == entry['etag']:
+                payload[name] = {'etag': entry['etag'], 'not_modified': True}
+            else:
+                payload[name] = entry
+
+        return Response(payload)
+
+    @staticmethod
+    def _fresh(data):
+        return {'etag': compute_etag(data), 'data': data}
@@ -0,0 +1,55 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.cache import namespace
+
+from .models import Plan, PartnerSpace
+from .serializers import PlanSerializer, PartnerSpaceSerializer
+
+PLANS_CACHE_KEY = 'catalog:plans'
+SPACES_CACHE_KEY = 'catalog:spaces'
+
+
+def compute_etag(data):
+    """Stable content hash used for per-section revalidation."""
+    raw = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _cached_section(key, build):
+    def build_entry():
+        data = build()
+        return {'etag': compute_etag(data), 'data': data}
+
+    return namespace('spaces').get_or_set(key, build_entry, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+
+
+def _build_plans():
+    plans = Plan.objects.all().order_by('price_ngn')
+    return [dict(row) for row in PlanSerializer(plans, many=True).data]
+
+
+def _build_spaces():
+    spaces = PartnerSpace.objects.all().order_by('id')
+    return [dict(row) for row in PartnerSpaceSerializer(spaces, many=True).data]
+
+
+def get_plans_catalog():
+    """Return ``{'etag', 'data'}`` for the plan list, served from cache."""
+    return _cached_section(PLANS_CACHE_KEY, _build_plans)
+
+
+def get_spaces_catalog():
+    """Return ``{'etag', 'data'}`` for the space list, served from cache."""
+    return _cached_section(SPACES_CACHE_KEY, _build_spaces)
+
+
+def invalidate_plans_catalog():
+    namespace('spaces').delete(PLANS_CACHE_KEY)
+
+
+def invalidate_spaces_catalog():
+    namespace('spaces').delete(SPACES_CACHE_KEY)
@@ -0,0 +1,331 @@
+"""
+In-process stand-in for the Paystack API, for offline load and failure-mode
+testing of the payment path.
+
+Implements the endpoints the app uses (``/transaction/initialize``,
+``/transaction/verify/<reference>``, ``/transaction/charge_authorization``,
+``/transaction``, ``/plan`` and ``/plan/<code>``) with Paystack's response envelope, and can post signed
+``charge.success`` / ``subscription.create`` webhooks back to the app.
+Latency, 5xx errors, dropped connections and declined payments are injected
+at configurable rates.
+
+Point the app at it with ``PAYSTACK_BASE_URL=http://127.0.0.1:<port>``; the
+``run_fake_paystack`` command starts one from the command line.
+"""
+import datetime
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import requests
+
+ERROR_STATUSES = (500, 502, 503)
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _isoformat(value):
+    return value.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def sign_webhook(body, secret_key):
+    """The ``x-paystack-signature`` Paystack sends with a webhook body."""
+    return hmac.new(secret_key.encode('utf-8'), body, hashlib.sha512).hexdigest()
+
+
+class FakePaystack:
+    """
+    A threaded HTTP server that behaves like Paystack.
+
+    ``latency`` (plus up to ``jitter``) seconds are added to every call.
+    ``error_rate`` of calls get a 5xx, ``drop_rate`` get the connection
+    closed without a response, and ``decline_rate`` of initialized payments
+    verify as failed. Initialized payments are otherwise treated as paid
+    straight away; with ``webhook_url`` set, their webhooks are delivered
+    ``webhook_delay`` seconds later.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, secret_key='sk_test_fake',
+                 latency=0.0, jitter=0.0, error_rate=0.0, drop_rate=0.0,
+                 decline_rate=0.0, webhook_url=None, webhook_delay=0.0,
+                 seed=None):
+        self.secret_key = secret_key
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.decline_rate = decline_rate
+        self.webhook_url = webhook_url
+        self.webhook_delay = webhook_delay
+
+        self.transactions = {}
+        self.authorizations = {}
+        self.plans = {}
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.url = f'http://{host}:{self.server.server_port}'
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # -- state -------------------------------------------------------------
+
+    def add_plan(self, name, amount, plan_code=None, interval='monthly'):
+        """Register a plan; ``amount`` is in kobo, like Paystack's."""
+        with self._lock:
+            plan_code = plan_code or f'PLN_{uuid.uuid4().hex[:15]}'
+            self.plans[plan_code] = {
+                'id': self._take_id(), 'name': name, 'plan_code': plan_code,
+                'amount': int(amount), 'interval': interval, 'currency': 'NGN',
+                'createdAt': _isoformat(_now()),
+            }
+            return self.plans[plan_code]
+
+    def _take_id(self):
+        value = self._next_id
+        self._next_id += 1
+        return value
+
+    def _roll(self, rate):
+        return rate > 0 and self._random.random() < rate
+
+    # -- endpoints ---------------------------------------------------------
+
+    def initialize(self, body):
+        if not body.get('email') or not body.get('amount'):
+            return 400, {'status': False, 'message': 'Email and amount are required'}
+        plan = self.plans.get(body.get('plan')) if body.get('plan') else None
+        if body.get('plan') and plan is None:
+            return 400, {'status': False, 'message': 'Plan not found'}
+
+        # Paystack charges the plan's amount when a plan is given
+        transaction = self._record_transaction(body, plan['amount'] if plan else int(body['amount']), plan, {
+            'authorization_code': f'AUTH_{uuid.uuid4().hex[:10]}',
+            'reusable': True, 'channel': 'card',
+        })
+        if transaction is None:
+            return 400, {'status': False, 'message': 'Duplicate Transaction Reference'}
+        reference = transaction['reference']
+
+        if self.webhook_url and transaction['status'] == 'success':
+            self._schedule_webhooks(transaction)
+
+        return 200, {'status': True, 'message': 'Authorization URL created', 'data': {
+            'authorization_url': f'{self.url}/checkout/{reference}',
+            'access_code': uuid.uuid4().hex[:15],
+            'reference': reference,
+        }}
+
+    def charge_authorization(self, body):
+        if not body.get('email') or not body.get('amount') or not body.get('authorization_code'):
+            return 400, {'status': False, 'message': 'Email, amount and authorization_code are required'}
+        authorization = self.authorizations.get(body['authorization_code'])
+        if authorization is None:
+            return 400, {'status': False, 'message': 'Invalid Authorization Code'}
+        transaction = self._record_transaction(body, int(body['amount']), None, authorization)
+        if transaction is None:
+            return 400, {'status': False, 'message': 'Duplicate Transaction Reference'}
+        return 200, {'status': True, 'message': 'Charge attempted', 'data': transaction}
+
+    def _record_transaction(self, body, amount, plan, authorization):
+        """Store a new transaction; None if its reference is already taken."""
+        with self._lock:
+            reference = body.get('reference') or uuid.uuid4().hex[:12]
+            if reference in self.transactions:
+                return None
+            declined = self._roll(self.decline_rate)
+            paid_at = _now()
+            transaction = {
+                'id': self._take_id(),
+                'status': 'failed' if declined else 'success',
+                'gateway_response': 'Declined' if declined else 'Approved',
+                'reference': reference,
+                'amount': amount,
+                'currency': 'NGN',
+                'paid_at': _isoformat(paid_at),
+                'created_at': _isoformat(paid_at),
+                'metadata': body.get('metadata') or {},
+                'customer': {'email': body['email'], 'customer_code': f"CUS_{hashlib.md5(body['email'].encode()).hexdigest()[:12]}"},
+                'plan': plan,
+                'authorization': authorization,
+            }
+            self.transactions[reference] = transaction
+            self.authorizations[authorization['authorization_code']] = authorization
+            return transaction
+
+    def verify(self, reference):
+        transaction = self.transactions.get(reference)
+        if transaction is None:
+            return 400, {'status': False, 'message': 'Transaction reference not found'}
+        return 200, {'status': True, 'message': 'Verification successful', 'data': transaction}
+
+    def list_transactions(self, query):
+        per_page = int(query.get('perPage', 50))
+        page = int(query.get('page', 1))
+        with self._lock:
+            rows = sorted(self.transactions.values(), key=lambda t: t['id'], reverse=True)
+        if query.get('status'):
+            rows = [t for t in rows if t['status'] == query['status']]
+        if query.get('from'):
+            rows = [t for t in rows if t['paid_at'] >= query['from']]
+        if query.get('to'):
+            rows = [t for t in rows if t['paid_at'] <= query['to']]
+        return 200, {'status': True, 'message': 'Transactions retrieved', **self._paginate(rows, page, per_page)}
+
+    def list_plans(self, query):
+        per_page = int(query.get('perPage', 50))
+        page = int(query.get('page', 1))
+        with self._lock:
+            rows = sorted(self.plans.values(), key=lambda p: p['id'])
+        return 200, {'status': True, 'message': 'Plans retrieved', **self._paginate(rows, page, per_page)}
+
+    def fetch_plan(self, code):
+        plan = self.plans.get(code)
+        if plan is None:
+            return 404, {'status': False, 'message': 'Plan not found'}
+        return 200, {'status': True, 'message': 'Plan retrieved', 'data': plan}
+
+    def create_plan(self, body):
+        if not body.get('name') or not body.get('amount'):
+            return 400, {'status': False, 'message': 'Name and amount are required'}
+        plan = self.add_plan(body['name'], body['amount'], interval=body.get('interval', 'monthly'))
+        return 201, {'status': True, 'message': 'Plan created', 'data': plan}
+
+    @staticmethod
+    def _paginate(rows, page, per_page):
+        start = (page - 1) * per_page
+        return {
+            'data': rows[start:start + per_page],
+            'meta': {
+                'total': len(rows), 'perPage': per_page, 'page': page,
+                'pageCount': max(1, -(-len(rows) // per_page)),
+            },
+        }
+
+    def route(self, method, path, query, body):
+        parts = [unquote(p) for p in path.strip('/').split('/')]
+        if method == 'POST' and parts == ['transaction', 'initialize']:
+            return self.initialize(body)
+        if method == 'POST' and parts == ['transaction', 'charge_authorization']:
+            return self.charge_authorization(body)
+        if method == 'GET' and parts[:2] == ['transaction', 'verify'] and len(parts) == 3:
+            return self.verify(parts[2])
+        if method == 'GET' and parts == ['transaction']:
+            return self.list_transactions(query)
+        if parts == ['plan']:
+            return self.create_plan(body) if method == 'POST' else self.list_plans(query)
+        if method == 'GET' and parts[0] == 'plan' and len(parts) == 2:
+            return self.fetch_plan(parts[1])
+        return 404, {'status': False, 'message': 'Not found'}
+
+    # -- webhooks ----------------------------------------------------------
+
+    def webhook(self, event, data):
+        """(body, signature) for a webhook, signed like Paystack signs it."""
+        body = json.dumps({'event': event, 'data': data}).encode()
+        return body, sign_webhook(body, self.secret_key)
+
+    def send_webhook(self, event, data):
+        body, signature = self.webhook(event, data)
+        try:
+            return requests.post(self.webhook_url, data=body, timeout=10, headers={
+                'Content-Type': 'application/json', 'x-paystack-signature': signature,
+            }).status_code
+        except requests.RequestException:
+            return None
+
+    def _schedule_webhooks(self, transaction):
+        def deliver():
+            if self.webhook_delay:
+                time.sleep(self.webhook_delay)
+            self.send_webhook('charge.success', transaction)
+            if transaction['plan']:
+                next_payment = _now() + datetime.timedelta(days=30)
+                self.send_webhook('subscription.create', {
+                    'subscription_code': f'SUB_{uuid.uuid4().hex[:12]}',
+                    'status': 'active',
+                    'customer': transaction['customer'],
+                    'plan': transaction['plan'],
+                    'authorization': transaction['authorization'],
+                    'next_payment_date': _isoformat(next_payment),
+                })
+        threading.Thread(target=deliver, daemon=True).start()
+
+    # -- HTTP plumbing -----------------------------------------------------
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _serve(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                with fake._lock:
+                    fake.calls += 1
+
+                delay = fake.latency + (fake._random.uniform(0, fake.jitter) if fake.jitter else 0)
+                if delay:
+                    time.sleep(delay)
+                if fake._roll(fake.drop_rate):
+                    self.close_connection = True
+                    return
+                if fake._roll(fake.error_rate):
+                    status, payload = fake._random.choice(ERROR_STATUSES), {
+                        'status': False, 'message': 'Injected server error',
+                    }
+                elif self.headers.get('Authorization') != f'Bearer {fake.secret_key}':
+                    status, payload = 401, {'status': False, 'message': 'Invalid key'}
+                else:
+                    url = urlsplit(self.path)
+                    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                    try:
+                        body = json.loads(raw) if raw else {}
+                    except ValueError:
+                        body = {}
+                    status, payload = fake.route(self.command, url.path, query, body)
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
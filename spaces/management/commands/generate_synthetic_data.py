@@ -0,0 +1,310 @@
+import contextlib
+import datetime
+import io
+import itertools
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from spaces.models import CheckIn, PartnerSpace, Plan, Subscription
+from teams.models import Invitation, Team
+from users.models import CustomUser
+
+EMAIL_DOMAIN = 'synthetic.invalid'
+SPACE_PREFIX = 'Synthetic'
+
+# (city, latitude, longitude, share of spaces and members)
+CITIES = [
+    ('Lagos', 6.5244, 3.3792, 0.34),
+    ('Ibadan', 7.3775, 3.9470, 0.18),
+    ('Abuja', 9.0765, 7.3986, 0.16),
+    ('Port Harcourt', 4.8156, 7.0498, 0.09),
+    ('Kano', 12.0022, 8.5920, 0.06),
+    ('Enugu', 6.4584, 7.5464, 0.06),
+    ('Benin City', 6.3350, 5.6037, 0.06),
+    ('Abeokuta', 7.1475, 3.3619, 0.05),
+]
+AMENITIES = ['AC', 'Kitchen', 'Meeting Rooms', 'Power Backup', 'Private Offices', 'Wi-Fi', 'Café', 'Parking']
+# Share of a day's check-ins by local (WAT, UTC+1) hour: a morning peak, a
+# smaller one after lunch, nothing overnight
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 4, 10, 14, 12, 9, 7, 8, 9, 7, 5, 4, 3, 2, 1, 1, 0, 0]
+WEEKDAY_WEIGHTS = [10, 10, 10, 10, 9, 4, 2]  # Monday first
+HOME_SPACE_SHARE = 0.7  # check-ins at a member's usual space; the rest anywhere
+
+
+@contextlib.contextmanager
+def explicit_values(*fields):
+    """Let bulk_create keep the values set on these auto_now_add fields."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def cumulative(weights):
+    return list(itertools.accumulate(weights))
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a large, deterministic synthetic dataset (spaces, members, subscriptions, teams, '
+        'invitations and time-distributed check-ins) for performance work'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spaces', type=int, default=200, help='Partner spaces, each with a partner user')
+        parser.add_argument('--members', type=int, default=20000, help='Individual subscribers')
+        parser.add_argument('--teams', type=int, default=300)
+        parser.add_argument('--team-size', type=int, default=8, help='Average members per team')
+        parser.add_argument('--check-ins', type=int, default=1000000)
+        parser.add_argument('--days', type=int, default=365, help='Check-ins are spread over this many days')
+        parser.add_argument('--end', help='Last day of data (YYYY-MM-DD, default today); pin it for repeatable runs')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Rows per insert and transaction')
+        parser.add_argument('--password', help='Password for every synthetic user (default: unusable)')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create on Postgres too')
+        parser.add_argument('--clear', action='store_true', help='Delete data from an earlier run first')
+
+    def handle(self, *args, **options):
+        end = parse_date(options['end']) if options['end'] else timezone.now().date()
+        if end is None:
+            raise CommandError('--end must be a YYYY-MM-DD date')
+        if options['spaces'] < 1:
+            raise CommandError('--spaces must be at least 1')
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.end = end
+        self.use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+
+        if options['clear']:
+            self.clear()
+        elif CustomUser.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').exists():
+            raise CommandError('Synthetic data from an earlier run exists; rerun with --clear to replace it')
+
+        self.password = make_password(options['password'])
+        self.plans = list(Plan.objects.order_by('price_ngn'))
+        if not self.plans:
+            raise CommandError('No plans to subscribe members to; run migrate first')
+
+        started = time.perf_counter()
+        spaces = self.create_spaces(options['spaces'])
+        members = self.create_members(options['members'])
+        team_members = self.create_teams(options['teams'], options['team_size'])
+        self.create_check_ins(options['check_ins'], options['days'], spaces, members + team_members)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Generated {len(spaces)} spaces, {len(members)} members, {options['teams']} teams "
+            f"({len(team_members)} team members) and {options['check_ins']:,} check-ins "
+            f"in {time.perf_counter() - started:.1f} s"
+        ))
+
+    def clear(self):
+        synthetic = {'email__endswith': f'@{EMAIL_DOMAIN}'}
+        started = time.perf_counter()
+        # Children first, each as a single DELETE rather than a cascade
+        # collected in Python
+        CheckIn.objects.filter(**{f'user__{key}': value for key, value in synthetic.items()}).delete()
+        teams = Team.objects.filter(admin__email__endswith=f'@{EMAIL_DOMAIN}')
+        Invitation.objects.filter(team__in=teams).delete()
+        Subscription.objects.filter(team__in=teams).delete()
+        teams.delete()
+        Subscription.objects.filter(**{f'user__{key}': value for key, value in synthetic.items()}).delete()
+        CustomUser.objects.filter(**synthetic).delete()
+        PartnerSpace.objects.filter(name__startswith=f'{SPACE_PREFIX} ').delete()
+        self.stdout.write(f'🧹 Cleared the previous run in {time.perf_counter() - started:.1f} s')
+
+    def city(self):
+        return self.rng.choices(CITIES, weights=[share for *_, share in CITIES])[0]
+
+    def users(self, prefix, count, **fields):
+        return [
+            CustomUser(
+                email=f'{prefix}{i}@{EMAIL_DOMAIN}', username=f'synthetic-{prefix}{i}',
+                password=self.password, **fields,
+            )
+            for i in range(count)
+        ]
+
+    def create_spaces(self, count):
+        spaces = []
+        for i in range(count):
+            city, latitude, longitude, _ = self.city()
+            spaces.append(PartnerSpace(
+                name=f'{SPACE_PREFIX} {city} Hub {i}',
+                address=f'{self.rng.randint(1, 120)} Synthetic Road, {city}',
+                amenities=', '.join(sorted(self.rng.sample(AMENITIES, self.rng.randint(3, len(AMENITIES))))),
+                # Clustered around the city centre, most within ~10 km
+                latitude=round(self.rng.gauss(latitude, 0.05), 6),
+                longitude=round(self.rng.gauss(longitude, 0.05), 6),
+                access_tier=Plan.AccessTier.PREMIUM if self.rng.random() < 0.3 else Plan.AccessTier.STANDARD,
+                payout_per_checkin_ngn=self.rng.choice([1000, 1500, 2000, 2500]),
+            ))
+        with transaction.atomic():
+            PartnerSpace.objects.bulk_create(spaces, batch_size=self.chunk_size)
+            spaces = list(PartnerSpace.objects.filter(name__startswith=f'{SPACE_PREFIX} ').order_by('id'))
+            partners = self.users('partner', len(spaces), user_type=CustomUser.UserType.PARTNER)
+            for partner, space in zip(partners, spaces):
+                partner.managed_space = space
+            CustomUser.objects.bulk_create(partners, batch_size=self.chunk_size)
+            PartnerSpace.objects.bulk_update(
+                [PartnerSpace(pk=space.pk, owner_id=owner_id) for space, owner_id in zip(spaces, self.ids('partner'))],
+                ['owner'], batch_size=self.chunk_size,
+            )
+        self.stdout.write(f'🏢 {len(spaces)} spaces and partners')
+        return spaces
+
+    def ids(self, prefix):
+        return list(
+            CustomUser.objects.filter(email__startswith=prefix, email__endswith=f'@{EMAIL_DOMAIN}')
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def subscription(self, plan, **fields):
+        """An active subscription part-way through its period, or (1 in 10) a lapsed one."""
+        start = self.end - datetime.timedelta(days=self.rng.randint(0, 29))
+        active = self.rng.random() >= 0.1
+        if not active:
+            start -= datetime.timedelta(days=self.rng.randint(30, 180))
+        return Subscription(
+            plan=plan, start_date=start, end_date=start + datetime.timedelta(days=30), is_active=active, **fields
+        )
+
+    def create_members(self, count):
+        start_date = Subscription._meta.get_field('start_date')
+        # Cheaper plans are more popular
+        weights = [1 / (rank + 1) for rank in range(len(self.plans))]
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(self.users('member', count), batch_size=self.chunk_size)
+            member_ids = self.ids('member')
+            subscriptions = [
+                self.subscription(self.rng.choices(self.plans, weights=weights)[0], user_id=member_id)
+                for member_id in member_ids if self.rng.random() < 0.85
+            ]
+            with explicit_values(start_date):
+                Subscription.objects.bulk_create(subscriptions, batch_size=self.chunk_size)
+        self.stdout.write(f'👤 {len(member_ids)} members, {len(subscriptions)} subscriptions')
+        return member_ids
+
+    def create_teams(self, count, team_size):
+        if not count:
+            return []
+        start_date = Subscription._meta.get_field('start_date')
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(
+                self.users('teamadmin', count, user_type=CustomUser.UserType.TEAM_ADMIN), batch_size=self.chunk_size
+            )
+            admin_ids = self.ids('teamadmin')
+            subscriptions = [self.subscription(self.rng.choice(self.plans[-2:])) for _ in admin_ids]
+            with explicit_values(start_date):
+                Subscription.objects.bulk_create(subscriptions, batch_size=self.chunk_size)
+            Team.objects.bulk_create([
+                Team(name=f'{SPACE_PREFIX} Company {i}', admin_id=admin_id, subscription=subscription)
+                for i, (admin_id, subscription) in enumerate(zip(admin_ids, subscriptions))
+            ], batch_size=self.chunk_size)
+            teams = list(Team.objects.filter(admin_id__in=admin_ids).order_by('id'))
+            CustomUser.objects.bulk_update(
+                [CustomUser(pk=team.admin_id, team_id=team.pk) for team in teams], ['team'], batch_size=self.chunk_size
+            )
+
+            members, invitations, n = [], [], 0
+            for team in teams:
+                size = max(1, round(self.rng.gauss(team_size, team_size / 3)))
+                for _ in range(size):
+                    email = f'teammember{n}@{EMAIL_DOMAIN}'
+                    members.append(CustomUser(
+                        email=email, username=f'synthetic-teammember{n}', password=self.password,
+                        user_type=CustomUser.UserType.TEAM_MEMBER, team_id=team.pk,
+                    ))
+                    invitations.append(Invitation(
+                        team_id=team.pk, email=email, sent_by_id=team.admin_id, status=Invitation.Status.ACCEPTED,
+                    ))
+                    n += 1
+                # Invitations not (yet) taken up
+                for i in range(self.rng.randint(0, max(1, size // 2))):
+                    invitations.append(Invitation(
+                        team_id=team.pk, email=f'invitee{team.pk}-{i}@{EMAIL_DOMAIN}', sent_by_id=team.admin_id,
+                        status=self.rng.choice([Invitation.Status.PENDING, Invitation.Status.EXPIRED]),
+                    ))
+            CustomUser.objects.bulk_create(members, batch_size=self.chunk_size)
+            Invitation.objects.bulk_create(invitations, batch_size=self.chunk_size)
+        team_member_ids = self.ids('teammember')
+        self.stdout.write(f'👥 {len(teams)} teams, {len(team_member_ids)} team members, {len(invitations)} invitations')
+        return team_member_ids
+
+    def create_check_ins(self, total, days, spaces, user_ids):
+        if not total or not user_ids:
+            return
+        rng = self.rng
+        space_ids = [space.pk for space in spaces]
+        # A few members account for most visits; a few spaces for most traffic
+        user_cum = cumulative(rng.paretovariate(1.5) for _ in user_ids)
+        space_cum = cumulative(rng.paretovariate(1.2) for _ in space_ids)
+        home = [rng.choice(space_ids) for _ in user_ids]
+
+        first_day = self.end - datetime.timedelta(days=days - 1)
+        day_cum = cumulative(WEEKDAY_WEIGHTS[(first_day + datetime.timedelta(days=d)).weekday()] for d in range(days))
+        hour_cum = cumulative(HOUR_WEIGHTS)
+        # Local midnight (WAT) of the first day, as a UTC timestamp
+        origin = datetime.datetime.combine(first_day, datetime.time(), datetime.timezone.utc).timestamp() - 3600
+        user_positions, day_positions, hour_positions = range(len(user_ids)), range(days), range(24)
+
+        written, started, last_report = 0, time.perf_counter(), time.perf_counter()
+        timestamp_field = CheckIn._meta.get_field('timestamp')
+        while written < total:
+            n = min(self.chunk_size, total - written)
+            users = rng.choices(user_positions, cum_weights=user_cum, k=n)
+            anywhere = rng.choices(space_ids, cum_weights=space_cum, k=n)
+            day_list = rng.choices(day_positions, cum_weights=day_cum, k=n)
+            hour_list = rng.choices(hour_positions, cum_weights=hour_cum, k=n)
+            rows = [
+                (
+                    user_ids[user],
+                    home[user] if rng.random() < HOME_SPACE_SHARE else space,
+                    datetime.datetime.fromtimestamp(
+                        origin + day * 86400 + hour * 3600 + rng.randrange(3600), datetime.timezone.utc
+                    ),
+                )
+                for user, space, day, hour in zip(users, anywhere, day_list, hour_list)
+            ]
+            with transaction.atomic():
+                if self.use_copy:
+                    self.copy_check_ins(rows)
+                else:
+                    with explicit_values(timestamp_field):
+                        CheckIn.objects.bulk_create(
+                            [CheckIn(user_id=u, space_id=s, timestamp=t) for u, s, t in rows],
+                            batch_size=self.chunk_size,
+                        )
+            written += n
+
+            now = time.perf_counter()
+            if now - last_report >= 5 or written == total:
+                last_report = now
+                self.stdout.write(
+                    f'📈 check-ins {written:,}/{total:,} ({written / total:.0%}), '
+                    f'{written / (now - started):,.0f} rows/s'
+                )
+
+    def copy_check_ins(self, rows):
+        """COPY a chunk into the check-in table (Postgres)."""
+        buffer = io.StringIO()
+        for user_id, space_id, timestamp in rows:
+            buffer.write(f'{user_id}\t{space_id}\t{timestamp.isoformat()}\n')
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(column) for column in ('user_id', 'space_id', 'timestamp'))
+        sql = f'COPY {quote(CheckIn._meta.db_table)} ({columns}) FROM STDIN'
+        with connection.cursor() as cursor:
+            if hasattr(cursor, 'copy_expert'):  # psycopg2
+                cursor.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from spaces.models import PaystackEvent
+from spaces.webhooks import process_pending_events
+
+class Command(BaseCommand):
+    help = 'Apply pending Paystack webhook events from the inbox in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5,
+                            help='Mark an event FAILED after this many unsuccessful runs')
+
+    def handle(self, *args, **options):
+        last_id = 0
+        batches = 0
+        # One pass over the inbox: events left pending are retried next run
+        while True:
+            last_id = process_pending_events(
+                batch_size=options['batch_size'],
+                after_id=last_id,
+                max_attempts=options['max_attempts'],
+            )
+            if last_id is None:
+                break
+            batches += 1
+
+        counts = {
+            status: PaystackEvent.objects.filter(status=status).count()
+            for status in (PaystackEvent.Status.PENDING, PaystackEvent.Status.FAILED)
+        }
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Processed {batches} batch(es). '
+            f'Pending: {counts[PaystackEvent.Status.PENDING]}, failed: {counts[PaystackEvent.Status.FAILED]}'
+        ))
@@ -0,0 +1,72 @@
+import collections
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, like a cold lambda: load the Vercel entry
+# point, then serve the given paths so lazily loaded modules are counted.
+CHILD = '''
+import io, runpy, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+app = runpy.run_path({entry!r})['app']
+booted = time.perf_counter()
+from django.conf import settings
+from wsgiref.util import setup_testing_defaults
+host = next((h for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost').lstrip('.')
+for path in {paths!r}:
+    environ = {{'PATH_INFO': path, 'REQUEST_METHOD': 'GET', 'HTTP_HOST': host, 'wsgi.input': io.BytesIO()}}
+    setup_testing_defaults(environ)
+    response = app(environ, lambda status, headers: None)
+    b''.join(response)
+    response.close()
+print(booted - started, time.perf_counter() - booted)
+'''
+
+class Command(BaseCommand):
+    help = 'Report the slowest imports of a cold start of the Vercel entry point (api/index.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=25, help='Rows per table')
+        parser.add_argument(
+            '--path', dest='paths', action='append', default=[],
+            help='Request this path after booting, counting what it imports (repeatable, default /health/)'
+        )
+
+    def handle(self, *args, **options):
+        root = str(settings.BASE_DIR)
+        child = CHILD.format(root=root, entry=os.path.join(root, 'api', 'index.py'),
+                             paths=options['paths'] or ['/health/'])
+        env = {**os.environ, 'SERVER_MODE': 'wsgi', 'PYTHONDONTWRITEBYTECODE': '1'}
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', child],
+                                env=env, cwd=root, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        imports = []  # (cumulative us, self us, module)
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            own, cumulative, name = line[len('import time:'):].split('|')
+            imports.append((int(cumulative), int(own), name.strip()))
+
+        boot, requests = (float(x) for x in result.stdout.split()[-2:])
+        by_package = collections.Counter()
+        for _, own, name in imports:
+            by_package[name.split('.')[0]] += own
+
+        limit = options['limit']
+        self.stdout.write(f"{'cumulative ms':>14}{'self ms':>10}  module")
+        for cumulative, own, name in sorted(imports, reverse=True)[:limit]:
+            self.stdout.write(f'{cumulative / 1000:>14.1f}{own / 1000:>10.1f}  {name}')
+        self.stdout.write(f"\n{'self ms':>14}  top-level package")
+        for package, own in by_package.most_common(limit):
+            self.stdout.write(f'{own / 1000:>14.1f}  {package}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n⏱️  {settings.SETTINGS_MODULE}: boot {boot * 1000:.0f} ms, first requests {requests * 1000:.0f} ms, "
+            f"{len(imports)} modules, {sum(own for _, own, _ in imports) / 1000:.0f} ms importing"
+        ))
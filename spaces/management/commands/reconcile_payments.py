@@ -0,0 +1,93 @@
+import datetime
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from spaces import paystack
+from spaces.payments import get_plan_index
+from spaces.reconcile import reconcile_transactions
+
+class Command(BaseCommand):
+    help = 'Match successful Paystack transactions in a date range to subscriptions, creating or repairing them in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', required=True, help='First day to reconcile (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', help='Last day to reconcile (YYYY-MM-DD, default today)')
+        parser.add_argument('--per-page', type=int, default=100, help='Transactions fetched and written per batch')
+        parser.add_argument(
+            '--checkpoint', default='reconcile_payments.json',
+            help='File recording progress after every page; rerunning with the same range resumes from it'
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+
+    def handle(self, *args, **options):
+        start = parse_date(options['start'])
+        end = parse_date(options['end']) if options['end'] else timezone.now().date()
+        if start is None or end is None or start > end:
+            raise CommandError('--from and --to must be YYYY-MM-DD dates with --from <= --to')
+
+        run = {'from': start.isoformat(), 'to': end.isoformat(), 'per_page': options['per_page']}
+        state = self.load_checkpoint(options['checkpoint'], run, options['restart'] or options['dry_run'])
+        if state['page'] > 1:
+            self.stdout.write(f"↩️  Resuming {run['from']}..{run['to']} at page {state['page']}")
+
+        plans = get_plan_index()
+        while True:
+            try:
+                response = paystack.list_transactions(
+                    status='success', perPage=options['per_page'], page=state['page'],
+                    **{'from': f"{run['from']}T00:00:00.000Z", 'to': state['until']},
+                )
+            except paystack.PaystackError as e:
+                raise CommandError(f'Stopped at page {state["page"]}; rerun to resume. {e}')
+            if not response.get('status'):
+                raise CommandError(f"Paystack refused the transaction list: {response.get('message')}")
+
+            counts, skipped = reconcile_transactions(response.get('data') or [], plans, dry_run=options['dry_run'])
+            for key in state['counts']:
+                state['counts'][key] += counts[key]
+            for reference, reason in skipped:
+                self.stdout.write(self.style.WARNING(f'⚠️  {reference}: {reason}'))
+
+            meta = response.get('meta') or {}
+            last_page = state['page'] >= int(meta.get('pageCount') or 1)
+            state['page'] += 1
+            if not options['dry_run']:
+                self.save_checkpoint(options['checkpoint'], {**state, 'done': last_page})
+            if last_page:
+                break
+
+        prefix = '🔎 Dry run: would have' if options['dry_run'] else '✅ Reconciled:'
+        c = state['counts']
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} created {c['created']} ({c['activated']} activated), repaired {c['repaired']}, "
+            f"matched {c['matched']}, skipped {c['skipped']}"
+        ))
+
+    def load_checkpoint(self, path, run, restart):
+        # Paystack lists newest first, so the upper bound is pinned for the
+        # whole run: payments arriving meanwhile can't shift later pages.
+        end_of_range = datetime.datetime.combine(
+            datetime.date.fromisoformat(run['to']), datetime.time.max, datetime.timezone.utc
+        )
+        until = min(timezone.now(), end_of_range)
+        fresh = {'run': run, 'page': 1, 'done': False,
+                 'until': until.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+                 'counts': dict.fromkeys(('created', 'activated', 'repaired', 'matched', 'skipped'), 0)}
+        if restart or not os.path.exists(path):
+            return fresh
+        with open(path) as f:
+            state = json.load(f)
+        if state.get('run') != run or state.get('done'):
+            return fresh
+        return state
+
+    def save_checkpoint(self, path, state):
+        # Write-then-rename so a crash never leaves a half-written checkpoint
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
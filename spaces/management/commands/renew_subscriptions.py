@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from spaces.renewals import renew_due_subscriptions
+
+class Command(BaseCommand):
+    help = 'Charge saved card authorizations for subscriptions that are about to end and extend them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.RENEWAL_LOOKAHEAD_DAYS,
+                            help='Renew subscriptions ending within this many days')
+        parser.add_argument('--grace-days', type=int, default=settings.RENEWAL_GRACE_DAYS,
+                            help='Keep retrying subscriptions that ended up to this many days ago')
+        parser.add_argument('--workers', type=int, default=settings.RENEWAL_WORKERS,
+                            help='Concurrent Paystack charges')
+        parser.add_argument('--max-attempts', type=int, default=settings.RENEWAL_MAX_ATTEMPTS,
+                            help='Charges per billing period before giving up')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the subscriptions due')
+
+    def handle(self, *args, **options):
+        counts = renew_due_subscriptions(
+            lookahead_days=options['days'],
+            grace_days=options['grace_days'],
+            workers=options['workers'],
+            max_attempts=options['max_attempts'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"🔎 {counts['due']} subscription(s) due for renewal")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Renewed {counts['renewed']}, failed {counts['failed']}, "
+            f"gave up on {counts['exhausted']} (max attempts reached)"
+        ))
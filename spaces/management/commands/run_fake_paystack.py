@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from spaces.models import Plan
+from spaces.fake_paystack import FakePaystack
+from spaces.payments import price_in_kobo
+
+class Command(BaseCommand):
+    help = 'Run a local Paystack stand-in for offline load and failure-mode testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every call')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra seconds, at random')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with a 5xx')
+        parser.add_argument('--drop-rate', type=float, default=0.0, help='Fraction of calls closed without a response')
+        parser.add_argument('--decline-rate', type=float, default=0.0, help='Fraction of payments that verify as failed')
+        parser.add_argument('--webhook-url', help='Post signed webhooks here, e.g. http://127.0.0.1:8000/api/payments/webhook/')
+        parser.add_argument('--webhook-delay', type=float, default=0.0)
+        parser.add_argument('--seed', type=int, help='Seed the error/decline dice for repeatable runs')
+        parser.add_argument(
+            '--plan', action='append', default=[], metavar='CODE=NAME:AMOUNT_NGN',
+            help='Extra plan to serve, e.g. PLN_abc=FLEX_BASIC:27000 (repeatable)'
+        )
+        parser.add_argument('--no-db-plans', action='store_true',
+                            help="Don't serve the local Plan table")
+
+    def handle(self, *args, **options):
+        fake = FakePaystack(
+            host=options['host'],
+            port=options['port'],
+            secret_key=settings.PAYSTACK_SECRET_KEY or 'sk_test_fake',
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            drop_rate=options['drop_rate'],
+            decline_rate=options['decline_rate'],
+            webhook_url=options['webhook_url'],
+            webhook_delay=options['webhook_delay'],
+            seed=options['seed'],
+        )
+
+        if not options['no_db_plans']:
+            for plan in Plan.objects.order_by('id'):
+                fake.add_plan(plan.name, price_in_kobo(plan), plan.paystack_plan_code or None)
+        for spec in options['plan']:
+            code, _, rest = spec.partition('=')
+            name, _, amount = rest.partition(':')
+            fake.add_plan(name or code, int(float(amount or 0) * 100), code)
+
+        for plan in fake.plans.values():
+            self.stdout.write(f"  {plan['plan_code']}  {plan['name']}  ({plan['amount']} kobo)")
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 Fake Paystack listening on {fake.url} '
+            f'(run the app with PAYSTACK_BASE_URL={fake.url})'
+        ))
+        try:
+            fake.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            fake.server.server_close()
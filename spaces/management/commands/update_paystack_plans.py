@@ -1,9 +1,17 @@
 from django.core.management.base import BaseCommand
 from spaces.models import Plan
+from spaces import paystack
 
 class Command(BaseCommand):
     help = 'Update plans with Paystack plan codes'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from-paystack',
+            action='store_true',
+            help='Fetch plan codes from the Paystack plan list (matched by name) instead of the built-in map'
+        )
+
     def handle(self, *args, **options):
         plans_data = [
             {
@@ -20,6 +28,13 @@ class Command(BaseCommand):
             }
         ]
 
+        if options['from_paystack']:
+            try:
+                plans_data = self.fetch_remote_plans()
+            except paystack.PaystackError as e:
+                self.stdout.write(self.style.ERROR(f'❌ Could not fetch plans from Paystack: {e}'))
+                return
+
         for plan_data in plans_data:
             try:
                 plan = Plan.objects.get(name=plan_data['name'])
@@ -36,3 +51,20 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.SUCCESS('🎉 All plans updated with Paystack codes!')
         )
+
+    def fetch_remote_plans(self):
+        """All plans on the Paystack account, paged through the pooled client."""
+        plans_data = []
+        page = 1
+        while True:
+            response = paystack.list_plans(perPage=100, page=page)
+            if not response.get('status'):
+                raise paystack.PaystackError(response.get('message', 'Plan list failed'))
+            plans_data += [
+                {'name': p['name'], 'paystack_plan_code': p['plan_code']}
+                for p in response.get('data', [])
+            ]
+            meta = response.get('meta') or {}
+            if page >= int(meta.get('pageCount') or 1):
+                return plans_data
+            page += 1
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.25 on 2026-10-19 11:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spaces', '0012_paystack_webhook_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenewalAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField()),
+                ('reference', models.CharField(max_length=100, unique=True)),
+                ('amount_kobo', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('SUCCESS', 'Success'), ('FAILED', 'Failed')], max_length=10)),
+                ('message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='subscription',
+            name='paystack_authorization_code',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['is_active', 'end_date'], name='spaces_subs_is_acti_b6f599_idx'),
+        ),
+        migrations.AddField(
+            model_name='renewalattempt',
+            name='subscription',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renewal_attempts', to='spaces.subscription'),
+        ),
+        migrations.AddIndex(
+            model_name='renewalattempt',
+            index=models.Index(fields=['subscription', 'period_end'], name='spaces_rene_subscri_e14b61_idx'),
+        ),
+    ]
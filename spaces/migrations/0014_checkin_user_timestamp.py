@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spaces', '0013_subscription_renewals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['user', 'timestamp'], name='spaces_chec_user_id_105d2f_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spaces', '0014_checkin_user_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view', models.CharField(max_length=200)),
+                ('sql', models.TextField()),
+                ('duration_ms', models.FloatField()),
+                ('origin', models.CharField(blank=True, max_length=255)),
+                ('database', models.CharField(default='default', max_length=32)),
+                ('recorded_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'slow queries',
+                'indexes': [models.Index(fields=['recorded_at'], name='spaces_slow_recorde_e90c1a_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+import datetime
 import random
 from django.utils import timezone
 
@@ -58,6 +59,28 @@ class Subscription(models.Model):
     is_active = models.BooleanField(default=True)
     
     paystack_reference = models.CharField(max_length=100, blank=True, null=True, unique=True)
+    paystack_subscription_code = models.CharField(max_length=100, blank=True, null=True, db_index=True)
+    # Reusable card authorization, charged by renew_subscriptions
+    paystack_authorization_code = models.CharField(max_length=100, blank=True, null=True)
+
+    class Meta:
+        # Renewal and expiry scans are range queries on end_date
+        indexes = [models.Index(fields=['is_active', 'end_date'])]
+
+    @property
+    def period_start(self):
+        """
+        First day of the current billing period; plan usage counts from here.
+        Without an end date (e.g. team subscriptions) periods run back to back
+        from start_date.
+        """
+        if not self.start_date:
+            return self.start_date
+        period = datetime.timedelta(days=getattr(settings, 'SUBSCRIPTION_PERIOD_DAYS', 30))
+        if self.end_date:
+            return max(self.start_date, self.end_date - period)
+        elapsed = (timezone.now().date() - self.start_date).days
+        return self.start_date + period * max(elapsed // period.days, 0)
 
     def __str__(self):
         if self.user:
@@ -73,6 +96,8 @@ class CheckIn(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        # Per-member usage within a billing period (check-in limits, team usage)
+        indexes = [models.Index(fields=['user', 'timestamp'])]
 
     def __str__(self):
         return f"{self.user.email} checked into {self.space.name} at {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
@@ -96,3 +121,76 @@ class CheckInToken(models.Model):
 
     def __str__(self):
         return f"Code {self.code} for {self.user.email}"
+
+
+class PaystackEvent(models.Model):
+    """
+    Inbox of Paystack webhook deliveries. The webhook endpoint only stores
+    events; process_paystack_events applies them in batches.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        PROCESSED = 'PROCESSED', 'Processed'
+        IGNORED = 'IGNORED', 'Ignored'
+        FAILED = 'FAILED', 'Failed'
+
+    event = models.CharField(max_length=64)
+    # SHA-256 of the raw body; Paystack redelivers identical payloads
+    digest = models.CharField(max_length=64, unique=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'])]
+
+    def __str__(self):
+        return f"{self.event} ({self.status})"
+
+
+class RenewalAttempt(models.Model):
+    """One charge of a subscription's saved authorization by renew_subscriptions."""
+    class Status(models.TextChoices):
+        SUCCESS = 'SUCCESS', 'Success'
+        FAILED = 'FAILED', 'Failed'
+
+    subscription = models.ForeignKey(Subscription, related_name='renewal_attempts', on_delete=models.CASCADE)
+    # end_date being renewed; attempts for a period are numbered from it
+    period_end = models.DateField()
+    # Deterministic, so a rerun after a crash finds the charge it already made
+    reference = models.CharField(max_length=100, unique=True)
+    amount_kobo = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=Status.choices)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['subscription', 'period_end'])]
+
+    def __str__(self):
+        return f"{self.reference} ({self.status})"
+
+
+class SlowQuery(models.Model):
+    """
+    A statement that took longer than SLOW_QUERY_THRESHOLD_MS, flushed from
+    the in-process recorder (core/querylog.py). Parameters are never stored
+    and literals in the SQL are redacted.
+    """
+    view = models.CharField(max_length=200)
+    sql = models.TextField()
+    duration_ms = models.FloatField()
+    # Innermost project frame that ran the query, e.g. "spaces/views.py:172 in get"
+    origin = models.CharField(max_length=255, blank=True)
+    database = models.CharField(max_length=32, default='default')
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'slow queries'
+        indexes = [models.Index(fields=['recorded_at'])]
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f} ms in {self.view}"
@@ -1,14 +1,21 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from .models import PartnerSpace
 from users.models import CustomUser
+from core.throttling import TokenBucketThrottle
+from users.outbox import queue_email
 import secrets
 
 class PartnerApplicationView(generics.CreateAPIView):
     permission_classes = []  # Allow unauthenticated access
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'signup'
     
+    # Both emails are queued with the account and space rows, so a failed
+    # application neither leaves partial rows nor sends mail
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         try:
             data = request.data
@@ -52,8 +59,8 @@ class PartnerApplicationView(generics.CreateAPIView):
             user.managed_space = space
             user.save()
             
-            # Send confirmation email (you can customize this)
-            send_mail(
+            # Queue confirmation email (you can customize this)
+            queue_email(
                 'Workspace Africa Partner Application Received',
                 f'''
                 Hello {data.get('fullName')},
@@ -77,13 +84,11 @@ class PartnerApplicationView(generics.CreateAPIView):
                 Best regards,
                 Workspace Africa Team
                 ''',
-                settings.DEFAULT_FROM_EMAIL,
                 [data.get('email')],
-                fail_silently=True,
             )
             
-            # Send notification to admin (optional)
-            send_mail(
+            # Queue notification to admin (optional)
+            queue_email(
                 'New Partner Application - Workspace Africa',
                 f'''
                 New partner application received:
@@ -101,9 +106,7 @@ class PartnerApplicationView(generics.CreateAPIView):
                 
                 Please review in admin panel.
                 ''',
-                settings.DEFAULT_FROM_EMAIL,
                 [settings.ADMIN_EMAIL],  # Set this in your settings
-                fail_silently=True,
             )
             
             return Response(
@@ -115,6 +118,7 @@ class PartnerApplicationView(generics.CreateAPIView):
             )
             
         except Exception as e:
+            transaction.set_rollback(True)
             return Response(
                 {"error": f"Application failed: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
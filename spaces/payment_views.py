@@ -0,0 +1,117 @@
+"""
+Payment endpoints: Paystack initialize and verify, and the webhook
+receiver. Kept apart from spaces/views.py and routed with ``lazy_view``,
+so the Paystack client and payment helpers only load in instances that
+take payments.
+"""
+import json
+import traceback
+
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+
+from .models import Plan, Subscription
+from . import paystack
+from .payments import build_initialize_payload, resolve_plan, apply_payment, reusable_authorization
+from .webhooks import is_valid_signature, store_event
+
+User = get_user_model()
+
+
+class PaymentInitializeView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    metrics_name = 'payment_initialize'  # see core/metrics.py
+    
+    def post(self, request, *args, **kwargs):
+        user = request.user
+        plan_id = request.data.get('plan_id')
+        
+        if not plan_id:
+            return Response({"error": "plan_id is required"}, status=400)
+        
+        plan = get_object_or_404(Plan, id=plan_id)
+        data = build_initialize_payload(user, plan)
+        
+        try:
+            response_data = paystack.initialize_transaction(data)
+            if response_data.get('status'):
+                return Response(response_data['data'], status=status.HTTP_200_OK)
+            return Response({"error": response_data.get('message', 'Initialization failed')}, status=400)
+        except paystack.PaystackError as e:
+            return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
+
+
+class PaymentVerifyView(generics.GenericAPIView):
+    permission_classes = [permissions.AllowAny]
+    metrics_name = 'payment_verify'
+
+    def get(self, request, *args, **kwargs):
+        reference = request.query_params.get('reference')
+        if not reference:
+            return Response({"error": "No reference provided"}, status=400)
+
+        # The webhook may already have applied this payment
+        if Subscription.objects.filter(paystack_reference=reference).exists():
+            return Response({"status": "success", "message": "Transaction already processed"}, status=200)
+
+        try:
+            resp_json = paystack.verify_transaction(reference)
+            
+            if not resp_json.get('status') or resp_json['data']['status'] != 'success':
+                return Response({"error": "Payment verification failed"}, status=400)
+
+            data = resp_json['data']
+            plan = resolve_plan(data)
+
+            if not plan:
+                return Response({"error": "Could not identify plan for this transaction. Missing DB link."}, status=400)
+
+            user_email = data['customer']['email']
+            user = User.objects.filter(email=user_email).first()
+            if not user:
+                return Response({"error": "User associated with payment not found"}, status=404)
+
+            if apply_payment(user, plan, reference, reusable_authorization(data)) is None:
+                return Response({"status": "success", "message": "Transaction already processed"}, status=200)
+            
+            return Response({
+                "status": "success", 
+                "message": "Subscription activated successfully",
+                "plan": plan.name
+            }, status=200)
+
+        except paystack.PaystackError as e:
+            return Response({"error": "Payment provider unavailable", "details": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        except Exception as e:
+            print(traceback.format_exc())
+            return Response({"error": "Internal Processing Error", "details": str(e)}, status=500)
+
+
+class PaystackWebhookView(generics.GenericAPIView):
+    """
+    Receives Paystack webhooks. Only verifies the signature and stores the
+    event; process_paystack_events applies it later, so Paystack gets its
+    200 without waiting on our database work.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    metrics_name = 'payment_webhook'
+
+    def post(self, request, *args, **kwargs):
+        body = request.body
+        if not is_valid_signature(body, request.META.get('HTTP_X_PAYSTACK_SIGNATURE')):
+            return Response({"error": "Invalid signature"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return Response({"error": "Invalid JSON"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(payload, dict):
+            return Response({"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+
+        store_event(body, payload)
+        return Response({"status": "received"}, status=status.HTTP_200_OK)
@@ -0,0 +1,159 @@
+"""
+Payment helpers shared by the verify endpoint and the webhook processor.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.cache import namespace
+
+from .models import Plan, Subscription
+
+PLAN_INDEX_CACHE_KEY = 'plan_index'
+
+
+def price_in_kobo(plan):
+    return int(plan.price_ngn * 100)
+
+
+def build_initialize_payload(user, plan):
+    """Body for Paystack's transaction/initialize call."""
+    callback_url = getattr(settings, 'PAYMENT_CALLBACK_URL', 'https://workspace-nomad.vercel.app/payment-success')
+    data = {
+        "email": user.email,
+        "amount": price_in_kobo(plan),
+        "callback_url": callback_url,
+        "metadata": {
+            "user_id": str(user.id),
+            "plan_id": str(plan.id),
+            "user_email": user.email,
+            "plan_name": plan.name
+        }
+    }
+    if plan.paystack_plan_code:
+        data["plan"] = plan.paystack_plan_code
+    return data
+
+
+class PlanIndex:
+    """
+    Plans keyed by id, Paystack plan code and price in kobo. Where keys
+    collide the lowest id wins, the same precedence as ``.first()`` on a
+    pk-ordered queryset.
+    """
+
+    def __init__(self, plans):
+        self.by_id, self.by_code, self.by_kobo = {}, {}, {}
+        for plan in sorted(plans, key=lambda p: p.id):
+            self.by_id.setdefault(str(plan.id), plan)
+            if plan.paystack_plan_code:
+                self.by_code.setdefault(plan.paystack_plan_code, plan)
+            self.by_kobo.setdefault(price_in_kobo(plan), plan)
+
+    def resolve(self, data):
+        """
+        Identify the plan paid for in a Paystack transaction ``data`` dict:
+        1. the ``plan_id`` we put in the metadata at initialization,
+        2. the Paystack plan code,
+        3. the exact amount paid matched against plan prices.
+        """
+        metadata = data.get('metadata', {})
+        plan_id = metadata.get('plan_id') if isinstance(metadata, dict) else None
+
+        # 1. Try to match via metadata
+        if plan_id and str(plan_id) in self.by_id:
+            return self.by_id[str(plan_id)]
+
+        # 2. Try to match via Paystack Plan Code
+        plan_info = data.get('plan')
+        plan_code = plan_info.get('plan_code') if isinstance(plan_info, dict) else plan_info
+        if plan_code and plan_code in self.by_code:
+            return self.by_code[plan_code]
+
+        # 3. BULLETPROOF FALLBACK: Map the exact amount paid to the plan price
+        try:
+            return self.by_kobo.get(int(data.get('amount') or 0))
+        except (TypeError, ValueError):
+            return None
+
+
+def get_plan_index(refresh=False):
+    """
+    The ``PlanIndex`` for all plans, served from cache (invalidated on Plan
+    save/delete). ``refresh`` rebuilds it from the database and re-caches it.
+    """
+    timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+    if refresh:
+        index = PlanIndex(Plan.objects.all())
+        namespace('spaces').set(PLAN_INDEX_CACHE_KEY, index, timeout)
+        return index
+    return namespace('spaces').get_or_set(PLAN_INDEX_CACHE_KEY, lambda: PlanIndex(Plan.objects.all()), timeout)
+
+
+def invalidate_plan_index():
+    namespace('spaces').delete(PLAN_INDEX_CACHE_KEY)
+
+
+def resolve_plan(data, plans=None):
+    """
+    The plan paid for in a Paystack transaction ``data`` dict, or None.
+    ``plans`` may be a ``PlanIndex`` or a list of plans; by default the
+    cached index is used, so resolving costs no queries unless it misses.
+    """
+    if plans is None:
+        plan = get_plan_index().resolve(data)
+        if plan is None:
+            # Invalidation only reaches the saving process's cache, so the
+            # plan may be newer than this copy of the index
+            plan = get_plan_index(refresh=True).resolve(data)
+        return plan
+    if not isinstance(plans, PlanIndex):
+        plans = PlanIndex(plans)
+    return plans.resolve(data)
+
+
+def reusable_authorization(data):
+    """The card authorization code in a transaction, if it can be charged again."""
+    authorization = data.get('authorization')
+    if isinstance(authorization, dict) and authorization.get('reusable'):
+        return authorization.get('authorization_code') or None
+    return None
+
+
+def activate_subscription(user, plan, reference, authorization_code=None):
+    """
+    Replace the user's active subscription with a new one for ``plan``,
+    paid up for one billing period. Callers are expected to hold a
+    transaction.
+    """
+    today = timezone.now().date()
+    # Insert first: a duplicate reference fails here, before anything changed
+    subscription = Subscription.objects.create(
+        user=user,
+        plan=plan,
+        paystack_reference=reference,
+        paystack_authorization_code=authorization_code,
+        is_active=True,
+        start_date=today,
+        end_date=today + datetime.timedelta(days=getattr(settings, 'SUBSCRIPTION_PERIOD_DAYS', 30)),
+    )
+    user.subscriptions.filter(is_active=True).exclude(pk=subscription.pk).update(is_active=False)
+    return subscription
+
+
+def apply_payment(user, plan, reference, authorization_code=None):
+    """
+    Activate ``plan`` for a verified payment unless ``reference`` was
+    already applied (by the webhook or a concurrent verify). Returns the new
+    subscription, or None if there was nothing to do.
+    """
+    try:
+        with transaction.atomic():
+            return activate_subscription(user, plan, reference, authorization_code)
+    except IntegrityError:
+        # The unique paystack_reference constraint caught a duplicate
+        if Subscription.objects.filter(paystack_reference=reference).exists():
+            return None
+        raise
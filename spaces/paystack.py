@@ -0,0 +1,166 @@
+"""
+Paystack API client.
+
+All calls share one module-level ``requests.Session`` so connections (and
+their TLS handshakes) are reused across requests handled by the same
+worker. Every call has connect/read timeouts; idempotent GETs are retried
+with exponential backoff and full jitter on network errors, 429 and 5xx.
+Non-idempotent POSTs are never retried.
+
+Functions return Paystack's decoded JSON body, including ``{"status":
+false, ...}`` error bodies, and raise ``PaystackError`` when Paystack can't
+be reached or doesn't return JSON.
+
+``requests`` is imported on first use rather than with this module, which
+the views import: most cold starts never call Paystack.
+"""
+import random
+import threading
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+
+from core import metrics
+
+DEFAULT_BASE_URL = 'https://api.paystack.co'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PaystackError(Exception):
+    """Paystack could not be reached or returned an unusable response."""
+
+
+class CallStats:
+    """
+    Per-endpoint call counts and latency, aggregated in process. Each call
+    is also observed by the ``paystack_request_duration_seconds`` metric.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, seconds, ok):
+        metrics.PAYSTACK_SECONDS.observe(seconds, call=name, outcome='ok' if ok else 'error')
+        with self._lock:
+            entry = self._stats.setdefault(
+                name, {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            )
+            ms = seconds * 1000
+            entry['calls'] += 1
+            entry['errors'] += 0 if ok else 1
+            entry['total_ms'] += ms
+            entry['max_ms'] = max(entry['max_ms'], ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {**entry, 'avg_ms': entry['total_ms'] / entry['calls']}
+                for name, entry in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+stats = CallStats()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The shared, connection-pooled session (created on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                pool_size = getattr(settings, 'PAYSTACK_POOL_SIZE', 10)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff, capped at two seconds."""
+    base = getattr(settings, 'PAYSTACK_RETRY_BACKOFF', 0.25)
+    return random.uniform(0, min(2.0, base * (2 ** attempt)))
+
+
+def request_options(method, path):
+    """URL, headers, timeouts and retry budget shared by the sync and async clients."""
+    url = getattr(settings, 'PAYSTACK_BASE_URL', DEFAULT_BASE_URL).rstrip('/') + path
+    headers = {
+        'Authorization': f'Bearer {settings.PAYSTACK_SECRET_KEY}',
+        'Content-Type': 'application/json',
+    }
+    timeout = (
+        getattr(settings, 'PAYSTACK_CONNECT_TIMEOUT', 3.05),
+        getattr(settings, 'PAYSTACK_READ_TIMEOUT', 10),
+    )
+    retries = getattr(settings, 'PAYSTACK_MAX_RETRIES', 2) if method == 'GET' else 0
+    return url, headers, timeout, retries
+
+
+def _request(method, path, name, params=None, payload=None):
+    import requests
+
+    url, headers, timeout, retries = request_options(method, path)
+
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+        started = time.perf_counter()
+        try:
+            response = get_session().request(
+                method, url, headers=headers, params=params, json=payload, timeout=timeout
+            )
+        except requests.RequestException as exc:
+            stats.record(name, time.perf_counter() - started, ok=False)
+            if last_attempt:
+                raise PaystackError(f'Paystack {name} failed: {exc}') from exc
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        stats.record(name, time.perf_counter() - started, ok=response.status_code < 500)
+        if response.status_code in RETRY_STATUSES and not last_attempt:
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        try:
+            return response.json()
+        except ValueError:
+            raise PaystackError(
+                f'Paystack {name} returned a non-JSON response (HTTP {response.status_code})'
+            )
+
+
+def initialize_transaction(payload):
+    return _request('POST', '/transaction/initialize', 'transaction.initialize', payload=payload)
+
+
+def charge_authorization(payload):
+    return _request('POST', '/transaction/charge_authorization', 'transaction.charge_authorization', payload=payload)
+
+
+def verify_transaction(reference):
+    return _request('GET', f"/transaction/verify/{quote(reference, safe='')}", 'transaction.verify')
+
+
+def list_transactions(**params):
+    return _request('GET', '/transaction', 'transaction.list', params=params)
+
+
+def list_plans(**params):
+    return _request('GET', '/plan', 'plan.list', params=params)
+
+
+def fetch_plan(code):
+    return _request('GET', f"/plan/{quote(code, safe='')}", 'plan.fetch')
@@ -0,0 +1,89 @@
+"""
+Async Paystack client for the ASGI payment views.
+
+Mirrors ``spaces.paystack`` (same settings, retry policy, ``PaystackError``
+and ``stats``) on top of ``httpx.AsyncClient``. One pooled client is kept
+per event loop: under an ASGI server that is a single client per worker,
+while ``async_to_sync`` callers (tests, WSGI) get a client bound to their
+own short-lived loop instead of one from a loop that has already closed.
+"""
+import asyncio
+import time
+import weakref
+from urllib.parse import quote
+
+import httpx
+from django.conf import settings
+
+from .paystack import (
+    PaystackError, RETRY_STATUSES, backoff_delay, request_options, stats,
+)
+
+_clients = weakref.WeakKeyDictionary()
+
+
+async def _close_at_shutdown(client):
+    # Parked at the yield until the loop's shutdown_asyncgens() (run by
+    # asyncio.run, uvicorn and async_to_sync alike) closes it
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+async def get_client():
+    """
+    The pooled client for the running event loop, created on first use and
+    closed when the loop shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is None:
+        pool_size = getattr(settings, 'PAYSTACK_POOL_SIZE', 10)
+        client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size,
+        ))
+        closer = _close_at_shutdown(client)
+        await closer.asend(None)
+        entry = _clients[loop] = (client, closer)
+    return entry[0]
+
+
+async def _request(method, path, name, params=None, payload=None):
+    url, headers, (connect, read), retries = request_options(method, path)
+    timeout = httpx.Timeout(read, connect=connect)
+
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+        started = time.perf_counter()
+        try:
+            client = await get_client()
+            response = await client.request(
+                method, url, headers=headers, params=params, json=payload, timeout=timeout
+            )
+        except httpx.HTTPError as exc:
+            stats.record(name, time.perf_counter() - started, ok=False)
+            if last_attempt:
+                raise PaystackError(f'Paystack {name} failed: {exc}') from exc
+            await asyncio.sleep(backoff_delay(attempt))
+            continue
+
+        stats.record(name, time.perf_counter() - started, ok=response.status_code < 500)
+        if response.status_code in RETRY_STATUSES and not last_attempt:
+            await asyncio.sleep(backoff_delay(attempt))
+            continue
+
+        try:
+            return response.json()
+        except ValueError:
+            raise PaystackError(
+                f'Paystack {name} returned a non-JSON response (HTTP {response.status_code})'
+            )
+
+
+async def initialize_transaction(payload):
+    return await _request('POST', '/transaction/initialize', 'transaction.initialize', payload=payload)
+
+
+async def verify_transaction(reference):
+    return await _request('GET', f"/transaction/verify/{quote(reference, safe='')}", 'transaction.verify')
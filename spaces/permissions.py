@@ -8,10 +8,11 @@ class IsPartnerUser(permissions.BasePermission):
 
     def has_permission(self, request, view):
         # Check if user is authenticated, is a PARTNER,
-        # and has a space assigned to them.
+        # and has a space assigned to them. Only the foreign key is checked,
+        # so this costs no query for model users or claim-backed token users.
         return (
             request.user and
             request.user.is_authenticated and
             request.user.user_type == 'PARTNER' and
-            request.user.managed_space is not None
+            request.user.managed_space_id is not None
         )
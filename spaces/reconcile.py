@@ -0,0 +1,136 @@
+"""
+Bulk reconciliation of Paystack transactions against local subscriptions.
+
+``reconcile_transactions`` takes one page of successful transactions from
+Paystack's transaction list and, with a fixed number of set-based queries,
+creates the subscriptions whose verify callback and webhook never arrived
+and repairs ones linked to the wrong user or plan. The
+``reconcile_payments`` command pages through a date range and checkpoints
+after every page.
+"""
+import collections
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Subscription
+from .payments import get_plan_index, resolve_plan, reusable_authorization
+from .renewals import renewal_charge_references
+
+User = get_user_model()
+
+
+def reconcile_transactions(transactions, plans=None, dry_run=False):
+    """
+    Bring subscriptions in line with a batch of Paystack transaction dicts.
+
+    - A successful transaction with no subscription gets one. The newest
+      such payment per user becomes the active subscription when it was paid
+      on or after the start of the user's current one, replacing it just as
+      PaymentVerifyView would have; older ones are recorded inactive.
+    - A subscription whose user or plan doesn't match its payment is fixed.
+    - Renewal charges count as matched; renew_subscriptions applies them.
+
+    Returns a Counter of created/activated/repaired/matched/skipped rows and
+    a list of (reference, reason) for the skipped ones. Costs a fixed number
+    of queries however large the batch.
+    """
+    counts, skipped = collections.Counter(), []
+    if plans is None:
+        plans = get_plan_index()
+
+    period = datetime.timedelta(days=getattr(settings, 'SUBSCRIPTION_PERIOD_DAYS', 30))
+
+    paid = {}
+    for data in transactions:
+        reference = data.get('reference')
+        if data.get('status') == 'success' and reference:
+            paid[reference] = data
+    # Renewal charges extend an existing subscription; they aren't missed payments
+    for reference in renewal_charge_references(paid.values()):
+        del paid[reference]
+        counts['matched'] += 1
+
+    emails = {(d.get('customer') or {}).get('email') for d in paid.values()} - {None}
+    users = {u.email: u for u in User.objects.filter(email__in=emails)}
+    existing = {
+        s.paystack_reference: s
+        for s in Subscription.objects.filter(paystack_reference__in=paid)
+    }
+    active = {
+        s.user_id: s for s in Subscription.objects.filter(
+            user__in=users.values(), is_active=True
+        ).order_by('id')
+    }
+
+    to_create, to_repair = [], []
+    newest_missing = {}  # user_id -> (paid_at, Subscription)
+    for reference, data in paid.items():
+        user = users.get((data.get('customer') or {}).get('email'))
+        if user is None:
+            skipped.append((reference, 'no user with this email'))
+            continue
+        plan = resolve_plan(data, plans)
+        if plan is None:
+            skipped.append((reference, 'could not identify plan'))
+            continue
+
+        sub = existing.get(reference)
+        if sub is not None:
+            if sub.user_id != user.id or sub.plan_id != plan.id:
+                sub.user, sub.plan = user, plan
+                to_repair.append(sub)
+            else:
+                counts['matched'] += 1
+            continue
+
+        # Paid up for one period from the payment, as activate_subscription does
+        paid_at = parse_datetime(data.get('paid_at') or data.get('created_at') or '')
+        start = paid_at.date() if paid_at else timezone.now().date()
+        sub = Subscription(
+            user=user, plan=plan, paystack_reference=reference, is_active=False,
+            start_date=start, end_date=start + period,
+            paystack_authorization_code=reusable_authorization(data),
+        )
+        to_create.append(sub)
+        current = newest_missing.get(user.id)
+        if paid_at and (current is None or paid_at > current[0]):
+            newest_missing[user.id] = (paid_at, sub)
+
+    # Activate each user's newest missed payment unless a later one is active
+    to_activate = []
+    for user_id, (paid_at, sub) in newest_missing.items():
+        current = active.get(user_id)
+        if current is None or paid_at.date() >= current.start_date:
+            sub.is_active = True
+            to_activate.append(user_id)
+
+    if not dry_run and (to_create or to_repair):
+        with transaction.atomic():
+            # A webhook or verify call may have applied some of these meanwhile
+            applied = set(
+                Subscription.objects.select_for_update()
+                .filter(paystack_reference__in=[s.paystack_reference for s in to_create])
+                .values_list('paystack_reference', flat=True)
+            )
+            to_create = [s for s in to_create if s.paystack_reference not in applied]
+            to_activate = [s.user_id for s in to_create if s.is_active]
+            if to_activate:
+                Subscription.objects.filter(user_id__in=to_activate, is_active=True).update(is_active=False)
+            # start_date is auto_now_add, so bulk_create stamps today over it
+            start_dates = [s.start_date for s in to_create]
+            Subscription.objects.bulk_create(to_create)
+            for sub, start in zip(to_create, start_dates):
+                sub.start_date = start
+            Subscription.objects.bulk_update(to_create, ['start_date'])
+            Subscription.objects.bulk_update(to_repair, ['user', 'plan'])
+
+    counts['created'] = len(to_create)
+    counts['activated'] = len(to_activate)
+    counts['repaired'] = len(to_repair)
+    counts['skipped'] = len(skipped)
+    return counts, skipped
@@ -0,0 +1,171 @@
+"""
+Renewal of subscriptions that Paystack doesn't bill itself.
+
+Subscriptions created with a Paystack plan code are renewed by Paystack
+(and extended by the subscription webhooks). The rest carry the reusable
+card authorization from their first payment, and ``renew_due_subscriptions``
+(run by the ``renew_subscriptions`` command) charges it for each one due:
+
+1. one range query on the (is_active, end_date) index finds them,
+2. one query loads this period's earlier attempts,
+3. charges run on a bounded thread pool over the pooled Paystack session,
+4. end dates are extended with one bulk_update, and every attempt is
+   recorded with one bulk_create.
+
+Charge references are derived from the subscription, the period and the
+attempt number, so a run that dies after charging is repaired by the next
+one: Paystack rejects the duplicate reference and the charge is verified
+instead of repeated.
+"""
+import collections
+import datetime
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import paystack
+from .models import Subscription, RenewalAttempt
+from .payments import price_in_kobo
+
+
+def due_subscriptions(lookahead_days=None, grace_days=None, today=None):
+    """Active, self-billed subscriptions ending within the renewal window."""
+    today = today or timezone.now().date()
+    if lookahead_days is None:
+        lookahead_days = getattr(settings, 'RENEWAL_LOOKAHEAD_DAYS', 3)
+    if grace_days is None:
+        grace_days = getattr(settings, 'RENEWAL_GRACE_DAYS', 3)
+    return (
+        Subscription.objects.filter(
+            is_active=True,
+            end_date__range=(
+                today - datetime.timedelta(days=grace_days),
+                today + datetime.timedelta(days=lookahead_days),
+            ),
+            paystack_authorization_code__isnull=False,
+            paystack_subscription_code__isnull=True,
+            user__isnull=False,
+        )
+        .exclude(paystack_authorization_code='')
+        .select_related('plan', 'user')
+        .order_by('end_date', 'id')
+    )
+
+
+RENEWAL_REFERENCE = re.compile(r'^renew-\d+-\d{8}-\d+$')
+
+
+def renewal_reference(subscription, attempt_number):
+    return f'renew-{subscription.pk}-{subscription.end_date:%Y%m%d}-{attempt_number}'
+
+
+def renewal_charge_references(transactions):
+    """
+    References of the renewal charges among Paystack transaction dicts:
+    marked ``metadata.renewal``, named like ``renewal_reference`` or
+    recorded as a RenewalAttempt. ``renew_due_subscriptions`` applies these
+    itself (a charge it didn't record is verified on its next run), so
+    they must never be activated as new payments.
+    """
+    found, others = set(), set()
+    for data in transactions:
+        reference = data.get('reference')
+        if not reference:
+            continue
+        metadata = data.get('metadata')
+        if (isinstance(metadata, dict) and metadata.get('renewal')) or RENEWAL_REFERENCE.match(reference):
+            found.add(reference)
+        else:
+            others.add(reference)
+    if others:
+        found.update(RenewalAttempt.objects.filter(reference__in=others).values_list('reference', flat=True))
+    return found
+
+
+def _charge(subscription, reference):
+    """Charge one renewal. Returns (succeeded, message); never raises."""
+    payload = {
+        'authorization_code': subscription.paystack_authorization_code,
+        'email': subscription.user.email,
+        'amount': price_in_kobo(subscription.plan),
+        'reference': reference,
+        'metadata': {
+            'user_id': str(subscription.user_id),
+            'plan_id': str(subscription.plan_id),
+            'subscription_id': str(subscription.pk),
+            'renewal': True,
+        },
+    }
+    try:
+        response = paystack.charge_authorization(payload)
+        if not response.get('status') and 'duplicate' in str(response.get('message', '')).lower():
+            # Charged by a run that died before recording it
+            response = paystack.verify_transaction(reference)
+    except paystack.PaystackError as e:
+        return False, str(e)
+
+    data = response.get('data') or {}
+    if response.get('status') and data.get('status') == 'success':
+        return True, data.get('gateway_response') or 'Approved'
+    return False, data.get('gateway_response') or response.get('message') or 'Charge failed'
+
+
+def renew_due_subscriptions(lookahead_days=None, grace_days=None, workers=None,
+                            max_attempts=None, dry_run=False):
+    """
+    Charge every due subscription once. Returns a Counter of
+    renewed/failed/exhausted subscriptions (``due`` in a dry run).
+    """
+    workers = workers or getattr(settings, 'RENEWAL_WORKERS', 8)
+    max_attempts = max_attempts or getattr(settings, 'RENEWAL_MAX_ATTEMPTS', 3)
+    counts = collections.Counter()
+
+    subscriptions = list(due_subscriptions(lookahead_days, grace_days))
+    if dry_run or not subscriptions:
+        counts['due'] = len(subscriptions)
+        return counts
+
+    prior = collections.Counter(
+        RenewalAttempt.objects.filter(
+            subscription_id__in=[s.pk for s in subscriptions],
+            period_end__in={s.end_date for s in subscriptions},
+        ).values_list('subscription_id', 'period_end')
+    )
+    jobs = []
+    for subscription in subscriptions:
+        attempts = prior[(subscription.pk, subscription.end_date)]
+        if attempts >= max_attempts:
+            counts['exhausted'] += 1
+            continue
+        jobs.append((subscription, renewal_reference(subscription, attempts + 1)))
+
+    # Charges only touch the network (user and plan are preloaded), so
+    # worker threads never open database connections of their own.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda job: _charge(*job), jobs))
+
+    period = datetime.timedelta(days=getattr(settings, 'SUBSCRIPTION_PERIOD_DAYS', 30))
+    renewed, attempts = [], []
+    for (subscription, reference), (succeeded, message) in zip(jobs, results):
+        attempts.append(RenewalAttempt(
+            subscription=subscription,
+            period_end=subscription.end_date,
+            reference=reference,
+            amount_kobo=price_in_kobo(subscription.plan),
+            status=RenewalAttempt.Status.SUCCESS if succeeded else RenewalAttempt.Status.FAILED,
+            message=message[:1000],
+        ))
+        if succeeded:
+            subscription.end_date += period
+            renewed.append(subscription)
+
+    with transaction.atomic():
+        RenewalAttempt.objects.bulk_create(attempts, batch_size=500)
+        Subscription.objects.bulk_update(renewed, ['end_date'], batch_size=500)
+
+    counts['renewed'] = len(renewed)
+    counts['failed'] = len(jobs) - len(renewed)
+    return counts
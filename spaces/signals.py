@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Plan, PartnerSpace
+from .catalog import invalidate_plans_catalog, invalidate_spaces_catalog
+
+
+@receiver([post_save, post_delete], sender=Plan)
+def plan_changed(sender, instance, **kwargs):
+    """Drop the cached plan catalog and index whenever a plan is edited or removed."""
+    # Imported here so payment code stays out of cold starts (spaces/urls.py)
+    from .payments import invalidate_plan_index
+
+    invalidate_plans_catalog()
+    invalidate_plan_index()
+
+
+@receiver([post_save, post_delete], sender=PartnerSpace)
+def space_changed(sender, instance, **kwargs):
+    """Drop the cached space catalog whenever a space is edited or removed."""
+    invalidate_spaces_catalog()
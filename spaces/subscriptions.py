@@ -0,0 +1,65 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Q, When
+from django.utils import timezone
+
+from .models import Subscription
+
+# Attribute used to memoize the active subscription on a user instance.
+# DRF hands the same user object to the view, the permissions and every
+# serializer in a request, so caching on the instance is request-scoped.
+_ACTIVE_SUB_ATTR = '_active_subscription_cache'
+
+
+def get_active_subscription(user):
+    """
+    Return the user's effective subscription (with its plan) or None: their
+    own active subscription if they have one, otherwise their team's.
+
+    Both are looked up in one query, ordered personal first, and the lookup
+    runs at most once per user instance, so views and serializers that each
+    need the subscription share it.
+    """
+    if not user or not getattr(user, 'is_authenticated', False):
+        return None
+
+    if not hasattr(user, _ACTIVE_SUB_ATTR):
+        owner = Q(user_id=user.pk)
+        team_id = getattr(user, 'team_id', None)
+        if team_id is not None:
+            owner |= Q(team__pk=team_id)
+        sub = (
+            Subscription.objects.filter(owner, is_active=True)
+            .annotate(is_personal=Case(
+                When(user_id=user.pk, then=1), default=0, output_field=IntegerField()
+            ))
+            .select_related('plan')
+            .order_by('-is_personal', 'id')
+            .first()
+        )
+        setattr(user, _ACTIVE_SUB_ATTR, sub)
+
+    return getattr(user, _ACTIVE_SUB_ATTR)
+
+
+def clear_active_subscription(user):
+    """Drop the memoized subscription after it has been changed."""
+    if hasattr(user, _ACTIVE_SUB_ATTR):
+        delattr(user, _ACTIVE_SUB_ATTR)
+
+
+def in_renewal_grace(subscription, today=None):
+    """
+    Whether an expired subscription may still be renewed: it is self-billed
+    and ended within RENEWAL_GRACE_DAYS. It must stay active until then, as
+    ``due_subscriptions`` only looks at active ones.
+    """
+    today = today or timezone.now().date()
+    grace = datetime.timedelta(days=getattr(settings, 'RENEWAL_GRACE_DAYS', 3))
+    return bool(
+        subscription.paystack_authorization_code
+        and not subscription.paystack_subscription_code
+        and subscription.end_date
+        and subscription.end_date >= today - grace
+    )
@@ -1,3 +1,865 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from django.test import AsyncClient, AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core import metrics
+from core import querylog
+from core.cache import clear_caches
+from core.throttling import TokenBucketThrottle
+from teams.models import Team
+from users.models import CustomUser
+from users.serializers import MyTokenObtainPairSerializer
+from . import paystack, paystack_async
+from .fake_paystack import FakePaystack
+from .payments import get_plan_index, resolve_plan
+from .async_views import AsyncPaymentInitializeView, AsyncPaymentVerifyView
+from .models import Plan, PartnerSpace, Subscription, CheckIn, PaystackEvent, RenewalAttempt, SlowQuery
+from .renewals import renew_due_subscriptions, renewal_reference
+from .subscriptions import get_active_subscription
+from .reconcile import reconcile_transactions
+from .webhooks import process_pending_events, store_event
+
+
+class BootstrapViewTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.plan = Plan.objects.create(name='Test Plan', price_ngn=10000, included_days=8)
+        self.user = CustomUser.objects.create_user(
+            email='member@example.com', username='member', password='pass12345'
+        )
+        Subscription.objects.create(user=self.user, plan=self.plan, is_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_returns_all_sections(self):
+        response = self.client.get('/api/bootstrap/')
+        self.assertEqual(response.status_code, 200)
+        for name in ('profile', 'analytics', 'plans', 'spaces'):
+            self.assertIn('etag', response.data[name])
+            self.assertIn('data', response.data[name])
+        self.assertEqual(response.data['profile']['data']['plan_name'], 'Test Plan')
+        self.assertEqual(response.data['analytics']['data']['subscription']['plan_name'], 'Test Plan')
+
+    def test_unchanged_sections_are_not_resent(self):
+        first = self.client.get('/api/bootstrap/').data
+        second = self.client.get('/api/bootstrap/', {
+            'plans_etag': first['plans']['etag'],
+            'profile_etag': first['profile']['etag'],
+        }).data
+        self.assertTrue(second['plans']['not_modified'])
+        self.assertNotIn('data', second['plans'])
+        self.assertTrue(second['profile']['not_modified'])
+        self.assertIn('data', second['spaces'])
+
+    def test_catalog_invalidated_on_change(self):
+        etag = self.client.get('/api/bootstrap/').data['spaces']['etag']
+        PartnerSpace.objects.create(name='New Hub', address='Ibadan')
+        response = self.client.get('/api/bootstrap/', {'spaces_etag': etag})
+        self.assertNotIn('not_modified', response.data['spaces'])
+        self.assertEqual(response.data['spaces']['data'][-1]['name'], 'New Hub')
+
+
+class TeamCheckInTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.team_plan = Plan.objects.create(name='Team Check-in Plan', price_ngn=45000, included_days=2)
+        self.team = Team.objects.create(
+            name='Acme', subscription=Subscription.objects.create(plan=self.team_plan, is_active=True),
+        )
+        self.space = PartnerSpace.objects.create(name='Hub', address='Lagos')
+        self.alice = CustomUser.objects.create_user(
+            email='alice@example.com', username='alice', password='pass12345',
+            user_type=CustomUser.UserType.TEAM_MEMBER, team=self.team,
+        )
+        self.bob = CustomUser.objects.create_user(
+            email='bob@example.com', username='bob', password='pass12345',
+            user_type=CustomUser.UserType.TEAM_MEMBER, team=self.team,
+        )
+        self.client = APIClient()
+
+    def generate(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/spaces/generate-token/')
+
+    def test_member_checks_in_on_team_plan(self):
+        response = self.generate(self.alice)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['meta'], {'plan': 'Team Check-in Plan', 'days_used': 1, 'days_total': 2})
+
+    def test_personal_subscription_takes_precedence(self):
+        personal = Plan.objects.create(name='Personal Plan', price_ngn=10000, included_days=8)
+        Subscription.objects.create(user=self.alice, plan=personal, is_active=True)
+        self.assertEqual(get_active_subscription(self.alice).plan, personal)
+        self.assertEqual(get_active_subscription(self.bob).plan, self.team_plan)
+
+    def test_usage_is_counted_per_member(self):
+        now = timezone.now()
+        Subscription.objects.filter(pk=self.team.subscription_id).update(
+            start_date=now.date() - datetime.timedelta(days=5)
+        )
+        for days_ago in (1, 2):
+            check_in = CheckIn.objects.create(user=self.alice, space=self.space)
+            CheckIn.objects.filter(pk=check_in.pk).update(timestamp=now - datetime.timedelta(days=days_ago))
+
+        response = self.generate(self.alice)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['error'], 'Monthly plan limit reached.')
+        self.assertEqual(self.generate(self.bob).data['meta']['days_used'], 1)
+
+    def test_team_case_costs_no_extra_queries(self):
+        personal = CustomUser.objects.create_user(email='solo@example.com', username='solo', password='pass12345')
+        Subscription.objects.create(user=personal, plan=self.team_plan, is_active=True)
+        self.generate(personal)  # warm the throttle bucket
+        self.generate(self.alice)
+        with CaptureQueriesContext(connection) as personal_queries:
+            self.assertEqual(self.generate(personal).status_code, 201)
+        with CaptureQueriesContext(connection) as team_queries:
+            self.assertEqual(self.generate(self.alice).status_code, 201)
+        self.assertEqual(len(team_queries), len(personal_queries))
+
+
+class CheckInMetricsTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        metrics.reset()
+        plan = Plan.objects.create(name='Metrics Plan', price_ngn=20000, included_days=5)
+        self.member = CustomUser.objects.create_user(
+            email='member@example.com', username='member', password='pass12345',
+        )
+        Subscription.objects.create(user=self.member, plan=plan, is_active=True)
+        self.partner = CustomUser.objects.create_user(
+            email='partner@example.com', username='partner', password='pass12345',
+            user_type=CustomUser.UserType.PARTNER,
+        )
+        self.partner.refresh_from_db()  # picks up the auto-created managed_space
+        self.client = APIClient()
+
+    def test_check_ins_and_failures_are_counted(self):
+        self.client.force_authenticate(self.member)
+        code = self.client.post('/api/spaces/generate-token/').data['code']
+        self.client.force_authenticate(self.partner)
+        self.assertEqual(self.client.post('/api/check-in/validate/', {'code': code}).status_code, 200)
+        self.assertEqual(self.client.post('/api/check-in/validate/', {'code': code}).status_code, 404)
+
+        self.assertEqual(metrics.CHECKIN_TOKENS.value(), 1)
+        self.assertEqual(metrics.CHECKINS.value(), 1)
+        self.assertEqual(metrics.CHECKIN_VALIDATION_FAILURES.value(reason='not_found'), 1)
+        self.assertEqual(metrics.REQUESTS.value(view='checkin_validate', method='POST', status=404), 1)
+        self.assertEqual(metrics.REQUEST_SECONDS.count(view='checkin_token'), 1)
+        self.assertEqual(metrics.DB_QUERIES.count(view='checkin_validate'), 2)
+
+    def test_database_time_is_recorded_under_asgi(self):
+        token = MyTokenObtainPairSerializer.get_token(self.member).access_token
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(AsyncClient().post)(
+                '/api/spaces/generate-token/', headers={'Authorization': f'Bearer {token}'},
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(metrics.REQUESTS.value(view='checkin_token', method='POST', status=201), 1)
+        self.assertIn(f'http_request_db_queries_sum{{view="checkin_token"}} {len(queries)}', metrics.render())
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.client.force_authenticate(self.member)
+        self.client.post('/api/spaces/generate-token/')
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+
+        self.client.force_authenticate(CustomUser.objects.create_user(
+            email='ops@example.com', username='ops', password='pass12345', is_staff=True,
+        ))
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('checkin_tokens_issued_total 1', body)
+        self.assertIn('http_request_duration_seconds_count{view="checkin_token"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="checkin_token",le="+Inf"} 1', body)
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_PER_VIEW=2, SLOW_QUERY_FLUSH_INTERVAL=0)
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        querylog.buffer.drain()
+        self.partner = CustomUser.objects.create_user(
+            email='partner@example.com', username='partner', password='pass12345',
+            user_type=CustomUser.UserType.PARTNER,
+        )
+        self.partner.refresh_from_db()  # picks up the auto-created managed_space
+        self.client = APIClient()
+        self.client.force_authenticate(self.partner)
+
+    def test_slowest_statements_are_flushed_per_view(self):
+        self.assertEqual(self.client.get('/api/partner/dashboard/').status_code, 200)
+
+        rows = SlowQuery.objects.filter(view='spaces.views.PartnerDashboardView')
+        self.assertEqual(len(rows), 2)
+        for row in rows:
+            self.assertTrue(row.origin.startswith('spaces/'), row.origin)
+            self.assertNotIn(str(self.partner.managed_space_id), row.sql.replace('"', ' ').split())
+
+    def test_async_requests_are_recorded_and_flushed(self):
+        view_func = resolve('/api/partner/dashboard/').func
+
+        def query():
+            return Plan.objects.count()
+
+        async def get_response(request):
+            # Django's async handler runs sync process_view hooks in a thread
+            await sync_to_async(middleware.process_view)(request, view_func, (), {})
+            await sync_to_async(query)()
+            return HttpResponse()
+
+        middleware = querylog.SlowQueryMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().get('/api/partner/dashboard/'))
+
+        row = SlowQuery.objects.get(view='spaces.views.PartnerDashboardView')
+        self.assertIn('spaces_plan', row.sql)
+        self.assertTrue(row.origin.startswith('spaces/tests.py:'), row.origin)
+
+    @skipUnless(apps.is_installed('django.contrib.admin'), 'no admin in the API-only profile')
+    def test_admin_lists_slow_queries(self):
+        admin_user = CustomUser.objects.create_superuser(
+            email='admin@example.com', username='admin', password='pass12345',
+        )
+        self.client.force_login(admin_user)
+        self.client.get('/api/partner/dashboard/')
+        querylog.buffer.add(querylog.SlowStatement(
+            'spaces.views.PartnerReportView', 'SELECT ?', 250.0, 'spaces/views.py:1 in get', 'default',
+            timezone.now(),
+        ))
+
+        response = self.client.get('/admin/spaces/slowquery/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'spaces.views.PartnerReportView')
+
+
+class SyntheticDataTests(TestCase):
+    def generate(self, *args):
+        call_command(
+            'generate_synthetic_data', '--spaces', '4', '--members', '30', '--teams', '2', '--team-size', '3',
+            '--check-ins', '500', '--days', '14', '--end', '2026-03-31', '--chunk-size', '200', *args,
+            stdout=io.StringIO(),
+        )
+        return list(CheckIn.objects.order_by('id').values_list('user__email', 'space__name', 'timestamp'))
+
+    def test_generates_a_repeatable_dataset(self):
+        first = self.generate()
+        self.assertEqual(len(first), 500)
+        self.assertEqual(PartnerSpace.objects.filter(name__startswith='Synthetic ', managers__isnull=False).count(), 4)
+        self.assertEqual(Team.objects.filter(name__startswith='Synthetic ', subscription__isnull=False).count(), 2)
+        self.assertTrue(all(
+            datetime.date(2026, 3, 18) <= timestamp.date() <= datetime.date(2026, 3, 31) for _, _, timestamp in first
+        ))
+
+        self.assertEqual(self.generate('--clear'), first)
+
+    def test_refuses_to_add_to_an_earlier_run(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+
+THROTTLE_SETTINGS = {
+    'DEFAULT_THROTTLE_RATES': {
+        'checkin_validate': '2/min',
+        'checkin_token': '2/min',
+        'checkin_token:TEAM_MEMBER': '3/min',
+    },
+}
+
+
+@override_settings(REST_FRAMEWORK=THROTTLE_SETTINGS)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.partner = CustomUser.objects.create_user(
+            email='partner@example.com', username='partner', password='pass12345',
+            user_type=CustomUser.UserType.PARTNER,
+        )
+        self.partner.refresh_from_db()  # picks up the auto-created managed_space
+        self.client = APIClient()
+        self.client.force_authenticate(self.partner)
+
+    def test_validation_is_throttled_per_partner(self):
+        for _ in range(2):
+            self.assertEqual(self.client.post('/api/check-in/validate/', {'code': '000000'}).status_code, 404)
+        response = self.client.post('/api/check-in/validate/', {'code': '000000'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_role_specific_rate(self):
+        member = CustomUser.objects.create_user(
+            email='member@example.com', username='member', password='pass12345',
+            user_type=CustomUser.UserType.TEAM_MEMBER,
+        )
+        self.client.force_authenticate(member)
+        codes = [self.client.post('/api/spaces/generate-token/').status_code for _ in range(4)]
+        self.assertEqual(codes, [403, 403, 403, 429])
+
+    def test_falls_back_to_local_store_when_cache_fails(self):
+        with mock.patch('core.throttling.cache.add', side_effect=ConnectionError), \
+                mock.patch('core.throttling.cache.incr', side_effect=ConnectionError):
+            codes = [self.client.post('/api/check-in/validate/', {'code': '000000'}).status_code for _ in range(3)]
+        self.assertEqual(codes, [404, 404, 429])
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'auth': '2/min'}})
+    def test_forwarded_for_cannot_be_rotated_for_fresh_buckets(self):
+        view = SimpleNamespace(throttle_scope='auth')
+        factory = RequestFactory()
+        allowed = []
+        for n in range(3):
+            # The client's own entry comes first; the proxy appends the address it saw
+            request = factory.post('/api/auth/token/', HTTP_X_FORWARDED_FOR=f'10.0.0.{n}, 203.0.113.7')
+            request.user = AnonymousUser()
+            allowed.append(TokenBucketThrottle().allow_request(request, view))
+        self.assertEqual(allowed, [True, True, False])
+
+    def test_concurrent_requests_cannot_share_a_token(self):
+        request = SimpleNamespace(user=self.partner)
+        view = SimpleNamespace(throttle_scope='checkin_validate')
+        barrier = threading.Barrier(8)
+
+        def attempt(_):
+            barrier.wait()
+            return TokenBucketThrottle().allow_request(request, view)
+
+        with ThreadPoolExecutor(8) as pool:
+            allowed = list(pool.map(attempt, range(8)))
+        self.assertEqual(allowed.count(True), 2)
+
+
+class PaystackStub:
+    """
+    Local HTTP server standing in for Paystack. ``responses`` maps a path to
+    a list of (status, body) pairs served in order; the last one repeats.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                path = self.path.split('?')[0]
+                stub.requests.append((self.command, path, body, self.headers.get('Authorization')))
+                queue = stub.responses.get(path, [(404, {'status': False, 'message': 'Not found'})])
+                status, payload = queue.pop(0) if len(queue) > 1 else queue[0]
+                raw = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PaystackClientTests(TestCase):
+    def setUp(self):
+        self.stub = PaystackStub()
+        self.addCleanup(self.stub.close)
+        overrides = override_settings(
+            PAYSTACK_BASE_URL=self.stub.url, PAYSTACK_SECRET_KEY='sk_test_stub',
+            PAYSTACK_RETRY_BACKOFF=0, PAYSTACK_READ_TIMEOUT=0.5,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        paystack.stats.reset()
+
+    def test_get_is_retried_on_server_errors(self):
+        self.stub.responses['/transaction/verify/ref-1'] = [
+            (502, b'bad gateway'), (200, {'status': True, 'data': {'status': 'success'}}),
+        ]
+        self.assertTrue(paystack.verify_transaction('ref-1')['status'])
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertEqual(self.stub.requests[0][3], 'Bearer sk_test_stub')
+        self.assertEqual(paystack.stats.snapshot()['transaction.verify']['calls'], 2)
+
+    def test_post_is_not_retried(self):
+        self.stub.responses['/transaction/initialize'] = [(500, {'status': False, 'message': 'boom'})]
+        self.assertEqual(paystack.initialize_transaction({'email': 'a@b.c'})['message'], 'boom')
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_unreachable_paystack_raises(self):
+        self.stub.close()
+        with self.assertRaises(paystack.PaystackError):
+            paystack.verify_transaction('ref-1')
+        self.assertEqual(paystack.stats.snapshot()['transaction.verify']['errors'], 3)
+
+    def test_session_is_shared(self):
+        self.assertIs(paystack.get_session(), paystack.get_session())
+
+    def test_initialize_view_uses_client(self):
+        plan = Plan.objects.create(name='Stub Plan', price_ngn=55000, included_days=16)
+        user = CustomUser.objects.create_user(email='m@example.com', username='m', password='pass12345')
+        self.stub.responses['/transaction/initialize'] = [
+            (200, {'status': True, 'data': {'authorization_url': 'https://pay', 'reference': 'r1'}}),
+        ]
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post('/api/payments/initialize/', {'plan_id': plan.id}, format='json')
+        self.assertEqual(response.data['reference'], 'r1')
+        self.assertEqual(self.stub.requests[0][2]['amount'], 5500000)
+
+
+class AsyncPaymentViewTests(TestCase):
+    def setUp(self):
+        self.stub = PaystackStub()
+        self.addCleanup(self.stub.close)
+        overrides = override_settings(
+            PAYSTACK_BASE_URL=self.stub.url, PAYSTACK_SECRET_KEY='sk_test_stub',
+            PAYSTACK_RETRY_BACKOFF=0, PAYSTACK_READ_TIMEOUT=0.5,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.plan = Plan.objects.create(name='Async Plan', price_ngn=4321, included_days=8)
+        self.user = CustomUser.objects.create_user(email='a@example.com', username='a', password='pass12345')
+        token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.factory = AsyncRequestFactory()
+
+    async def test_initialize(self):
+        self.stub.responses['/transaction/initialize'] = [
+            (200, {'status': True, 'data': {'authorization_url': 'https://pay', 'reference': 'r1'}}),
+        ]
+        request = self.factory.post(
+            '/api/payments/initialize/', {'plan_id': self.plan.id},
+            content_type='application/json', headers=self.headers,
+        )
+        response = await AsyncPaymentInitializeView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['reference'], 'r1')
+        self.assertEqual(self.stub.requests[0][2]['amount'], 432100)
+        self.assertEqual(self.stub.requests[0][2]['email'], 'a@example.com')
+
+    async def test_initialize_requires_authentication(self):
+        request = self.factory.post(
+            '/api/payments/initialize/', {'plan_id': self.plan.id}, content_type='application/json',
+        )
+        response = await AsyncPaymentInitializeView.as_view()(request)
+        self.assertEqual(response.status_code, 401)
+
+    async def test_verify_activates_once(self):
+        self.stub.responses['/transaction/verify/ref-9'] = [(200, {'status': True, 'data': {
+            'status': 'success', 'reference': 'ref-9', 'amount': 432100,
+            'customer': {'email': 'a@example.com'}, 'metadata': {'plan_id': str(self.plan.id)},
+        }})]
+        view = AsyncPaymentVerifyView.as_view()
+        first = await view(self.factory.get('/api/payments/verify/', {'reference': 'ref-9'}))
+        second = await view(self.factory.get('/api/payments/verify/', {'reference': 'ref-9'}))
+        self.assertEqual(json.loads(first.content)['plan'], 'Async Plan')
+        self.assertEqual(json.loads(second.content)['message'], 'Transaction already processed')
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertEqual(await Subscription.objects.filter(user=self.user, is_active=True).acount(), 1)
+
+    async def test_verify_without_customer_is_not_found(self):
+        self.stub.responses['/transaction/verify/ref-10'] = [(200, {'status': True, 'data': {
+            'status': 'success', 'reference': 'ref-10', 'amount': 432100,
+            'metadata': {'plan_id': str(self.plan.id)},
+        }})]
+        response = await AsyncPaymentVerifyView.as_view()(
+            self.factory.get('/api/payments/verify/', {'reference': 'ref-10'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_client_is_closed_with_its_loop(self):
+        async def client():
+            return await paystack_async.get_client()
+
+        pooled = async_to_sync(client)()
+        self.assertTrue(pooled.is_closed)
+
+    async def test_unreachable_paystack_returns_502(self):
+        self.stub.close()
+        response = await AsyncPaymentVerifyView.as_view()(
+            self.factory.get('/api/payments/verify/', {'reference': 'ref-9'})
+        )
+        self.assertEqual(response.status_code, 502)
+
+
+@override_settings(PAYSTACK_SECRET_KEY='sk_test_webhook')
+class PaystackWebhookTests(TestCase):
+    def setUp(self):
+        self.plan = Plan.objects.create(name='Webhook Plan', price_ngn=12345, included_days=8)
+        self.user = CustomUser.objects.create_user(
+            email='payer@example.com', username='payer', password='pass12345'
+        )
+        self.client = APIClient()
+
+    def deliver(self, event, data, signature=None):
+        body = json.dumps({'event': event, 'data': data}).encode()
+        if signature is None:
+            signature = hmac.new(b'sk_test_webhook', body, hashlib.sha512).hexdigest()
+        return self.client.generic(
+            'POST', '/api/payments/webhook/', body,
+            content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature,
+        )
+
+    def charge(self, reference='ref-100'):
+        return {
+            'reference': reference, 'amount': 1234500, 'status': 'success',
+            'customer': {'email': 'payer@example.com'}, 'metadata': {},
+        }
+
+    def test_rejects_bad_signature(self):
+        self.assertEqual(self.deliver('charge.success', self.charge(), signature='nope').status_code, 401)
+        self.assertFalse(PaystackEvent.objects.exists())
+
+    def test_rejects_signed_bodies_that_are_not_objects(self):
+        body = b'["charge.success"]'
+        signature = hmac.new(b'sk_test_webhook', body, hashlib.sha512).hexdigest()
+        response = self.client.generic(
+            'POST', '/api/payments/webhook/', body,
+            content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaystackEvent.objects.exists())
+
+    def test_stores_without_processing_and_dedupes(self):
+        self.assertEqual(self.deliver('charge.success', self.charge()).status_code, 200)
+        self.assertEqual(self.deliver('charge.success', self.charge()).status_code, 200)
+        self.assertEqual(PaystackEvent.objects.count(), 1)
+        self.assertFalse(Subscription.objects.filter(user=self.user).exists())
+
+    def test_processor_applies_subscription_lifecycle(self):
+        self.deliver('charge.success', self.charge())
+        self.deliver('subscription.create', {
+            'subscription_code': 'SUB_1', 'customer': {'email': 'payer@example.com'},
+            'next_payment_date': '2020-01-01T00:00:00.000Z',
+        })
+        self.deliver('subscription.disable', {'subscription_code': 'SUB_1'})
+        self.deliver('transfer.success', {})
+
+        self.assertIsNotNone(process_pending_events())
+        sub = Subscription.objects.get(paystack_reference='ref-100')
+        self.assertEqual(sub.plan, self.plan)
+        self.assertEqual(sub.paystack_subscription_code, 'SUB_1')
+        self.assertFalse(sub.is_active)  # paid period already over
+        self.assertEqual(
+            set(PaystackEvent.objects.values_list('status', flat=True)),
+            {PaystackEvent.Status.PROCESSED, PaystackEvent.Status.IGNORED},
+        )
+
+    def test_unmatched_event_stays_pending_until_max_attempts(self):
+        self.deliver('subscription.create', {
+            'subscription_code': 'SUB_2', 'customer': {'email': 'payer@example.com'},
+        })
+        process_pending_events(max_attempts=2)
+        event = PaystackEvent.objects.get()
+        self.assertEqual(event.status, PaystackEvent.Status.PENDING)
+        process_pending_events(max_attempts=2)
+        event.refresh_from_db()
+        self.assertEqual(event.status, PaystackEvent.Status.FAILED)
+        self.assertIn('No active subscription', event.last_error)
+
+
+class FakePaystackTests(TestCase):
+    def setUp(self):
+        self.fake = FakePaystack(secret_key='sk_test_fake', seed=1).start()
+        self.addCleanup(self.fake.stop)
+        overrides = override_settings(
+            PAYSTACK_BASE_URL=self.fake.url, PAYSTACK_SECRET_KEY='sk_test_fake',
+            PAYSTACK_RETRY_BACKOFF=0,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.plan = Plan.objects.create(name='Fake Plan', price_ngn=3000, included_days=8)
+        self.user = CustomUser.objects.create_user(email='f@example.com', username='f', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_initialize_then_verify(self):
+        reference = self.client.post(
+            '/api/payments/initialize/', {'plan_id': self.plan.id}, format='json'
+        ).data['reference']
+        response = self.client.get('/api/payments/verify/', {'reference': reference})
+        self.assertEqual(response.data['plan'], 'Fake Plan')
+        self.assertTrue(Subscription.objects.filter(user=self.user, paystack_reference=reference).exists())
+
+    def test_verify_costs_fixed_queries(self):
+        clear_caches()
+        references = [
+            self.client.post('/api/payments/initialize/', {'plan_id': self.plan.id}, format='json').data['reference']
+            for _ in range(2)
+        ]
+        get_plan_index()
+        # Reference check, user lookup, then insert + deactivate in a savepoint
+        for reference in references:
+            with self.assertNumQueries(6):
+                self.assertEqual(self.client.get('/api/payments/verify/', {'reference': reference}).status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/payments/verify/', {'reference': references[0]})
+        self.assertEqual(response.data['message'], 'Transaction already processed')
+        self.assertEqual(
+            list(Subscription.objects.filter(user=self.user, is_active=True).values_list('paystack_reference', flat=True)),
+            [references[1]],
+        )
+
+    def test_plan_index_invalidated_on_save(self):
+        clear_caches()
+        self.assertEqual(resolve_plan({'amount': 300000}), self.plan)
+        self.plan.paystack_plan_code = 'PLN_new'
+        self.plan.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_plan({'plan': {'plan_code': 'PLN_new'}}), self.plan)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_plan({'metadata': {'plan_id': self.plan.id}}), self.plan)
+
+    def test_stale_plan_index_is_rebuilt_on_a_miss(self):
+        clear_caches()
+        get_plan_index()
+        # Saved elsewhere: this process's cached index never heard of it
+        new_plan = Plan.objects.bulk_create([Plan(name='New Plan', price_ngn=4500, included_days=8)])[0]
+        reference = self.client.post(
+            '/api/payments/initialize/', {'plan_id': new_plan.id}, format='json'
+        ).data['reference']
+        response = self.client.get('/api/payments/verify/', {'reference': reference})
+        self.assertEqual(response.data['plan'], 'New Plan')
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_plan({'metadata': {'plan_id': new_plan.id}}), new_plan)
+
+    def test_injected_errors_exhaust_retries(self):
+        self.fake.error_rate = 1
+        response = self.client.get('/api/payments/verify/', {'reference': 'missing'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.fake.calls, 3)  # first try plus PAYSTACK_MAX_RETRIES
+
+        self.fake.error_rate, self.fake.drop_rate = 0, 1
+        response = self.client.get('/api/payments/verify/', {'reference': 'missing'})
+        self.assertEqual(response.status_code, 502)
+
+    def test_plan_sync_and_signed_webhook(self):
+        self.fake.add_plan('Fake Plan', 300000, 'PLN_fake')
+        call_command('update_paystack_plans', '--from-paystack', stdout=io.StringIO())
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.paystack_plan_code, 'PLN_fake')
+
+        body, signature = self.fake.webhook('charge.success', {'reference': 'w1'})
+        response = self.client.generic(
+            'POST', '/api/payments/webhook/', body,
+            content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(PaystackEvent.objects.filter(event='charge.success').exists())
+
+
+class ReconcilePaymentsTests(TestCase):
+    def setUp(self):
+        self.fake = FakePaystack(secret_key='sk_test_fake').start()
+        self.addCleanup(self.fake.stop)
+        overrides = override_settings(PAYSTACK_BASE_URL=self.fake.url, PAYSTACK_SECRET_KEY='sk_test_fake')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.basic = Plan.objects.create(name='Recon Basic', price_ngn=1111, included_days=8)
+        self.pro = Plan.objects.create(name='Recon Pro', price_ngn=2222, included_days=16)
+        self.alice = CustomUser.objects.create_user(email='alice@example.com', username='alice', password='pass12345')
+        self.bob = CustomUser.objects.create_user(email='bob@example.com', username='bob', password='pass12345')
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+
+    def pay(self, email, plan, reference):
+        self.fake.initialize({'email': email, 'amount': int(plan.price_ngn * 100), 'reference': reference})
+
+    def reconcile(self, *args):
+        out = io.StringIO()
+        call_command('reconcile_payments', '--from', '2000-01-01', '--checkpoint', self.checkpoint, *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_missing_and_repairs_mislinked(self):
+        self.pay('alice@example.com', self.basic, 'a-1')
+        self.pay('alice@example.com', self.pro, 'a-2')
+        self.pay('bob@example.com', self.pro, 'b-1')
+        self.pay('nobody@example.com', self.pro, 'n-1')
+        Subscription.objects.create(user=self.bob, plan=self.basic, paystack_reference='b-1')
+
+        # Plans once, then per page of 2: four reads plus the writes in one transaction
+        with self.assertNumQueries(18):
+            output = self.reconcile('--per-page', '2')
+
+        self.assertIn('created 2 (1 activated), repaired 1, matched 0, skipped 1', output)
+        self.assertEqual(
+            list(Subscription.objects.filter(user=self.alice, is_active=True).values_list('paystack_reference', flat=True)),
+            ['a-2'],
+        )
+        self.assertEqual(Subscription.objects.get(paystack_reference='b-1').plan, self.pro)
+        self.assertIn('matched 3', self.reconcile('--restart'))
+
+    def test_created_subscriptions_expire_and_renew_like_verified_ones(self):
+        self.pay('alice@example.com', self.basic, 'a-1')
+        self.fake.transactions['a-1']['paid_at'] = '2026-01-10T09:00:00.000Z'
+        self.reconcile()
+
+        sub = Subscription.objects.get(paystack_reference='a-1')
+        self.assertEqual(sub.start_date, datetime.date(2026, 1, 10))
+        self.assertEqual(sub.end_date, datetime.date(2026, 2, 9))
+        self.assertTrue(sub.paystack_authorization_code.startswith('AUTH_'))
+
+    def test_resumes_from_checkpoint(self):
+        for i in range(4):
+            self.pay('alice@example.com', self.basic, f'a-{i}')
+        self.reconcile('--per-page', '2', '--dry-run')
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        self.reconcile('--per-page', '2')
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        self.assertTrue(state['done'])
+
+        # A run interrupted after page 1 picks up at page 2
+        Subscription.objects.all().delete()
+        state.update(page=2, done=False)
+        with open(self.checkpoint, 'w') as f:
+            json.dump(state, f)
+        self.reconcile('--per-page', '2')
+        self.assertEqual(
+            set(Subscription.objects.values_list('paystack_reference', flat=True)), {'a-0', 'a-1'}
+        )
+
+
+class RenewalTests(TestCase):
+    def setUp(self):
+        self.fake = FakePaystack(secret_key='sk_test_fake').start()
+        self.addCleanup(self.fake.stop)
+        overrides = override_settings(
+            PAYSTACK_BASE_URL=self.fake.url, PAYSTACK_SECRET_KEY='sk_test_fake', PAYSTACK_RETRY_BACKOFF=0,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        clear_caches()
+        self.plan = Plan.objects.create(name='Renew Plan', price_ngn=5000, included_days=8)
+        self.today = datetime.date.today()
+
+    def subscribe(self, n, **fields):
+        """Pay through the fake (so the card authorization exists) and verify."""
+        user = CustomUser.objects.create_user(email=f'r{n}@example.com', username=f'r{n}', password='pass12345')
+        self.fake.initialize({'email': user.email, 'amount': 500000, 'reference': f'first-{n}'})
+        APIClient().get('/api/payments/verify/', {'reference': f'first-{n}'})
+        sub = Subscription.objects.get(user=user)
+        Subscription.objects.filter(pk=sub.pk).update(**fields)
+        sub.refresh_from_db()
+        return sub
+
+    def test_activation_sets_period_and_authorization(self):
+        sub = self.subscribe(0)
+        self.assertEqual(sub.end_date, self.today + datetime.timedelta(days=30))
+        self.assertTrue(sub.paystack_authorization_code.startswith('AUTH_'))
+        self.assertEqual(sub.period_start, self.today)
+
+    def test_renews_due_subscriptions_once(self):
+        due = self.subscribe(1, end_date=self.today + datetime.timedelta(days=1))
+        declined = self.subscribe(2, end_date=self.today, paystack_authorization_code='AUTH_revoked')
+        self.subscribe(3, end_date=self.today + datetime.timedelta(days=20))  # not due yet
+        self.subscribe(4, end_date=self.today, paystack_subscription_code='SUB_x')  # billed by Paystack
+
+        counts = renew_due_subscriptions(workers=4)
+        self.assertEqual((counts['renewed'], counts['failed']), (1, 1))
+
+        due.refresh_from_db()
+        self.assertEqual(due.end_date, self.today + datetime.timedelta(days=31))
+        self.assertEqual(due.period_start, self.today + datetime.timedelta(days=1))
+        self.assertEqual(
+            dict(RenewalAttempt.objects.values_list('subscription_id', 'status')),
+            {due.pk: 'SUCCESS', declined.pk: 'FAILED'},
+        )
+        # The renewed one is no longer due; the declined one retries with a new reference
+        counts = renew_due_subscriptions(workers=4, max_attempts=2)
+        self.assertEqual((counts['renewed'], counts['failed']), (0, 1))
+        self.assertTrue(RenewalAttempt.objects.filter(reference=renewal_reference(declined, 2)).exists())
+        self.assertEqual(renew_due_subscriptions(max_attempts=2)['exhausted'], 1)
+
+    def test_charge_made_by_a_crashed_run_is_not_repeated(self):
+        sub = self.subscribe(5, end_date=self.today)
+        reference = renewal_reference(sub, 1)
+        self.fake.charge_authorization({
+            'email': 'r5@example.com', 'amount': 500000, 'reference': reference,
+            'authorization_code': sub.paystack_authorization_code,
+        })
+        charges = len(self.fake.transactions)
+        self.assertEqual(renew_due_subscriptions()['renewed'], 1)
+        self.assertEqual(len(self.fake.transactions), charges)
+        self.assertEqual(RenewalAttempt.objects.get().reference, reference)
+
+    def test_renewal_webhook_leaves_the_renewed_subscription(self):
+        sub = self.subscribe(6, end_date=self.today + datetime.timedelta(days=1))
+        self.assertEqual(renew_due_subscriptions()['renewed'], 1)
+        charge = self.fake.transactions[renewal_reference(sub, 1)]
+        payload = {'event': 'charge.success', 'data': charge}
+        store_event(json.dumps(payload).encode(), payload)
+        process_pending_events()
+
+        self.assertEqual(PaystackEvent.objects.get().status, PaystackEvent.Status.PROCESSED)
+        self.assertEqual(list(Subscription.objects.filter(user=sub.user).values_list('pk', 'is_active')), [(sub.pk, True)])
+        sub.refresh_from_db()
+        self.assertEqual(sub.end_date, self.today + datetime.timedelta(days=31))
+
+    def test_unrecorded_renewal_charge_webhook_is_left_to_the_scheduler(self):
+        sub = self.subscribe(10, end_date=self.today)
+        # A run charged the card, then died before recording the attempt
+        charge = self.fake.charge_authorization({
+            'email': sub.user.email, 'amount': 500000, 'reference': renewal_reference(sub, 1),
+            'authorization_code': sub.paystack_authorization_code,
+        })[1]['data']
+        payload = {'event': 'charge.success', 'data': {**charge, 'metadata': {}}}
+        store_event(json.dumps(payload).encode(), payload)
+        process_pending_events()
+        self.assertEqual(Subscription.objects.filter(user=sub.user).count(), 1)
+
+        self.assertEqual(renew_due_subscriptions()['renewed'], 1)
+        sub.refresh_from_db()
+        self.assertEqual(sub.end_date, self.today + datetime.timedelta(days=30))
+
+    def test_reconciliation_leaves_renewal_charges_alone(self):
+        sub = self.subscribe(9, end_date=self.today + datetime.timedelta(days=1))
+        self.assertEqual(renew_due_subscriptions()['renewed'], 1)
+
+        counts, skipped = reconcile_transactions(list(self.fake.transactions.values()))
+        self.assertEqual((counts['created'], counts['matched'], skipped), (0, 2, []))
+        self.assertEqual(list(Subscription.objects.filter(user=sub.user).values_list('pk', 'is_active')), [(sub.pk, True)])
+        sub.refresh_from_db()
+        self.assertEqual(sub.end_date, self.today + datetime.timedelta(days=31))
+
+    def test_expired_subscription_stays_renewable_through_the_grace_period(self):
+        lapsed = self.subscribe(7, end_date=self.today - datetime.timedelta(days=1))
+        gone = self.subscribe(8, end_date=self.today - datetime.timedelta(days=10))
+        for sub in (lapsed, gone):
+            client = APIClient()
+            client.force_authenticate(sub.user)
+            self.assertEqual(client.post('/api/spaces/generate-token/').data['error'], 'Subscription has expired.')
+            sub.refresh_from_db()
+        self.assertTrue(lapsed.is_active)
+        self.assertFalse(gone.is_active)
+        self.assertEqual(renew_due_subscriptions()['renewed'], 1)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
@@ -6,12 +7,20 @@ from .views import (
     GenerateCheckInTokenView,
     CheckInValidateView,
     PartnerDashboardView,
-    PaymentInitializeView,
-    PaymentVerifyView,
     PartnerReportView
 )
 from .analytics_views import UserAnalyticsView
-from .partner_application import PartnerApplicationView
+from .bootstrap_views import BootstrapView
+from core.lazy import lazy_view
+
+# Payment views (and the Paystack client) load on the first payment request
+if settings.SERVER_MODE == 'asgi':
+    # Await Paystack instead of holding a worker thread for the round trip
+    payment_initialize = lazy_view('spaces.async_views.AsyncPaymentInitializeView', is_async=True)
+    payment_verify = lazy_view('spaces.async_views.AsyncPaymentVerifyView', is_async=True)
+else:
+    payment_initialize = lazy_view('spaces.payment_views.PaymentInitializeView')
+    payment_verify = lazy_view('spaces.payment_views.PaymentVerifyView')
 
 router = DefaultRouter()
 router.register(r'plans', PlanViewSet)
@@ -23,15 +32,17 @@ urlpatterns = [
     path('spaces/generate-token/', GenerateCheckInTokenView.as_view(), name='generate_token'),
     
     # 2. Subscriber & Payment endpoints
-    path('payments/initialize/', PaymentInitializeView.as_view(), name='payment_initialize'),
-    path('payments/verify/', PaymentVerifyView.as_view(), name='payment_verify'),
+    path('payments/initialize/', payment_initialize, name='payment_initialize'),
+    path('payments/verify/', payment_verify, name='payment_verify'),
+    path('payments/webhook/', lazy_view('spaces.payment_views.PaystackWebhookView'), name='payment_webhook'),
     
     # 3. Partner & Analytics endpoints
     path('check-in/validate/', CheckInValidateView.as_view(), name='validate_check_in_token'),
     path('partner/dashboard/', PartnerDashboardView.as_view(), name='partner_dashboard'),
     path('partner/reports/', PartnerReportView.as_view(), name='partner_reports'),
-    path('partner/apply/', PartnerApplicationView.as_view(), name='partner_apply'),
+    path('partner/apply/', lazy_view('spaces.partner_application.PartnerApplicationView'), name='partner_apply'),
     path('analytics/', UserAnalyticsView.as_view(), name='user_analytics'),
+    path('bootstrap/', BootstrapView.as_view(), name='app_bootstrap'),
 
     # 4. ROUTER LAST
     path('', include(router.urls)),
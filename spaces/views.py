@@ -4,9 +4,8 @@ from django.utils import timezone
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from rest_framework import viewsets, permissions, generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-import requests
-import traceback
 
 from .models import Plan, PartnerSpace, CheckIn, CheckInToken, Subscription
 from .serializers import (
@@ -17,10 +16,11 @@ from .serializers import (
     CheckInReportSerializer
 )
 from users.serializers import UserProfileSerializerDetailed 
+from users.authentication import TOKEN_USER_AUTHENTICATION_CLASSES
+from core import metrics
+from core.throttling import TokenBucketThrottle
 from .permissions import IsPartnerUser
-
-PAYSTACK_SECRET_KEY = settings.PAYSTACK_SECRET_KEY
-PAYSTACK_BASE_URL = "https://api.paystack.co"
+from .subscriptions import get_active_subscription, in_renewal_grace
 
 # Get the User model
 User = get_user_model()
@@ -37,6 +37,9 @@ class PartnerSpaceViewSet(viewsets.ReadOnlyModelViewSet):
 class GenerateCheckInTokenView(generics.GenericAPIView):
     serializer_class = CheckInTokenSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'checkin_token'
+    metrics_name = 'checkin_token'  # see core/metrics.py
 
     @transaction.atomic
     def post(self, request, *args, **kwargs):
@@ -48,20 +51,26 @@ class GenerateCheckInTokenView(generics.GenericAPIView):
         now = timezone.now()
         
         try:
-            sub = user.subscriptions.filter(is_active=True).first()
+            # Personal subscription first, then the member's team's
+            sub = get_active_subscription(user)
             
             if not sub:
+                metrics.CHECKIN_TOKEN_REFUSALS.inc(reason='no_subscription')
                 return Response({"error": "No active subscription found."}, status=status.HTTP_403_FORBIDDEN)
             
             if sub.end_date and sub.end_date < now.date():
-                sub.is_active = False
-                sub.save()
+                # Left active while renew_subscriptions may still retry the charge
+                if not in_renewal_grace(sub, now.date()):
+                    sub.is_active = False
+                    sub.save(update_fields=['is_active'])
+                metrics.CHECKIN_TOKEN_REFUSALS.inc(reason='subscription_expired')
                 return Response({"error": "Subscription has expired."}, status=status.HTTP_403_FORBIDDEN)
                 
         except Exception as e:
+            metrics.CHECKIN_TOKEN_REFUSALS.inc(reason='error')
             return Response({"error": f"Authorization check failed: {str(e)}"}, status=status.HTTP_403_FORBIDDEN)
 
-        start_date = sub.start_date
+        start_date = sub.period_start
         used_dates_qs = CheckIn.objects.filter(
             user=user, 
             timestamp__gte=start_date
@@ -76,10 +85,12 @@ class GenerateCheckInTokenView(generics.GenericAPIView):
 
         if not is_already_checked_in_today:
             if days_used_count >= total_days_allowed:
+                metrics.CHECKIN_TOKEN_REFUSALS.inc(reason='limit_reached')
                 return Response({"error": "Monthly plan limit reached."}, status=status.HTTP_403_FORBIDDEN)
 
         CheckInToken.objects.filter(user=user).delete()
         token = CheckInToken.objects.create(user=user)
+        metrics.CHECKIN_TOKENS.inc()
         
         serializer = self.get_serializer(token)
         return Response({
@@ -94,41 +105,52 @@ class GenerateCheckInTokenView(generics.GenericAPIView):
 
 class CheckInValidateView(generics.GenericAPIView):
     serializer_class = CheckInValidationSerializer
+    authentication_classes = TOKEN_USER_AUTHENTICATION_CLASSES
     permission_classes = [IsPartnerUser]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'checkin_validate'
+    metrics_name = 'checkin_validate'
 
     @transaction.atomic
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        if not serializer.is_valid():
+            metrics.CHECKIN_VALIDATION_FAILURES.inc(reason='invalid_request')
+            raise ValidationError(serializer.errors)
         code = serializer.validated_data['code']
         space_id = serializer.validated_data.get('space_id')
 
         space = request.user.managed_space
         if not space:
+            metrics.CHECKIN_VALIDATION_FAILURES.inc(reason='no_managed_space')
             return Response({"error": "No managed space assigned to this partner account."}, status=status.HTTP_400_BAD_REQUEST)
 
         if space_id and space.id != space_id:
+            metrics.CHECKIN_VALIDATION_FAILURES.inc(reason='wrong_space')
             return Response({"error": "Unauthorized space validation attempt."}, status=status.HTTP_403_FORBIDDEN)
         
         try:
             token = CheckInToken.objects.select_related('user').get(code=code)
         except CheckInToken.DoesNotExist:
+            metrics.CHECKIN_VALIDATION_FAILURES.inc(reason='not_found')
             return Response({"error": "Code not found."}, status=status.HTTP_404_NOT_FOUND)
 
         if hasattr(token, 'expires_at') and token.expires_at < timezone.now():
             token.delete()
+            metrics.CHECKIN_VALIDATION_FAILURES.inc(reason='expired')
             return Response({"error": "Code has expired."}, status=status.HTTP_400_BAD_REQUEST)
 
         user = token.user
         CheckIn.objects.create(user=user, space=space)
         token.delete()
+        metrics.CHECKINS.inc()
 
-        sub = user.subscriptions.filter(is_active=True).first()
+        sub = get_active_subscription(user)
         remaining_days = None
         if sub:
             used_count = CheckIn.objects.filter(
                 user=user, 
-                timestamp__gte=sub.start_date
+                timestamp__gte=sub.period_start
             ).values('timestamp__date').distinct().count()
             remaining_days = max(sub.plan.included_days - used_count, 0)
 
@@ -141,7 +163,10 @@ class CheckInValidateView(generics.GenericAPIView):
 
 
 class PartnerDashboardView(generics.RetrieveAPIView):
+    authentication_classes = TOKEN_USER_AUTHENTICATION_CLASSES
     permission_classes = [IsPartnerUser]
+    read_from_replica = True  # see core/db_routers.py
+    metrics_name = 'partner_dashboard'
 
     def get(self, request, *args, **kwargs):
         partner_space = request.user.managed_space
@@ -192,123 +217,12 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
-class PaymentInitializeView(generics.GenericAPIView):
-    permission_classes = [permissions.IsAuthenticated]
-    
-    def post(self, request, *args, **kwargs):
-        user = request.user
-        plan_id = request.data.get('plan_id')
-        
-        if not plan_id:
-            return Response({"error": "plan_id is required"}, status=400)
-        
-        plan = get_object_or_404(Plan, id=plan_id)
-        callback_url = getattr(settings, 'PAYMENT_CALLBACK_URL', 'https://workspace-nomad.vercel.app/payment-success')
-        
-        headers = {
-            "Authorization": f"Bearer {PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "email": user.email,
-            "amount": int(plan.price_ngn * 100),
-            "callback_url": callback_url,
-            "metadata": {
-                "user_id": str(user.id),
-                "plan_id": str(plan.id),
-                "user_email": user.email,
-                "plan_name": plan.name
-            }
-        }
-        
-        if plan.paystack_plan_code:
-            data["plan"] = plan.paystack_plan_code
-        
-        try:
-            response = requests.post(f"{PAYSTACK_BASE_URL}/transaction/initialize", headers=headers, json=data)
-            response_data = response.json()
-            if response_data.get('status'):
-                return Response(response_data['data'], status=status.HTTP_200_OK)
-            return Response({"error": response_data.get('message', 'Initialization failed')}, status=400)
-        except Exception as e:
-            return Response({"error": str(e)}, status=500)
-
-
-class PaymentVerifyView(generics.GenericAPIView):
-    permission_classes = [permissions.AllowAny]
-
-    @transaction.atomic
-    def get(self, request, *args, **kwargs):
-        reference = request.query_params.get('reference')
-        if not reference:
-            return Response({"error": "No reference provided"}, status=400)
-
-        headers = {"Authorization": f"Bearer {PAYSTACK_SECRET_KEY}"}
-        
-        try:
-            resp = requests.get(f"{PAYSTACK_BASE_URL}/transaction/verify/{reference}", headers=headers)
-            resp_json = resp.json()
-            
-            if not resp_json.get('status') or resp_json['data']['status'] != 'success':
-                return Response({"error": "Payment verification failed"}, status=400)
-
-            data = resp_json['data']
-            metadata = data.get('metadata', {})
-            
-            plan_id = metadata.get('plan_id') if isinstance(metadata, dict) else None
-            plan = None
-
-            # 1. Try to match via metadata
-            if plan_id:
-                plan = Plan.objects.filter(id=plan_id).first()
-            
-            # 2. Try to match via Paystack Plan Code
-            if not plan:
-                plan_info = data.get('plan')
-                plan_code = plan_info.get('plan_code') if isinstance(plan_info, dict) else plan_info
-                if plan_code:
-                    plan = Plan.objects.filter(paystack_plan_code=plan_code).first()
-
-            # 3. BULLETPROOF FALLBACK: Map the exact amount paid to the plan price
-            if not plan:
-                amount_paid = int(data.get('amount', 0)) / 100
-                plan = Plan.objects.filter(price_ngn=amount_paid).first()
-
-            if not plan:
-                return Response({"error": "Could not identify plan for this transaction. Missing DB link."}, status=400)
-
-            user_email = data['customer']['email']
-            user = User.objects.filter(email=user_email).first()
-            if not user:
-                return Response({"error": "User associated with payment not found"}, status=404)
-
-            if Subscription.objects.filter(paystack_reference=reference).exists():
-                return Response({"status": "success", "message": "Transaction already processed"}, status=200)
-
-            user.subscriptions.filter(is_active=True).update(is_active=False)
-
-            Subscription.objects.create(
-                user=user, 
-                plan=plan, 
-                paystack_reference=reference, 
-                is_active=True,
-                start_date=timezone.now().date()
-            )
-            
-            return Response({
-                "status": "success", 
-                "message": "Subscription activated successfully",
-                "plan": plan.name
-            }, status=200)
-
-        except Exception as e:
-            print(traceback.format_exc())
-            return Response({"error": "Internal Processing Error", "details": str(e)}, status=500)
-
-
 class PartnerReportView(generics.ListAPIView):
     serializer_class = CheckInReportSerializer
+    authentication_classes = TOKEN_USER_AUTHENTICATION_CLASSES
     permission_classes = [IsPartnerUser]
+    read_from_replica = True  # see core/db_routers.py
+    metrics_name = 'partner_report'
+
     def get_queryset(self):
-        return CheckIn.objects.filter(space=self.request.user.managed_space).order_by('-timestamp')
\ No newline at end of file
+        return CheckIn.objects.filter(space_id=self.request.user.managed_space_id).order_by('-timestamp')
\ No newline at end of file
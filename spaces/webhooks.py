@@ -0,0 +1,181 @@
+"""
+Paystack webhook ingestion and deferred processing.
+
+The endpoint verifies ``x-paystack-signature`` and stores the raw event in
+the ``PaystackEvent`` inbox. ``process_pending_events`` (run by the
+``process_paystack_events`` command) applies pending events in batches,
+loading the users, plans and subscriptions a batch needs with a handful of
+set-based queries.
+"""
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Subscription, PaystackEvent
+from .payments import get_plan_index, resolve_plan, activate_subscription, reusable_authorization
+from .renewals import renewal_charge_references
+
+User = get_user_model()
+
+def is_valid_signature(body, signature):
+    """HMAC-SHA512 of the raw body keyed with the secret key, as Paystack signs it."""
+    if not signature or not settings.PAYSTACK_SECRET_KEY:
+        return False
+    expected = hmac.new(
+        settings.PAYSTACK_SECRET_KEY.encode('utf-8'), body, hashlib.sha512
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def store_event(body, payload):
+    """Insert the event into the inbox; redeliveries of the same body are ignored."""
+    PaystackEvent.objects.bulk_create([
+        PaystackEvent(
+            event=str(payload.get('event', ''))[:64],
+            digest=hashlib.sha256(body).hexdigest(),
+            payload=payload,
+        )
+    ], ignore_conflicts=True)
+
+
+class EventRetry(Exception):
+    """The event can't be applied yet (e.g. it arrived before its charge)."""
+
+
+class _Batch:
+    """Rows needed to apply a batch of events, loaded up front."""
+
+    def __init__(self, events):
+        datas = [e.payload.get('data') or {} for e in events]
+        emails = {
+            (d.get('customer') or {}).get('email') for d in datas
+        } - {None}
+        references = {d.get('reference') for d in datas} - {None}
+        codes = {d.get('subscription_code') for d in datas} - {None}
+
+        self.plans = get_plan_index()
+        self.users = {u.email: u for u in User.objects.filter(email__in=emails)}
+        self.processed_references = set(
+            Subscription.objects.filter(paystack_reference__in=references)
+            .values_list('paystack_reference', flat=True)
+        )
+        # Renewal charges extend their subscription through renew_subscriptions
+        self.processed_references.update(renewal_charge_references(
+            d for d in datas if d.get('reference') not in self.processed_references
+        ))
+        self.active_subs = {
+            s.user_id: s for s in Subscription.objects.filter(
+                user__email__in=emails, is_active=True
+            ).order_by('id')
+        }
+        self.subs_by_code = {
+            s.paystack_subscription_code: s
+            for s in Subscription.objects.filter(paystack_subscription_code__in=codes)
+        }
+
+    def user_for(self, data):
+        email = (data.get('customer') or {}).get('email')
+        user = self.users.get(email)
+        if user is None:
+            raise EventRetry(f'No user with email {email!r}')
+        return user
+
+
+def _charge_success(batch, data):
+    reference = data.get('reference')
+    if not reference or reference in batch.processed_references:
+        return
+    user = batch.user_for(data)
+    plan = resolve_plan(data, batch.plans)
+    if plan is None:
+        # The cached index may predate a plan saved in another process
+        batch.plans = get_plan_index(refresh=True)
+        plan = resolve_plan(data, batch.plans)
+    if plan is None:
+        raise EventRetry('Could not identify plan for this transaction')
+    batch.active_subs[user.id] = activate_subscription(
+        user, plan, reference, reusable_authorization(data)
+    )
+    batch.processed_references.add(reference)
+
+
+def _subscription_create(batch, data):
+    user = batch.user_for(data)
+    sub = batch.active_subs.get(user.id)
+    if sub is None:
+        raise EventRetry('No active subscription to attach yet')
+    sub.paystack_subscription_code = data.get('subscription_code')
+    next_payment = parse_datetime(data.get('next_payment_date') or '')
+    if next_payment:
+        sub.end_date = next_payment.date()
+    sub.save(update_fields=['paystack_subscription_code', 'end_date'])
+    batch.subs_by_code[sub.paystack_subscription_code] = sub
+
+
+def _subscription_disable(batch, data):
+    sub = batch.subs_by_code.get(data.get('subscription_code'))
+    if sub is None:
+        return
+    # Access continues until the paid period ends; GenerateCheckInTokenView
+    # deactivates it lazily once end_date has passed.
+    if not sub.end_date or sub.end_date < timezone.now().date():
+        sub.is_active = False
+        sub.save(update_fields=['is_active'])
+
+
+HANDLERS = {
+    'charge.success': _charge_success,
+    'subscription.create': _subscription_create,
+    'subscription.disable': _subscription_disable,
+}
+
+
+def process_pending_events(batch_size=100, after_id=0, max_attempts=5):
+    """
+    Apply one batch of pending events with ids above ``after_id``.
+    Returns the last event id taken, or None when nothing was pending.
+
+    Each event runs in its own savepoint, so one bad event doesn't roll back
+    the rest of the batch. Events that can't be applied yet stay pending
+    until ``max_attempts`` runs have tried them.
+    """
+    with transaction.atomic():
+        events = list(
+            PaystackEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=PaystackEvent.Status.PENDING, id__gt=after_id)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return None
+
+        batch = _Batch(events)
+        now = timezone.now()
+        for event in events:
+            handler = HANDLERS.get(event.event)
+            if handler is None:
+                event.status = PaystackEvent.Status.IGNORED
+                event.processed_at = now
+                continue
+
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    handler(batch, event.payload.get('data') or {})
+            except Exception as e:
+                event.last_error = f'{type(e).__name__}: {e}'
+                if event.attempts >= max_attempts:
+                    event.status = PaystackEvent.Status.FAILED
+            else:
+                event.status = PaystackEvent.Status.PROCESSED
+                event.processed_at = now
+                event.last_error = ''
+
+        PaystackEvent.objects.bulk_update(
+            events, ['status', 'attempts', 'last_error', 'processed_at']
+        )
+        return events[-1].id
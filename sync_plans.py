@@ -5,6 +5,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
 from spaces.models import Plan
+from spaces import paystack
 
 # These MUST match what is in your frontend pages/plans.js
 UPDATES = {
@@ -16,6 +17,15 @@ UPDATES = {
 print("🔄 Syncing Plan Codes...")
 
 for name, code in UPDATES.items():
+    # Make sure the code exists on the Paystack account before linking it
+    try:
+        remote = paystack.fetch_plan(code)
+        if not remote.get('status'):
+            print(f"❌ Paystack does not know plan code {code}: {remote.get('message')}")
+            continue
+    except paystack.PaystackError as e:
+        print(f"⚠️  Could not verify {code} with Paystack ({e}); linking anyway.")
+
     try:
         plan = Plan.objects.get(name=name)
         plan.paystack_plan_code = code
@@ -1,10 +1,13 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from teams.models import Team
+from teams.context import get_admin_team
 from spaces.models import Plan, Subscription
+from users.authentication import TOKEN_USER_AUTHENTICATION_CLASSES
 
 @api_view(['POST'])
+@authentication_classes(TOKEN_USER_AUTHENTICATION_CLASSES)
 @permission_classes([IsAuthenticated])
 def add_subscription_to_team(request):
     """
@@ -17,7 +20,7 @@ def add_subscription_to_team(request):
             "error": "Only Team Admin users can use this endpoint"
         }, status=400)
     
-    team = user.administered_teams.first()
+    team = get_admin_team(request)
     if not team:
         return Response({
             "error": "User does not have a team"
@@ -0,0 +1,39 @@
+from .models import Team
+
+# Attribute used to memoize the admin's team on the underlying HttpRequest.
+# DRF's Request wraps the same HttpRequest for permissions, views and
+# serializer context, so every caller in a request shares one lookup.
+_ADMIN_TEAM_ATTR = '_admin_team_cache'
+
+
+def get_admin_team(request):
+    """
+    Return the team administered by ``request.user`` (with its subscription
+    and plan already joined), or None. Resolved at most once per request.
+    """
+    http_request = getattr(request, '_request', request)
+
+    if not hasattr(http_request, _ADMIN_TEAM_ATTR):
+        user = request.user
+        team = None
+        if user and user.is_authenticated:
+            teams = Team.objects.select_related('subscription__plan')
+            if getattr(user, 'is_token_user', False):
+                # The team id is already in the signed claims
+                team_id = user.administered_team_id
+                team = teams.filter(pk=team_id).first() if team_id else None
+            else:
+                team = teams.filter(admin_id=user.pk).order_by('id').first()
+        setattr(http_request, _ADMIN_TEAM_ATTR, team)
+
+    return getattr(http_request, _ADMIN_TEAM_ATTR)
+
+
+class TeamAdminMixin:
+    """
+    View mixin exposing the requesting admin's team as ``self.team``.
+    """
+
+    @property
+    def team(self):
+        return get_admin_team(self.request)
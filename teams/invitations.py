@@ -0,0 +1,136 @@
+"""
+Bulk invitations: an admin uploads a CSV or JSON list of emails and every
+new address gets an Invitation and an invite email.
+
+However many rows are uploaded, deduplication costs two queries (the
+team's member emails and its existing invitations), the rows are written
+with batched ``bulk_create``, and the invite emails are queued in the
+outbox (users/outbox.py) in the same transaction.
+"""
+import csv
+import io
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from users.outbox import queue_emails
+from .models import Invitation
+
+
+class BulkInviteError(ValueError):
+    """The upload itself is unusable (as opposed to individual bad rows)."""
+
+
+def parse_emails(data, files=None):
+    """
+    Emails from a bulk invite request, in upload order: a CSV file in
+    ``files['file']`` (an ``email`` column, or the first column), a JSON
+    ``{"emails": [...]}`` body or a bare JSON list.
+    """
+    upload = files.get('file') if files else None
+    if upload is not None:
+        try:
+            text = upload.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise BulkInviteError('The CSV file must be UTF-8 encoded.')
+        rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+        column = 0
+        if rows and 'email' in [cell.strip().lower() for cell in rows[0]]:
+            column = [cell.strip().lower() for cell in rows[0]].index('email')
+            rows = rows[1:]
+        return [row[column] if column < len(row) else '' for row in rows]
+
+    emails = data if isinstance(data, list) else data.get('emails')
+    if not isinstance(emails, list):
+        raise BulkInviteError('Upload a CSV file or send a JSON list of emails.')
+    return [str(email) for email in emails]
+
+
+def bulk_invite(team, sent_by_id, emails):
+    """
+    Invite every new address in ``emails`` to ``team``. Returns one result
+    per row: ``{'row', 'email', 'status'}`` where status is ``invited``,
+    ``invalid``, ``duplicate`` (repeated in the upload), ``member``,
+    ``pending`` or ``previously_invited``.
+    """
+    max_rows = getattr(settings, 'BULK_INVITE_MAX_ROWS', 5000)
+    if not emails:
+        raise BulkInviteError('No emails to invite.')
+    if len(emails) > max_rows:
+        raise BulkInviteError(f'At most {max_rows} emails can be invited at once.')
+
+    members = {email.lower() for email in team.members.values_list('email', flat=True)}
+    # (team, email) is unique, so an accepted or expired invitation also
+    # blocks a new one for that address
+    invited = {
+        email.lower(): status
+        for email, status in team.invitations.values_list('email', 'status')
+    }
+
+    results, invitations, seen = [], [], set()
+    invitation_results = {}
+    for row, raw in enumerate(emails, start=1):
+        email = raw.strip()
+        key = email.lower()
+        try:
+            validate_email(email)
+        except ValidationError:
+            status = 'invalid'
+        else:
+            if key in seen:
+                status = 'duplicate'
+            elif key in members:
+                status = 'member'
+            elif key in invited:
+                status = 'pending' if invited[key] == Invitation.Status.PENDING else 'previously_invited'
+            else:
+                status = 'invited'
+                invitation = Invitation(team=team, email=email, sent_by_id=sent_by_id)
+                invitations.append(invitation)
+                invitation_results[invitation.pk] = len(results)
+            seen.add(key)
+        results.append({'row': row, 'email': email, 'status': status})
+
+    with transaction.atomic():
+        # ignore_conflicts covers invitations created concurrently since the
+        # dedupe queries above; unique_together keeps them single
+        Invitation.objects.bulk_create(invitations, batch_size=500, ignore_conflicts=True)
+        if invitations:
+            # Ids are generated here, so the rows that were really inserted
+            # are the ones whose ids made it into the table
+            saved = set(team.invitations.values_list('pk', flat=True))
+            created = [invitation for invitation in invitations if invitation.pk in saved]
+            for invitation in invitations:
+                if invitation.pk not in saved:
+                    results[invitation_results[invitation.pk]]['status'] = 'pending'
+            if created:
+                queue_invitation_emails(team, created)
+
+    return results
+
+
+def invitation_message(team, invitation):
+    signup_url = f"{settings.FRONTEND_URL}/signup"
+    return (
+        f'You have been invited to join {team.name} on Workspace Africa',
+        f'''
+        Hello,
+
+        {team.name} has invited you to join their team on Workspace Africa.
+
+        Create your account with this email address to get access:
+        {signup_url}
+
+        Best regards,
+        Workspace Africa Team
+        ''',
+        settings.DEFAULT_FROM_EMAIL,
+        [invitation.email],
+    )
+
+
+def queue_invitation_emails(team, invitations):
+    """Queue the invite emails; send_outbound_emails delivers them."""
+    queue_emails([invitation_message(team, invitation) for invitation in invitations])
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .context import get_admin_team
+
 class IsTeamAdmin(permissions.BasePermission):
     """
     Custom permission to only allow users with the 'TEAM_ADMIN' type
@@ -13,25 +15,32 @@ class IsTeamAdmin(permissions.BasePermission):
         if not (user and user.is_authenticated):
             return False
         
-        # Check if they are a team admin for *any* team
-        return (
-            user.user_type == 'TEAM_ADMIN' and
-            user.administered_teams.exists()
-        )
+        if user.user_type != 'TEAM_ADMIN':
+            return False
+
+        # Claim-backed token users carry their team id in the JWT
+        if getattr(user, 'is_token_user', False):
+            return user.administered_team_id is not None
+
+        # Resolves (and caches) the team the view is about to use anyway
+        return get_admin_team(request) is not None
 
     def has_object_permission(self, request, view, obj):
         # For object-level permissions (e.g., editing a specific team)
         # make sure they are the admin *of that specific team*.
-        user = request.user
         if not self.has_permission(request, view):
             return False
         
+        team = get_admin_team(request)
+        if team is None:
+            return False
+
         # If the object is a Team
         if hasattr(obj, 'admin'):
-            return obj.admin == user
+            return obj.pk == team.pk
         
         # If the object is a member (CustomUser) or Invitation
-        if hasattr(obj, 'team'):
-            return obj.team.admin == user
+        if hasattr(obj, 'team_id'):
+            return obj.team_id == team.pk
             
         return False
@@ -1,9 +1,13 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models import Team, Invitation
+from .context import get_admin_team
 from users.serializers import TeamMemberSerializer
 # Import the subscription serializer from the 'spaces' app
 from spaces.serializers import SubscriptionSerializer 
 
+User = get_user_model()
+
 class TeamSerializer(serializers.ModelSerializer):
     """
     Serializer for the Team Admin's team.
@@ -26,8 +30,7 @@ class InvitationSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'team', 'status', 'created_at', 'sent_by')
 
     def validate_email(self, value):
-        admin_user = self.context['request'].user
-        team = admin_user.administered_teams.first()
+        team = get_admin_team(self.context['request'])
         
         if not team:
             raise serializers.ValidationError("You do not admin a team.")
@@ -52,3 +55,16 @@ class TeamBillingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Team
         fields = ('id', 'name', 'subscription')
+
+class TeamMemberUsageSerializer(serializers.ModelSerializer):
+    """
+    A member's usage in the team's current billing period. The figures are
+    annotated onto the queryset by TeamUsageView.
+    """
+    days_used = serializers.IntegerField(read_only=True)
+    check_ins = serializers.IntegerField(source='check_in_count', read_only=True)
+    last_visit = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ('id', 'email', 'username', 'user_type', 'days_used', 'check_ins', 'last_visit')
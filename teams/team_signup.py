@@ -1,15 +1,22 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from .models import Team, Invitation
 from users.models import CustomUser
 from spaces.models import Plan, Subscription
+from core.throttling import TokenBucketThrottle
+from users.outbox import queue_email
 import secrets
 
 class TeamSignupView(generics.CreateAPIView):
     permission_classes = []  # Allow unauthenticated access
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'signup'
     
+    # The welcome email is queued with the rows it describes, so a failed
+    # signup neither leaves a half-created team nor sends mail
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         try:
             data = request.data
@@ -68,8 +75,8 @@ class TeamSignupView(generics.CreateAPIView):
             admin_user.team = team
             admin_user.save()
             
-            # Send welcome email
-            send_mail(
+            # Queue welcome email
+            queue_email(
                 'Welcome to Workspace Africa Teams!',
                 f'''
                 Hello {data.get('adminName')},
@@ -91,9 +98,7 @@ class TeamSignupView(generics.CreateAPIView):
                 Best regards,
                 Workspace Africa Team
                 ''',
-                settings.DEFAULT_FROM_EMAIL,
                 [data.get('adminEmail')],
-                fail_silently=True,
             )
             
             return Response(
@@ -107,6 +112,7 @@ class TeamSignupView(generics.CreateAPIView):
             )
             
         except Exception as e:
+            transaction.set_rollback(True)
             return Response(
                 {"error": f"Team signup failed: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1,3 +1,221 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.cache import clear_caches
+from spaces.models import CheckIn, PartnerSpace, Plan, Subscription
+from users.models import CustomUser, OutboundEmail
+from .models import Team, Invitation
+
+
+def make_user(email, user_type=CustomUser.UserType.SUBSCRIBER, **extra):
+    return CustomUser.objects.create_user(
+        email=email, username=email.split('@')[0], password='pass12345',
+        user_type=user_type, **extra
+    )
+
+
+class TeamContextTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        plan = Plan.objects.create(name='Team Pro', price_ngn=45000, included_days=18)
+        self.admin = make_user('admin@example.com', CustomUser.UserType.TEAM_ADMIN)
+        self.team = Team.objects.create(
+            name='Acme', admin=self.admin,
+            subscription=Subscription.objects.create(plan=plan, is_active=True),
+        )
+        self.admin.team = self.team
+        self.admin.save()
+        self.member = make_user('member@example.com', CustomUser.UserType.TEAM_MEMBER, team=self.team)
+
+        self.client = APIClient()
+        response = self.client.post('/api/auth/token/', {'email': 'admin@example.com', 'password': 'pass12345'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_invite_resolves_team_once(self):
+        self.client.get('/api/team/billing/')  # warm the token version cache
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/team/invites/', {'email': 'new@example.com'})
+        self.assertEqual(response.status_code, 201)
+        team_lookups = [q for q in ctx.captured_queries if 'FROM "teams_team"' in q['sql']]
+        self.assertEqual(len(team_lookups), 1)
+        self.assertTrue(Invitation.objects.filter(team=self.team, email='new@example.com').exists())
+
+    def test_billing_joins_subscription_and_plan(self):
+        self.client.get('/api/team/billing/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/team/billing/')
+        self.assertEqual(response.data['subscription']['plan']['name'], 'Team Pro')
+
+    def test_cannot_remove_member_of_another_team(self):
+        other_admin = make_user('other@example.com', CustomUser.UserType.TEAM_ADMIN)
+        other_team = Team.objects.create(name='Other', admin=other_admin)
+        outsider = make_user('outsider@example.com', CustomUser.UserType.TEAM_MEMBER, team=other_team)
+
+        self.assertEqual(self.client.delete(f'/api/team/members/{outsider.pk}/').status_code, 404)
+        self.assertEqual(self.client.delete(f'/api/team/members/{self.member.pk}/').status_code, 204)
+        self.assertEqual(self.client.delete(f'/api/team/members/{self.admin.pk}/').status_code, 400)
+
+
+class TeamUsageTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        plan = Plan.objects.create(name='Team Pro', price_ngn=45000, included_days=18)
+        subscription = Subscription.objects.create(plan=plan, is_active=True)
+        Subscription.objects.filter(pk=subscription.pk).update(
+            start_date=timezone.localdate() - datetime.timedelta(days=10)
+        )
+        self.admin = make_user('admin@example.com', CustomUser.UserType.TEAM_ADMIN)
+        self.team = Team.objects.create(name='Acme', admin=self.admin, subscription=subscription)
+        self.space = PartnerSpace.objects.create(name='Hub', address='Lagos')
+
+        self.client = APIClient()
+        response = self.client.post('/api/auth/token/', {'email': 'admin@example.com', 'password': 'pass12345'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def add_member(self, email, visits_days_ago=()):
+        member = make_user(email, CustomUser.UserType.TEAM_MEMBER, team=self.team)
+        now = timezone.now()
+        for days_ago in visits_days_ago:
+            check_in = CheckIn.objects.create(user=member, space=self.space)
+            CheckIn.objects.filter(pk=check_in.pk).update(timestamp=now - datetime.timedelta(days=days_ago))
+        return member
+
+    def test_usage_counts_current_period_only(self):
+        self.add_member('busy@example.com', [0, 0, 1, 3, 25])  # 25 days ago: previous period
+        self.add_member('idle@example.com')
+
+        response = self.client.get('/api/team/usage/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['period_start'], timezone.localdate() - datetime.timedelta(days=10))
+        busy, idle = response.data['results']
+        self.assertEqual((busy['email'], busy['days_used'], busy['check_ins']), ('busy@example.com', 3, 4))
+        self.assertEqual((idle['days_used'], idle['check_ins'], idle['last_visit']), (0, 0, None))
+
+    def test_sorting_and_pagination(self):
+        for i in range(5):
+            self.add_member(f'member{i}@example.com', range(i))
+
+        response = self.client.get('/api/team/usage/', {'ordering': 'check_ins', 'page_size': 2})
+        self.assertEqual([r['check_ins'] for r in response.data['results']], [0, 1])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([r['check_ins'] for r in response.data['results']], [2, 3])
+
+        response = self.client.get('/api/team/usage/', {'ordering': '-last_visit'})
+        self.assertEqual(response.data['results'][-1]['email'], 'member0@example.com')
+
+    def test_query_count_does_not_grow_with_team_size(self):
+        self.add_member('first@example.com', [1, 2])
+        self.client.get('/api/team/usage/')  # warm the token version cache
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/team/usage/')
+
+        for i in range(20):
+            self.add_member(f'member{i}@example.com', [i % 5])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/team/usage/')
+        self.assertEqual(response.data['count'], 21)
+        self.assertEqual(len(large), len(small))
+        self.assertLessEqual(len(large), 3)
+
+    def test_requires_team_admin(self):
+        member = self.add_member('member@example.com')
+        client = APIClient()
+        client.force_authenticate(member)
+        self.assertEqual(client.get('/api/team/usage/').status_code, 403)
+
+
+class BulkInviteTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.admin = make_user('admin@example.com', CustomUser.UserType.TEAM_ADMIN)
+        self.team = Team.objects.create(name='Acme', admin=self.admin)
+        make_user('member@example.com', CustomUser.UserType.TEAM_MEMBER, team=self.team)
+        Invitation.objects.create(team=self.team, email='pending@example.com', sent_by=self.admin)
+        Invitation.objects.create(
+            team=self.team, email='expired@example.com', sent_by=self.admin, status=Invitation.Status.EXPIRED
+        )
+
+        self.client = APIClient()
+        response = self.client.post('/api/auth/token/', {'email': 'admin@example.com', 'password': 'pass12345'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_csv_upload_reports_each_row(self):
+        upload = SimpleUploadedFile('invites.csv', (
+            'name,email\n'
+            'Ada,ada@example.com\n'
+            'Ada again,ADA@example.com\n'
+            'Member,Member@example.com\n'
+            'Pending,pending@example.com\n'
+            'Expired,expired@example.com\n'
+            'Typo,not-an-email\n'
+            '\n'
+            'Bola,bola@example.com\n'
+        ).encode(), content_type='text/csv')
+
+        response = self.client.post('/api/team/invites/bulk/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['invited'], response.data['skipped']), (2, 5))
+        self.assertEqual(
+            [r['status'] for r in response.data['results']],
+            ['invited', 'duplicate', 'member', 'pending', 'previously_invited', 'invalid', 'invited'],
+        )
+        self.assertEqual(
+            set(self.team.invitations.values_list('email', flat=True)),
+            {'pending@example.com', 'expired@example.com', 'ada@example.com', 'bola@example.com'},
+        )
+        self.assertEqual(
+            sorted(OutboundEmail.objects.values_list('to', flat=True)),
+            [['ada@example.com'], ['bola@example.com']],
+        )
+
+    def test_json_list_uses_constant_queries(self):
+        self.client.get('/api/team/billing/')  # warm the token version cache
+        emails = [f'new{i}@example.com' for i in range(1200)] + ['member@example.com']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/team/invites/bulk/', {'emails': emails}, format='json')
+        self.assertEqual(response.data['invited'], 1200)
+        self.assertEqual(self.team.invitations.count(), 1202)
+        self.assertEqual(OutboundEmail.objects.count(), 1200)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        # Besides the batched inserts: team, members, invitations, the inserted ids and the transaction
+        self.assertLessEqual(len(ctx) - len(inserts), 6)
+
+    def test_invitations_created_concurrently_are_not_reported(self):
+        bulk_create = Invitation.objects.bulk_create
+
+        def racing_bulk_create(invitations, **kwargs):
+            # Another request invites one of the addresses after the dedupe queries
+            Invitation.objects.create(team=self.team, email='late@example.com', sent_by=self.admin)
+            return bulk_create(invitations, **kwargs)
+
+        with mock.patch.object(Invitation.objects, 'bulk_create', racing_bulk_create):
+            response = self.client.post(
+                '/api/team/invites/bulk/', ['late@example.com', 'early@example.com'], format='json'
+            )
+        self.assertEqual(response.data['invited'], 1)
+        self.assertEqual([r['status'] for r in response.data['results']], ['pending', 'invited'])
+        self.assertEqual(list(OutboundEmail.objects.values_list('to', flat=True)), [['early@example.com']])
+
+    def test_rejects_unusable_uploads(self):
+        self.assertEqual(self.client.post('/api/team/invites/bulk/', {}, format='json').status_code, 400)
+        with override_settings(BULK_INVITE_MAX_ROWS=2):
+            response = self.client.post(
+                '/api/team/invites/bulk/', ['a@example.com', 'b@example.com', 'c@example.com'], format='json'
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.team.invitations.filter(email='a@example.com').exists())
+
+    def test_nothing_new_returns_200(self):
+        response = self.client.post('/api/team/invites/bulk/', ['pending@example.com'], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['status'], 'pending')
+        self.assertFalse(OutboundEmail.objects.exists())
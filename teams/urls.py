@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from core.lazy import lazy_view
 from .views import (
     TeamAdminDashboardView, 
     TeamMemberViewSet, 
     InvitationViewSet,
-    TeamBillingView # <-- Import new
+    TeamBillingView, # <-- Import new
+    TeamUsageView,
 )
 
 router = DefaultRouter()
@@ -14,6 +16,7 @@ router.register(r'invites', InvitationViewSet, basename='team-invitation')
 urlpatterns = [
     path('dashboard/', TeamAdminDashboardView.as_view(), name='team-dashboard'),
     path('billing/', TeamBillingView.as_view(), name='team-billing'), # <-- NEW URL
+    path('usage/', TeamUsageView.as_view(), name='team-usage'),
     
     path('', include(router.urls)),
 ]
@@ -24,9 +27,8 @@ urlpatterns += [
     path('add-subscription/', add_subscription_to_team, name='add-subscription'),
 ]
 
-from .team_signup import TeamSignupView
-
 urlpatterns += [
-    path('signup/', TeamSignupView.as_view(), name='team_signup'),
+    # Rarely hit; imported on first use to keep it out of cold starts
+    path('signup/', lazy_view('teams.team_signup.TeamSignupView'), name='team_signup'),
 ]
 
@@ -1,34 +1,130 @@
-from rest_framework import viewsets, generics, status
+import datetime
+
+from rest_framework import viewsets, generics, status, filters
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from .models import Team, Invitation
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, FilteredRelation, Max, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
 from .serializers import (
     TeamSerializer, 
     InvitationSerializer, 
     TeamMemberSerializer,
-    TeamBillingSerializer 
+    TeamBillingSerializer,
+    TeamMemberUsageSerializer,
 )
 from .permissions import IsTeamAdmin
+from .invitations import BulkInviteError, parse_emails, bulk_invite, queue_invitation_emails
+from .context import TeamAdminMixin
+from users.authentication import TOKEN_USER_AUTHENTICATION_CLASSES
+from core.renderers import FastJSONParser
 from django.shortcuts import get_object_or_404
 
 User = get_user_model()
 
-class TeamAdminDashboardView(generics.RetrieveAPIView):
+class TeamAdminDashboardView(TeamAdminMixin, generics.RetrieveAPIView):
     serializer_class = TeamSerializer
+    authentication_classes = TOKEN_USER_AUTHENTICATION_CLASSES
     permission_classes = [IsTeamAdmin]
 
     def get_object(self):
-        return self.request.user.administered_teams.first()
+        return self.team
 
-class TeamBillingView(generics.RetrieveAPIView):
+class TeamBillingView(TeamAdminMixin, generics.RetrieveAPIView):
     serializer_class = TeamBillingSerializer
+    authentication_classes = TOKEN_USER_AUTHENTICATION_CLASSES
     permission_classes = [IsTeamAdmin]
 
     def get_object(self):
-        return self.request.user.administered_teams.first()
+        return self.team
+
+class TeamUsagePagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class TeamUsageOrdering(filters.OrderingFilter):
+    """
+    ``?ordering=`` over the usage columns. Members who haven't visited sort
+    last either way, and ties are broken by id so pages don't overlap.
+    """
+    # Response field -> annotation ('check_ins' is taken by the relation)
+    aliases = {'check_ins': 'check_in_count'}
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = []
+        for field in self.get_ordering(request, queryset, view) or []:
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            expression = F(self.aliases.get(name, name))
+            ordering.append(
+                expression.desc(nulls_last=True) if descending else expression.asc(nulls_last=True)
+            )
+        return queryset.order_by(*ordering, 'id')
+
+
+class TeamUsageView(TeamAdminMixin, generics.ListAPIView):
+    """
+    Per-member usage for the team's current billing period.
+    GET /api/team/usage/?ordering=-days_used&page=2
+
+    Days used, check-ins and last visit come from one grouped query over the
+    members' check-ins in the period, so the page costs the same few
+    queries however many seats the team has.
+    """
+    serializer_class = TeamMemberUsageSerializer
+    authentication_classes = TOKEN_USER_AUTHENTICATION_CLASSES
+    permission_classes = [IsTeamAdmin]
+    pagination_class = TeamUsagePagination
+    filter_backends = [TeamUsageOrdering]
+    ordering_fields = ('days_used', 'check_ins', 'last_visit', 'email')
+    ordering = ('-days_used',)
+    read_from_replica = True  # see core/db_routers.py
+    metrics_name = 'team_usage'  # see core/metrics.py
+
+    def get_period(self):
+        """(first day, last day) of the team subscription's current period."""
+        period = datetime.timedelta(days=getattr(settings, 'SUBSCRIPTION_PERIOD_DAYS', 30))
+        today = timezone.localdate()
+        subscription = self.team.subscription if self.team else None
+        start = subscription.period_start if subscription and subscription.start_date else None
+        start = start or today - period + datetime.timedelta(days=1)
+        return start, start + period - datetime.timedelta(days=1)
+
+    def get_queryset(self):
+        team = self.team
+        if not team:
+            return User.objects.none()
+        start, _ = self.get_period()
+        since = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+        return (
+            team.members
+            .annotate(period_check_ins=FilteredRelation(
+                'check_ins', condition=Q(check_ins__timestamp__gte=since),
+            ))
+            .annotate(
+                days_used=Count(TruncDate('period_check_ins__timestamp'), distinct=True),
+                check_in_count=Count('period_check_ins'),
+                last_visit=Max('period_check_ins__timestamp'),
+            )
+        )
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        start, end = self.get_period()
+        response.data['period_start'] = start
+        response.data['period_end'] = end
+        return response
 
 # --- MODIFIED VIEW ---
-class TeamMemberViewSet(viewsets.ModelViewSet): # <-- Changed from ReadOnly
+class TeamMemberViewSet(TeamAdminMixin, viewsets.ModelViewSet): # <-- Changed from ReadOnly
     """
     Lists, retrieves, and removes members of the admin's team.
     GET /api/team/members/
@@ -36,13 +132,14 @@ class TeamMemberViewSet(viewsets.ModelViewSet): # <-- Changed from ReadOnly
     DELETE /api/team/members/<id>/ (to remove)
     """
     serializer_class = TeamMemberSerializer
+    authentication_classes = TOKEN_USER_AUTHENTICATION_CLASSES
     permission_classes = [IsTeamAdmin]
     
     # We only want GET and DELETE, not POST/PUT
     http_method_names = ['get', 'delete', 'head', 'options']
 
     def get_queryset(self):
-        team = self.request.user.administered_teams.first()
+        team = self.team
         if team:
             return team.members.all()
         return User.objects.none()
@@ -54,7 +151,7 @@ class TeamMemberViewSet(viewsets.ModelViewSet): # <-- Changed from ReadOnly
         member = self.get_object()
         
         # Safety check: admin can't remove themselves
-        if member == request.user:
+        if member.pk == request.user.pk:
             return Response(
                 {"error": "You cannot remove yourself from the team."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -69,20 +166,40 @@ class TeamMemberViewSet(viewsets.ModelViewSet): # <-- Changed from ReadOnly
         
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class InvitationViewSet(viewsets.ModelViewSet):
+class InvitationViewSet(TeamAdminMixin, viewsets.ModelViewSet):
     serializer_class = InvitationSerializer
+    authentication_classes = TOKEN_USER_AUTHENTICATION_CLASSES
     permission_classes = [IsTeamAdmin]
     http_method_names = ['get', 'post', 'delete', 'head', 'options'] # Added delete
 
     def get_queryset(self):
-        team = self.request.user.administered_teams.first()
+        team = self.team
         if team:
-            return team.invitations.all().order_by('-created_at')
+            return team.invitations.select_related('sent_by').order_by('-created_at')
         return Invitation.objects.none()
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        team = self.request.user.administered_teams.first()
-        serializer.save(
-            team=team,
-            sent_by=self.request.user
+        invitation = serializer.save(
+            team=self.team,
+            sent_by_id=self.request.user.pk
+        )
+        queue_invitation_emails(self.team, [invitation])
+
+    @action(detail=False, methods=['post'], parser_classes=[FastJSONParser, MultiPartParser])
+    def bulk(self, request):
+        """
+        POST /api/team/invites/bulk/ with a CSV ``file`` upload or a JSON
+        list of emails. Responds with one result per row.
+        """
+        try:
+            emails = parse_emails(request.data, request.FILES)
+            results = bulk_invite(self.team, request.user.pk, emails)
+        except BulkInviteError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        invited = sum(1 for result in results if result['status'] == 'invited')
+        return Response(
+            {"invited": invited, "skipped": len(results) - invited, "results": results},
+            status=status.HTTP_201_CREATED if invited else status.HTTP_200_OK
         )
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import get_token_version
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user backed entirely by the signed role claims in a JWT.
+
+    ``user_type``, ``managed_space_id``, ``team_id`` and
+    ``administered_team_id`` are read from the token, so permission checks
+    cost no queries. Any other attribute loads the real user once and is
+    delegated to it, which keeps views that need the model working.
+    """
+    is_token_user = True
+
+    @cached_property
+    def concrete_user(self):
+        return get_user_model().objects.get(pk=self.id)
+
+    @cached_property
+    def managed_space(self):
+        if self.managed_space_id is None:
+            return None
+        from spaces.models import PartnerSpace
+        return PartnerSpace.objects.filter(pk=self.managed_space_id).first()
+
+    def __getattr__(self, attr):
+        token = self.__dict__.get('token')
+        if token is not None and attr in token:
+            return token[attr]
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.concrete_user, attr)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that returns a ``ClaimsUser`` instead of querying the
+    user table. Claims are trusted only while the token's ``token_version``
+    matches the user's current version (cached, see users/tokens.py).
+
+    Tokens issued before role claims existed, or any token when
+    ``JWT_TOKEN_USER_MODE`` is off, fall back to the regular user lookup.
+    """
+
+    def get_user(self, validated_token):
+        if (
+            not getattr(settings, 'JWT_TOKEN_USER_MODE', True)
+            or 'token_version' not in validated_token
+        ):
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        current_version = get_token_version(user_id)
+        if current_version is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if current_version != validated_token['token_version']:
+            raise AuthenticationFailed(
+                _("Token claims are out of date. Please log in again."),
+                code="token_outdated",
+            )
+        return ClaimsUser(validated_token)
+
+
+# Views that only need the role claims opt in with
+# ``authentication_classes = TOKEN_USER_AUTHENTICATION_CLASSES``.
+TOKEN_USER_AUTHENTICATION_CLASSES = [
+    ClaimsJWTAuthentication,
+    TokenAuthentication,
+    SessionAuthentication,
+]
@@ -0,0 +1,44 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from users.models import OutboundEmail
+from users.outbox import send_pending_emails
+
+class Command(BaseCommand):
+    help = 'Deliver queued transactional email from the outbox in batches over one mail connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=None,
+                            help='Mark a message FAILED after this many sends (default OUTBOX_MAX_ATTEMPTS)')
+        parser.add_argument('--poll', type=float, default=0,
+                            help='Keep running, checking for new mail every POLL seconds')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        connection = get_connection()
+        try:
+            while True:
+                # Drain everything that is due, then stop or wait for more
+                sent, failed = send_pending_emails(
+                    connection, batch_size=options['batch_size'], max_attempts=options['max_attempts']
+                )
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    continue
+                if not options['poll']:
+                    break
+                # Don't hold an idle SMTP session open between polls
+                connection.close()
+                time.sleep(options['poll'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        pending = OutboundEmail.objects.filter(status=OutboundEmail.Status.PENDING).count()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Sent {total_sent} email(s), {total_failed} failed attempt(s). Still pending: {pending}'
+        ))
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 class CustomUser(AbstractUser):
     class UserType(models.TextChoices):
@@ -33,8 +34,42 @@ class CustomUser(AbstractUser):
         related_name='members'
     )
 
+    # Bumped whenever role data embedded in JWT claims changes, which
+    # invalidates previously issued tokens (see users/tokens.py).
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
     def __str__(self):
         return self.email
+
+
+class OutboundEmail(models.Model):
+    """
+    Outbox of transactional email. Views queue messages in the same
+    transaction as the rows they describe; send_outbound_emails delivers
+    them, so SMTP never sits on the request path.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        SENT = 'SENT', 'Sent'
+        FAILED = 'FAILED', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(help_text="List of recipient addresses")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Failed sends are retried with exponential backoff from here
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,108 @@
+"""
+Transactional email outbox.
+
+``queue_email`` / ``queue_emails`` store messages as OutboundEmail rows, so
+they commit (or roll back) with whatever the request wrote. The
+send_outbound_emails command calls ``send_pending_emails`` to deliver them
+in batches over one reused mail connection. A message that fails is retried
+with exponential backoff and marked FAILED after ``max_attempts`` tries.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+def _outbound(subject, body, to, from_email=None):
+    return OutboundEmail(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    )
+
+
+def queue_email(subject, body, to, from_email=None):
+    """Queue one message; same arguments as ``send_mail``."""
+    email = _outbound(subject, body, to, from_email)
+    email.save()
+    return email
+
+
+def queue_emails(messages):
+    """Queue ``(subject, body, from_email, to)`` tuples, as for ``send_mass_mail``."""
+    OutboundEmail.objects.bulk_create(
+        [_outbound(subject, body, to, from_email) for subject, body, from_email, to in messages],
+        batch_size=500,
+    )
+
+
+def retry_delay(attempts):
+    """Backoff before the next try after ``attempts`` failed sends."""
+    base = getattr(settings, 'OUTBOX_RETRY_BACKOFF', 60)
+    return datetime.timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def send_pending_emails(connection=None, batch_size=100, max_attempts=None):
+    """
+    Send one batch of due messages over ``connection`` (opened here if not
+    given). Returns a ``(sent, failed)`` tuple; ``(0, 0)`` when nothing is due.
+
+    Rows are claimed in a short transaction (``skip_locked``) by counting
+    the attempt and moving ``next_attempt_at`` past OUTBOX_CLAIM_TIMEOUT,
+    so several workers can drain the outbox without sending a message
+    twice, and no row lock is held while SMTP is slow. A worker that dies
+    mid-batch leaves its messages to be retried once the claim runs out.
+    """
+    max_attempts = max_attempts or getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    claim_timeout = datetime.timedelta(seconds=getattr(settings, 'OUTBOX_CLAIM_TIMEOUT', 300))
+    sent = failed = 0
+
+    with transaction.atomic():
+        now = timezone.now()
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.Status.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for email in emails:
+            email.attempts += 1
+            email.next_attempt_at = now + claim_timeout
+        OutboundEmail.objects.bulk_update(emails, ['attempts', 'next_attempt_at'])
+    if not emails:
+        return sent, failed
+
+    own_connection = connection is None
+    connection = connection or get_connection()
+    for email in emails:
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, email.to, connection=connection
+        )
+        try:
+            # A no-op while the connection is open. Left closed, the
+            # backend would connect and disconnect around every message.
+            connection.open()
+            message.send()
+        except Exception as e:
+            # Drop a broken connection; the next send reconnects
+            connection.close()
+            failed += 1
+            email.last_error = f'{type(e).__name__}: {e}'
+            if email.attempts >= max_attempts:
+                email.status = OutboundEmail.Status.FAILED
+            else:
+                email.next_attempt_at = now + retry_delay(email.attempts)
+        else:
+            sent += 1
+            email.status = OutboundEmail.Status.SENT
+            email.sent_at = timezone.now()
+            email.last_error = ''
+    if own_connection:
+        connection.close()
+
+    OutboundEmail.objects.bulk_update(emails, ['status', 'last_error', 'next_attempt_at', 'sent_at'])
+    return sent, failed
@@ -1,7 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import set_role_claims
 
 User = get_user_model()
 
@@ -32,9 +36,24 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token['email'] = user.email
-        token['user_type'] = user.user_type
-        return token
+        return set_role_claims(token, user)
+
+
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-issues the role claims from the database on refresh, so a token
+    invalidated by a role change can be renewed without logging in again.
+    """
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            pk=refresh[api_settings.USER_ID_CLAIM], is_active=True
+        ).first()
+        if not user:
+            raise InvalidToken("User not found or inactive.")
+        data['access'] = str(set_role_claims(refresh.access_token, user))
+        return data
 
 
 class UserProfileSerializerDetailed(serializers.ModelSerializer):
@@ -57,14 +76,13 @@ class UserProfileSerializerDetailed(serializers.ModelSerializer):
         )
 
     def _get_active_sub(self, obj):
+        # Memoized on the user instance, so the five method fields below
+        # share one query instead of running one each.
         try:
-            if hasattr(obj, 'subscriptions'):
-                return obj.subscriptions.filter(is_active=True).first()
-            elif hasattr(obj, 'subscription_set'):
-                return obj.subscription_set.filter(is_active=True).first()
+            from spaces.subscriptions import get_active_subscription
+            return get_active_subscription(obj)
         except Exception:
             return None
-        return None
 
     def get_subscription(self, obj):
         sub = self._get_active_sub(obj)
@@ -100,7 +118,7 @@ class UserProfileSerializerDetailed(serializers.ModelSerializer):
             checkins_mgr = getattr(obj, 'check_ins', getattr(obj, 'checkin_set', None))
             if checkins_mgr:
                 return checkins_mgr.filter(
-                    timestamp__gte=sub.start_date
+                    timestamp__gte=sub.period_start
                 ).values('timestamp__date').distinct().count()
         except Exception:
             return 0
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from spaces.models import PartnerSpace
+from .tokens import ROLE_CLAIM_FIELDS, bump_token_version
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_partner_space(sender, instance, created, **kwargs):
@@ -25,3 +26,61 @@ def create_partner_space(sender, instance, created, **kwargs):
         # FIXED: Update the user's managed_space directly via queryset
         # This prevents the signal from re-firing recursively!
         sender.objects.filter(pk=instance.pk).update(managed_space=space)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def track_role_claim_changes(sender, instance, update_fields=None, **kwargs):
+    """
+    Note whether any field embedded in the JWT role claims is changing,
+    so post_save can bump the user's token version.
+    """
+    instance._role_claims_changed = False
+    if not instance.pk:
+        return
+
+    attnames = [sender._meta.get_field(name).attname for name in ROLE_CLAIM_FIELDS]
+    if update_fields is not None and set(update_fields).isdisjoint(ROLE_CLAIM_FIELDS + tuple(attnames)):
+        # e.g. the last_login update on every token obtain
+        return
+
+    previous = sender.objects.filter(pk=instance.pk).values(*attnames).first()
+    if previous and any(previous[f] != getattr(instance, f) for f in attnames):
+        instance._role_claims_changed = True
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_role_claims(sender, instance, created, **kwargs):
+    if getattr(instance, '_role_claims_changed', False):
+        bump_token_version([instance.pk])
+        instance.token_version += 1
+        instance._role_claims_changed = False
+
+
+@receiver(pre_save, sender='teams.Team')
+def track_team_admin_change(sender, instance, **kwargs):
+    previous_admin_id = None
+    if instance.pk:
+        previous_admin_id = sender.objects.filter(pk=instance.pk).values_list(
+            'admin_id', flat=True
+        ).first()
+    instance._previous_admin_id = previous_admin_id
+
+
+@receiver(post_save, sender='teams.Team')
+def invalidate_team_admin_claims(sender, instance, created, **kwargs):
+    """The administered_team_id claim changes for both the old and new admin."""
+    previous_admin_id = getattr(instance, '_previous_admin_id', None)
+    if created or previous_admin_id != instance.admin_id:
+        bump_token_version({previous_admin_id, instance.admin_id})
+
+
+@receiver(pre_delete, sender='teams.Team')
+def track_deleted_team_members(sender, instance, **kwargs):
+    # Read before SET_NULL detaches them (a queryset update, so no save signals)
+    instance._member_ids = list(instance.members.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender='teams.Team')
+def invalidate_deleted_team_claims(sender, instance, **kwargs):
+    """The team_id and administered_team_id claims name a team that is gone."""
+    bump_token_version([instance.admin_id, *getattr(instance, '_member_ids', [])])
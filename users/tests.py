@@ -1,3 +1,184 @@
-from django.test import TestCase
+import datetime
+import io
+import smtplib
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.cache import clear_caches
+from spaces.models import PartnerSpace
+from spaces.permissions import IsPartnerUser
+from teams.models import Team
+from .authentication import ClaimsJWTAuthentication, ClaimsUser
+from .models import CustomUser, OutboundEmail
+from .outbox import queue_email, send_pending_emails
+
+
+class RoleClaimTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.partner = CustomUser.objects.create_user(
+            email='partner@example.com', username='partner', password='pass12345',
+            user_type=CustomUser.UserType.PARTNER,
+        )
+        self.partner.refresh_from_db()
+        self.client = APIClient()
+
+    def obtain(self, email='partner@example.com'):
+        response = self.client.post('/api/auth/token/', {'email': email, 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def authenticate(self, access):
+        request = type('Request', (), {'META': {'HTTP_AUTHORIZATION': f'Bearer {access}'}})()
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_token_carries_role_claims(self):
+        token = AccessToken(self.obtain()['access'])
+        self.assertEqual(token['user_type'], 'PARTNER')
+        self.assertEqual(token['managed_space_id'], self.partner.managed_space_id)
+        self.assertIsNone(token['team_id'])
+        self.assertEqual(token['token_version'], self.partner.token_version)
+
+    def test_partner_permission_is_a_pure_claim_check(self):
+        access = self.obtain()['access']
+        self.authenticate(access)  # warm the token version cache
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+            request = type('Request', (), {'user': user})()
+            self.assertIsInstance(user, ClaimsUser)
+            self.assertTrue(IsPartnerUser().has_permission(request, None))
+
+    def test_role_change_invalidates_claims(self):
+        access = self.obtain()['access']
+        self.partner.managed_space = PartnerSpace.objects.create(name='Other', address='Ibadan')
+        self.partner.save()
+        response = self.client.get('/api/partner/dashboard/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_reissues_current_claims(self):
+        tokens = self.obtain()
+        admin = CustomUser.objects.create_user(
+            email='admin@example.com', username='admin', password='pass12345',
+            user_type=CustomUser.UserType.TEAM_ADMIN,
+        )
+        admin_tokens = self.obtain('admin@example.com')
+        team = Team.objects.create(name='Acme', admin=admin)
+
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': admin_tokens['refresh']})
+        token = AccessToken(response.data['access'])
+        self.assertEqual(token['administered_team_id'], team.id)
+        self.assertEqual(self.authenticate(response.data['access']).administered_team_id, team.id)
+
+        # Unrelated users keep their tokens
+        self.assertEqual(self.authenticate(tokens['access']).pk, self.partner.pk)
+
+    def test_deleting_a_team_invalidates_member_claims(self):
+        admin = CustomUser.objects.create_user(
+            email='admin@example.com', username='admin', password='pass12345',
+            user_type=CustomUser.UserType.TEAM_ADMIN,
+        )
+        team = Team.objects.create(name='Acme', admin=admin)
+        member = CustomUser.objects.create_user(
+            email='member@example.com', username='member', password='pass12345',
+            user_type=CustomUser.UserType.TEAM_MEMBER, team=team,
+        )
+        access = self.obtain('member@example.com')['access']
+        self.assertEqual(self.authenticate(access).team_id, team.id)
+
+        team.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+    def test_last_login_update_keeps_tokens_valid(self):
+        access = self.obtain()['access']
+        self.obtain()  # updates last_login through save(update_fields=...)
+        self.assertEqual(self.authenticate(access).pk, self.partner.pk)
+
+
+class FlakyBackend(locmem.EmailBackend):
+    """Refuses mail for one address, delivers the rest."""
+
+    def send_messages(self, messages):
+        if any('bounce@example.com' in m.to for m in messages):
+            raise smtplib.SMTPRecipientsRefused({'bounce@example.com': (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+class ReentrantBackend(locmem.EmailBackend):
+    """Runs a second sender mid-send, as a concurrent worker would."""
+
+    def send_messages(self, messages):
+        self.concurrent = send_pending_emails()
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='users.tests.FlakyBackend', OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_BACKOFF=60,
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_partner_application_queues_instead_of_sending(self):
+        response = self.client.post('/api/partner/apply/', {
+            'email': 'host@example.com', 'fullName': 'Ada Host',
+            'spaceName': 'Hub One', 'spaceAddress': 'Ibadan',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(
+            sorted(e.to[0] for e in OutboundEmail.objects.all()),
+            sorted(['host@example.com', settings.ADMIN_EMAIL]),
+        )
+
+    def test_failed_signup_rolls_back_rows_and_email(self):
+        with mock.patch('teams.team_signup.queue_email', side_effect=RuntimeError('boom')):
+            response = self.client.post('/api/team/signup/', {
+                'adminEmail': 'owner@example.com', 'adminName': 'Owner', 'companyName': 'Acme',
+                'plan': {'name': 'Team Outbox', 'price': '45000', 'daysPerMember': 18},
+            }, format='json')
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(CustomUser.objects.filter(email='owner@example.com').exists())
+        self.assertFalse(Team.objects.filter(name='Acme').exists())
+
+    def test_sender_retries_with_backoff(self):
+        queue_email('Hi', 'Body', ['one@example.com'])
+        queue_email('Hi', 'Body', ['bounce@example.com'])
+        queue_email('Hi', 'Body', ['two@example.com'])
+
+        out = io.StringIO()
+        call_command('send_outbound_emails', stdout=out)
+        self.assertIn('Sent 2 email(s), 1 failed attempt(s). Still pending: 1', out.getvalue())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['one@example.com', 'two@example.com'])
+
+        bounce = OutboundEmail.objects.get(to=['bounce@example.com'])
+        self.assertEqual((bounce.status, bounce.attempts), (OutboundEmail.Status.PENDING, 1))
+        self.assertIn('SMTPRecipientsRefused', bounce.last_error)
+        self.assertGreater(bounce.next_attempt_at, timezone.now() + datetime.timedelta(seconds=50))
+
+        # Not due yet; once it is, the second failure is final
+        self.assertEqual(send_pending_emails(), (0, 0))
+        OutboundEmail.objects.filter(pk=bounce.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(send_pending_emails(), (0, 1))
+        bounce.refresh_from_db()
+        self.assertEqual((bounce.status, bounce.attempts), (OutboundEmail.Status.FAILED, 2))
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.Status.SENT).count(), 2)
+
+    @override_settings(EMAIL_BACKEND='users.tests.ReentrantBackend')
+    def test_messages_are_claimed_before_sending(self):
+        queue_email('Hi', 'Body', ['one@example.com'])
+        connection = get_connection()
+        self.assertEqual(send_pending_emails(connection), (1, 0))
+        # The first sender's claim was committed before it talked to SMTP
+        self.assertEqual(connection.concurrent, (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
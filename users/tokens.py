@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+
+TOKEN_VERSION_CACHE_KEY = 'users:token_version:{}'
+
+# User fields whose values are embedded in the JWT role claims. A change to
+# any of them bumps ``token_version`` and invalidates outstanding tokens.
+ROLE_CLAIM_FIELDS = ('user_type', 'managed_space', 'team', 'is_active')
+
+
+def set_role_claims(token, user):
+    """
+    Embed the role data permission checks need into a token, so claim-mode
+    requests can authorize without loading the user or their space/team.
+    """
+    token['email'] = user.email
+    token['user_type'] = user.user_type
+    token['managed_space_id'] = user.managed_space_id
+    token['team_id'] = user.team_id
+    token['administered_team_id'] = (
+        user.administered_teams.order_by('id').values_list('id', flat=True).first()
+    )
+    token['token_version'] = user.token_version
+    return token
+
+
+def get_token_version(user_id):
+    """
+    Current token version for a user, served from cache when warm.
+    Returns None if the user does not exist.
+    """
+    key = TOKEN_VERSION_CACHE_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = get_user_model().objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        if version is None:
+            return None
+        cache.set(key, version, getattr(settings, 'TOKEN_VERSION_CACHE_TIMEOUT', 60))
+    return version
+
+
+def bump_token_version(user_ids):
+    """Invalidate the role claims of every token issued to these users."""
+    user_ids = [pk for pk in user_ids if pk is not None]
+    if not user_ids:
+        return
+    get_user_model().objects.filter(pk__in=user_ids).update(token_version=F('token_version') + 1)
+    cache.delete_many([TOKEN_VERSION_CACHE_KEY.format(pk) for pk in user_ids])
@@ -1,17 +1,24 @@
 from django.contrib.auth import get_user_model
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from core.throttling import TokenBucketThrottle
 from .serializers import (
     UserRegisterSerializer, 
     UserProfileSerializerDetailed, 
-    MyTokenObtainPairSerializer
+    MyTokenObtainPairSerializer,
+    MyTokenRefreshSerializer
 )
 
 User = get_user_model()
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'auth'
+
+class MyTokenRefreshView(TokenRefreshView):
+    serializer_class = MyTokenRefreshSerializer
 
 class UserRegisterView(generics.CreateAPIView):
     queryset = User.objects.all()